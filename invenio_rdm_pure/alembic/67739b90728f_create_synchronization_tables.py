@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Create synchronization tables."""
+
+import sqlalchemy as sa
+import sqlalchemy_utils
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "67739b90728f"
+down_revision = "651a2a955f3a"
+branch_labels = ()
+depends_on = None
+
+
+def upgrade():
+    """Upgrade database."""
+    op.create_table(
+        "pure_sync_state",
+        sa.Column("created", sa.DateTime(), nullable=False),
+        sa.Column("updated", sa.DateTime(), nullable=False),
+        sa.Column("uuid", sa.String(length=255), nullable=False),
+        sa.Column("recid", sa.String(length=255), nullable=True),
+        sa.Column("fingerprint", sa.String(length=64), nullable=True),
+        sa.Column(
+            "file_checksums",
+            sqlalchemy_utils.types.json.JSONType(),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("uuid", name=op.f("pk_pure_sync_state")),
+    )
+    op.create_table(
+        "pure_sync_chunk",
+        sa.Column("created", sa.DateTime(), nullable=False),
+        sa.Column("updated", sa.DateTime(), nullable=False),
+        sa.Column("offset", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("size", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.PrimaryKeyConstraint("offset", "size", name=op.f("pk_pure_sync_chunk")),
+    )
+    op.create_table(
+        "pure_sync_run",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(length=20), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("started", sa.DateTime(), nullable=False),
+        sa.Column("finished", sa.DateTime(), nullable=True),
+        sa.Column("records", sa.Integer(), nullable=False),
+        sa.Column("failed", sa.Integer(), nullable=False),
+        sa.Column("window_start", sa.Date(), nullable=True),
+        sa.Column("window_end", sa.Date(), nullable=True),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_pure_sync_run")),
+    )
+    op.create_index(
+        op.f("ix_pure_sync_run_started"), "pure_sync_run", ["started"], unique=False
+    )
+    op.create_index(
+        "ix_pure_sync_run_status_window_end",
+        "pure_sync_run",
+        ["status", "window_end"],
+        unique=False,
+    )
+    op.create_table(
+        "pure_sync_lock",
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column("run_id", sa.Integer(), nullable=False),
+        sa.Column("expires", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["run_id"],
+            ["pure_sync_run.id"],
+            name=op.f("fk_pure_sync_lock_run_id_pure_sync_run"),
+        ),
+        sa.PrimaryKeyConstraint("name", name=op.f("pk_pure_sync_lock")),
+    )
+
+
+def downgrade():
+    """Downgrade database."""
+    op.drop_table("pure_sync_lock")
+    op.drop_index("ix_pure_sync_run_status_window_end", table_name="pure_sync_run")
+    op.drop_index(op.f("ix_pure_sync_run_started"), table_name="pure_sync_run")
+    op.drop_table("pure_sync_run")
+    op.drop_table("pure_sync_chunk")
+    op.drop_table("pure_sync_state")
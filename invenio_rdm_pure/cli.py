@@ -11,10 +11,10 @@
 import json
 import random
 from datetime import date, timedelta
-from os.path import dirname, isfile, join
+from os.path import isfile
+from typing import Iterable
 
 import click
-from faker import Faker
 from flask import current_app
 from flask.cli import with_appcontext
 from flask_principal import Identity
@@ -22,7 +22,18 @@ from invenio_access.permissions import any_user
 from invenio_records_marc21.services import Marc21RecordService, Metadata
 from invenio_records_marc21.vocabularies import Vocabularies
 
-from .converter import Converter, Marc21Record
+from .converter import Converter
+from .models import PureSyncRun
+from .synchronizer import Synchronizer
+from .tasks import distribute_initial_synchronization, request_person_synchronization
+from .testing import CorpusGenerator, FakePureServer
+from .testing.benchmark import (
+    compare_to_baseline,
+    format_results,
+    load_results,
+    run_benchmark,
+    save_results,
+)
 from .utils import get_user_id, load_file_as_string
 
 
@@ -41,15 +52,20 @@ def fake_feature_date(days=365):
     return _date.strftime("%Y-%m-%d")
 
 
-def create_invenio_record(record: dict) -> None:
-    """Create a record."""
-    converter = Converter()
-    record_marc21 = converter.convert_pure_json_to_marc21_xml(record)
+def create_invenio_records(records: Iterable[dict]) -> None:
+    """Convert and store records."""
+    for _, record_marc21 in Converter().convert_many(records, pretty=True):
+        if isinstance(record_marc21, Exception):
+            click.secho(
+                f"ERROR - Can't convert provided JSON to valid Marc21XML: {record_marc21}",
+                fg="red",
+            )
+            continue
+        store_invenio_record(record_marc21)
 
-    if not Marc21Record.is_valid_marc21_xml_string(record_marc21):
-        click.secho("ERROR - Can't convert provided JSON to valid Marc21XML.", fg="red")
-        return
 
+def store_invenio_record(record_marc21: str) -> None:
+    """Store a record."""
     invenio_pure_user_email = str(current_app.config.get("INVENIO_PURE_USER_EMAIL"))
     invenio_pure_user_password = str(
         current_app.config.get("INVENIO_PURE_USER_PASSWORD")
@@ -69,22 +85,6 @@ def create_invenio_record(record: dict) -> None:
     click.secho("Record converted and stored successfully.", fg="green")
 
 
-def create_demo_record() -> dict:
-    """Create a demo record dict."""
-    with open(join(dirname(__file__), "data/pure_record_fake.json"), "rb") as fp:
-        demo_record = json.load(fp)
-
-    faker = Faker()
-
-    demo_record["title"]["value"] = faker.text()
-    for i in range(len(demo_record["abstract"]["text"])):
-        demo_record["abstract"]["text"][i]["value"] = faker.text()
-    for i in range(len(demo_record["publisher"]["name"]["text"])):
-        demo_record["publisher"]["name"]["text"][i]["value"] = faker.name()
-
-    return demo_record
-
-
 @click.group()
 def pure():
     """Commands for InvenioRdmPure."""
@@ -102,7 +102,8 @@ def pure_import_json(data):
         record = json.loads(data)
     except json.JSONDecodeError:
         click.secho("ERROR - Invalid JSON provided.", fg="red")
-    create_invenio_record(record)
+        return
+    create_invenio_records([record])
 
 
 @pure.command("demo")
@@ -119,8 +120,240 @@ def pure_demo(number):
     """Demonstrate conversion and storage of Pure records."""
     click.echo("Creating demo records...")
 
-    for _ in range(number):
-        demo_record = create_demo_record()
-        create_invenio_record(demo_record)
+    create_invenio_records(CorpusGenerator(random.randrange(2**32)).generate(number))
 
     click.secho("Demo records created succesfully.", fg="green")
+
+
+@pure.command("sync")
+@click.option(
+    "--resume",
+    is_flag=True,
+    default=False,
+    help="Resume an interrupted initial synchronization.",
+)
+@click.option(
+    "--distributed",
+    is_flag=True,
+    default=False,
+    help="Enqueue a celery task per page, processed by all workers.",
+)
+@click.option(
+    "--cursor",
+    is_flag=True,
+    default=False,
+    help="Follow the navigation links of Pure instead of counting pages up front.",
+)
+@click.option(
+    "--granularity",
+    "-g",
+    default=100,
+    show_default=True,
+    type=int,
+    help="Number of research outputs per page.",
+)
+@click.option(
+    "--wait",
+    default=0,
+    show_default=True,
+    type=float,
+    help="Seconds to wait for a running synchronization to finish.",
+)
+@with_appcontext
+def pure_sync(resume, distributed, cursor, granularity, wait):
+    """Run the initial synchronization of all Pure research outputs."""
+    if distributed and cursor:
+        raise click.UsageError("--cursor can not be combined with --distributed.")
+    if distributed:
+        result = distribute_initial_synchronization(granularity, resume, wait)
+        if result is None:
+            click.secho("ERROR - Another synchronization is running.", fg="red")
+            raise SystemExit(1)
+        click.secho(f"Synchronization tasks enqueued ({result.id}).", fg="green")
+        return
+    click.echo("Synchronizing research outputs...")
+    synchronizer = Synchronizer()
+    if cursor:
+        synchronize = synchronizer.run_streaming_research_output_synchronization
+        synchronized = synchronize(page_size=granularity, resume=resume, wait=wait)
+    else:
+        synchronize = synchronizer.run_initial_research_output_synchronization
+        synchronized = synchronize(granularity=granularity, resume=resume, wait=wait)
+    if not synchronized:
+        click.secho("ERROR - Another synchronization is running.", fg="red")
+        raise SystemExit(1)
+    click.secho("Research outputs synchronized successfully.", fg="green")
+
+
+@pure.command("sync-person")
+@click.argument("person_uuid")
+@click.option(
+    "--enqueue",
+    is_flag=True,
+    default=False,
+    help="Enqueue the synchronization on the celery queue of user synchronizations.",
+)
+@with_appcontext
+def pure_sync_person(person_uuid, enqueue):
+    """Synchronize the research outputs of the Pure person with given uuid."""
+    if enqueue:
+        result = request_person_synchronization(person_uuid)
+        click.secho(f"Synchronization task enqueued ({result.id}).", fg="green")
+        return
+    synchronizer = Synchronizer()
+    if not synchronizer.run_user_synchronization(person_uuid):
+        click.secho("ERROR - The person is being synchronized already.", fg="red")
+        raise SystemExit(1)
+    click.secho("Research outputs synchronized successfully.", fg="green")
+
+
+@pure.command("runs")
+@click.option(
+    "--number",
+    "-n",
+    default=10,
+    show_default=True,
+    type=int,
+    help="Number of runs to list.",
+)
+@with_appcontext
+def pure_runs(number):
+    """List the latest synchronization runs."""
+    for run in PureSyncRun.get_latest(number):
+        finished = run.finished.isoformat(" ", "seconds") if run.finished else "-"
+        throughput = f"{run.throughput:.1f}/s" if run.throughput is not None else "-"
+        window = ""
+        if run.window_start:
+            window = f"  changes {run.window_start} to {run.window_end}"
+        click.echo(
+            f"{run.id:>6} {run.kind:<12} {run.status:<8} "
+            f"{run.started.isoformat(' ', 'seconds')}  {finished:<19} "
+            f"{run.records:>8} records {run.failed:>6} failed {throughput:>10}"
+            f"{window}"
+        )
+
+
+@pure.command("benchmark")
+@click.option(
+    "--size",
+    "-n",
+    default=1000,
+    show_default=True,
+    type=int,
+    help="Number of generated records, e.g. 1000, 10000 or 100000.",
+)
+@click.option(
+    "--seed", default=0, show_default=True, type=int, help="Seed of the corpus."
+)
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    help="JSON file with baseline results to compare to.",
+)
+@click.option(
+    "--save",
+    type=click.Path(dir_okay=False, writable=True),
+    help="JSON file to save the results to, e.g. as new baseline.",
+)
+@click.option(
+    "--tolerance",
+    default=0.2,
+    show_default=True,
+    type=float,
+    help="Relative deviation from the baseline regarded as regression.",
+)
+def pure_benchmark(size, seed, baseline, save, tolerance):
+    """Benchmark conversion, serialization and validation of generated records."""
+    results = run_benchmark(size, seed)
+    click.echo(format_results(results))
+    if save:
+        save_results(results, save)
+    if baseline:
+        regressions = compare_to_baseline(results, load_results(baseline), tolerance)
+        for regression in regressions:
+            click.secho(f"REGRESSION - {regression}", fg="red")
+        if regressions:
+            raise SystemExit(1)
+        click.secho("No regressions compared to the baseline.", fg="green")
+
+
+@pure.command("fake-server")
+@click.option("--host", default="127.0.0.1", show_default=True, help="Host to bind.")
+@click.option("--port", default=8080, show_default=True, type=int, help="Port to bind.")
+@click.option(
+    "--size",
+    "-n",
+    default=1000,
+    show_default=True,
+    type=int,
+    help="Number of research outputs.",
+)
+@click.option(
+    "--seed", default=0, show_default=True, type=int, help="Seed of the corpus."
+)
+@click.option(
+    "--latency",
+    default=0.0,
+    show_default=True,
+    type=float,
+    help="Delay of every response in seconds.",
+)
+@click.option(
+    "--error-rate",
+    default=0.0,
+    show_default=True,
+    type=float,
+    help="Fraction of requests failing with 500.",
+)
+@click.option(
+    "--throttle-rate",
+    default=0.0,
+    show_default=True,
+    type=float,
+    help="Fraction of requests throttled with 429.",
+)
+@click.option(
+    "--truncate-rate",
+    default=0.0,
+    show_default=True,
+    type=float,
+    help="Fraction of file downloads cut off mid-transfer.",
+)
+@click.option(
+    "--max-file-size",
+    default=64 * 1024,
+    show_default=True,
+    type=int,
+    help="Maximum size of the served files in bytes.",
+)
+def pure_fake_server(
+    host,
+    port,
+    size,
+    seed,
+    latency,
+    error_rate,
+    throttle_rate,
+    truncate_rate,
+    max_file_size,
+):
+    """Run a fake Pure REST API serving generated research outputs."""
+    server = FakePureServer(
+        size=size,
+        seed=seed,
+        host=host,
+        port=port,
+        latency=latency,
+        error_rate=error_rate,
+        throttle_rate=throttle_rate,
+        truncate_rate=truncate_rate,
+        max_file_size=max_file_size,
+    )
+    click.echo(f"Serving {size} research outputs, set PURE_API_URL={server.api_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        click.echo(", ".join(f"{key}: {value}" for key, value in server.stats.items()))
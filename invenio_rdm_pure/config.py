@@ -66,3 +66,144 @@ PURE_PASSWORD = ""
 
 PURE_RESPONSIBLE_EMAIL = ""
 """Email address of Pure user having the necessary permissions to delete Pure entries."""
+
+PURE_REQUEST_TIMEOUT = (5, 60)
+"""Connect and read timeout in seconds for requests to Pure."""
+
+PURE_REQUEST_MAX_RETRIES = 5
+"""Maximum number of retries of a failed request to Pure."""
+
+PURE_REQUEST_BACKOFF_FACTOR = 0.5
+"""Base delay in seconds of the exponential backoff between retries."""
+
+PURE_REQUEST_BACKOFF_MAX = 30
+"""Maximum delay in seconds between two retries."""
+
+PURE_SYNCHRONIZER_MAX_WORKERS = None
+"""Number of worker threads of the synchronizer.
+
+   Defaults to the number of CPUs. The connection pool of the Pure client
+   is sized accordingly.
+   """
+
+PURE_SYNCHRONIZER_FETCH_CONCURRENCY = 8
+"""Number of page requests to Pure kept in flight during synchronization."""
+
+PURE_SYNCHRONIZATION_DAYS_SPAN = 7
+"""Number of days of Pure changes synchronized if no previous run is recorded."""
+
+PURE_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+"""Size in bytes of the chunks in which files are streamed from Pure."""
+
+PURE_DOWNLOAD_CHECKSUM_ALGORITHM = "md5"
+"""Hash algorithm of the checksums computed while downloading files from Pure."""
+
+PURE_DOWNLOAD_MAX_ATTEMPTS = 5
+"""Maximum number of attempts to download a file, each resuming the previous one."""
+
+PURE_SYNCHRONIZER_STREAM_FILES = False
+"""Stream files from Pure directly into the record storage.
+
+   If enabled, files are not spooled to the local disk of the worker before
+   they are attached to the record, and interrupted transfers are restarted
+   instead of resumed.
+   """
+
+PURE_SYNC_FINGERPRINT_EXCLUDED_FIELDS = ("totalScopusCitations", "scopusMetrics")
+"""Fields of Pure research outputs which do not cause a new record version.
+
+   Research outputs are only synchronized again if their fingerprint changes,
+   these fields change frequently without affecting the Invenio record.
+   """
+
+PURE_SYNCHRONIZER_PIPELINE_WORKERS = {
+    "convert": 2,
+    "transfer": 4,
+    "persist": 2,
+    "notify": 1,
+}
+"""Number of worker threads per stage of the synchronization pipeline.
+
+   The initial synchronization passes every page of research outputs through
+   these stages, so the stages of different pages run at the same time.
+   """
+
+PURE_SYNCHRONIZER_PIPELINE_QUEUE_SIZE = 2
+"""Maximum number of pages waiting in front of a stage of the pipeline."""
+
+PURE_SYNC_LOCK_LEASE = 600
+"""Lease in seconds of the lock held by the running synchronization.
+
+   Running synchronizations renew the lease every third of it, the lock of
+   a crashed synchronization is released once its lease expires, and its
+   run is finished as failed. Triggers of a synchronization while another
+   one holds the lock are skipped.
+   """
+
+PURE_USER_SYNCHRONIZATION_QUEUE = "pure_user_synchronization"
+"""Celery queue of the on-demand synchronizations of the research outputs of a person.
+
+   Run a dedicated worker for it, e.g. ``celery worker -Q pure_user_synchronization``,
+   so on-demand synchronizations do not wait behind the tasks of a running
+   initial synchronization.
+   """
+
+PURE_SYNCHRONIZER_CHUNK_MAX_RETRIES = 3
+"""Number of retries of a chunk task of the distributed initial synchronization.
+
+   A chunk task is retried on its own if its page of research outputs could
+   not be fetched from Pure, PURE_REQUEST_BACKOFF_MAX seconds later.
+   """
+
+PURE_SYNCHRONIZER_BULK_SIZE = 0
+"""Number of records stored per database transaction by the initial synchronization.
+
+   If set, the records are not indexed one by one, but reindexed in bulk
+   once their transaction is committed, and files are downloaded before the
+   transaction is opened. Otherwise every record is committed and indexed on
+   its own.
+   """
+
+PURE_LANGUAGE_INDEX_CACHE_PATH = None
+"""Path of the pickled language index shared by the converters of a process.
+
+   If set, the index of ISO 639-3 languages is loaded from this file instead
+   of being built from iso6393.json, the file is created on first use.
+   """
+
+PURE_CONVERSION_CACHE_PATH = None
+"""Path of the SQLite database caching the Marc21XML of converted research outputs.
+
+   If set, research outputs whose Pure JSON and converter version did not
+   change since their last conversion are not converted and validated again.
+   """
+
+PURE_CONVERSION_CACHE_MAX_ENTRIES = 100000
+"""Maximum number of cached conversions, the least recently used are evicted."""
+
+PURE_CONVERTER_PROCESSES = 0
+"""Number of worker processes converting and validating research outputs.
+
+   Conversion and validation are CPU-bound and do not scale with threads.
+   If set, they run in a pool of spawned worker processes shared by all
+   synchronizers of the process, otherwise in the worker threads of the
+   synchronizer. Daemonic processes can not start worker processes, so it
+   is ignored in the workers of the celery prefork pool. Run the
+   synchronization tasks in a worker with the solo or threads pool instead.
+   """
+
+PURE_METRICS_ENABLED = False
+"""Measure the latency of the synchronization stages and count their throughput.
+
+   If set, the fetch, convert, validate, download, create, attach, publish,
+   commit and email stages are timed, every run logs a summary and the
+   metrics are exposed in the Prometheus text format at /pure/metrics.
+   """
+
+PURE_METRICS_DIRECTORY = None
+"""Directory to which every process saves its metrics at the end of each run.
+
+   If set, /pure/metrics adds up the metrics of all processes, e.g. of the
+   celery workers running the synchronization. Otherwise it only exposes the
+   metrics of the web process.
+   """
@@ -7,13 +7,27 @@
 
 """Invenio module that adds pure."""
 
+from .cache import ConversionCache
 from .converter import Converter
-from .marc21_record import ControlField, DataField, Marc21Record, SubField
+from .languages import LanguageIndex, get_language_index
+from .mappings import FieldMapping
+from .marc21_record import (
+    ControlField,
+    DataField,
+    Marc21Record,
+    Marc21Validator,
+    SubField,
+)
 
 __all__ = (
+    "ConversionCache",
     "Converter",
+    "FieldMapping",
+    "LanguageIndex",
+    "get_language_index",
     "Marc21Record",
     "ControlField",
     "DataField",
     "SubField",
+    "Marc21Validator",
 )
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Cache Module to reuse the Marc21XML of unchanged Pure records."""
+
+import sqlite3
+import time
+from threading import local
+from typing import Optional
+
+from ..utils import get_fingerprint
+from ..version import __version__
+from .converter import Converter
+
+
+class ConversionCache(object):
+    """On-disk cache of validated Marc21XML by Pure JSON and converter version.
+
+    Entries are keyed by the fingerprint of the normalized Pure JSON and the
+    version of the converter, so changes of either miss the cache. The least
+    recently used entries exceeding *max_entries* are evicted after every
+    tenth of *max_entries* insertions of a thread. The SQLite database may be
+    shared by threads and processes, every thread uses its own connection.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000, version: str = None):
+        """Default constructor of the class.
+
+        The *version* defaults to the version of the Converter.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.version = f"{__version__}:{version or Converter.VERSION}"
+        self._local = local()
+
+    def __getstate__(self) -> dict:
+        """Get the state to pickle, without the connections of the threads."""
+        return {
+            "path": self.path,
+            "max_entries": self.max_entries,
+            "version": self.version,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        """Restore the pickled state."""
+        self.__dict__.update(state)
+        self._local = local()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Get the database connection of the current thread."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS conversions "
+                "(key TEXT PRIMARY KEY, record_xml TEXT NOT NULL, accessed REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS conversions_accessed ON conversions (accessed)"
+            )
+            self._local.connection = connection
+            self._local.insertions = 0
+        return connection
+
+    def get_key(self, pure_json: dict) -> str:
+        """Get the cache key of a record in Pure JSON format."""
+        return f"{self.version}:{get_fingerprint(pure_json)}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Get the cached Marc21XML of given key and mark it as recently used."""
+        connection = self.connection
+        row = connection.execute(
+            "SELECT record_xml FROM conversions WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        connection.execute(
+            "UPDATE conversions SET accessed = ? WHERE key = ?", (time.time(), key)
+        )
+        return row[0]
+
+    def set(self, key: str, record_xml: str) -> None:
+        """Cache the validated Marc21XML of given key."""
+        connection = self.connection
+        connection.execute(
+            "INSERT OR REPLACE INTO conversions VALUES (?, ?, ?)",
+            (key, record_xml, time.time()),
+        )
+        self._local.insertions += 1
+        if self._local.insertions >= max(self.max_entries // 10, 1):
+            self._local.insertions = 0
+            self.evict()
+
+    def evict(self) -> None:
+        """Evict the least recently used entries exceeding max_entries."""
+        self.connection.execute(
+            "DELETE FROM conversions WHERE key IN "
+            "(SELECT key FROM conversions ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def __len__(self) -> int:
+        """Get the number of cached entries."""
+        row = self.connection.execute("SELECT COUNT(*) FROM conversions").fetchone()
+        return row[0]
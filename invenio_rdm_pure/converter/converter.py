@@ -6,45 +6,144 @@
 # under the terms of the MIT License; see LICENSE file for more details.
 
 """Converter Module to facilitate conversion of metadata."""
-import json
-import os
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, Iterator, Mapping, Tuple, Union
 
-from .marc21_record import DataField, Marc21Record, SubField
+from flask import current_app, has_app_context
+from lxml import etree
+
+from .languages import LanguageIndex, get_language_index
+from .mappings import FIELD_MAPPINGS, compile_mappings
+from .marc21_record import DataField, Marc21Record, SubField, get_validator
+
+_NON_ATTRIBUTE_METHODS = frozenset(
+    (
+        "convert_attribute",
+        "convert_many",
+        "convert_pure_json_to_marc21_record",
+        "convert_pure_json_to_marc21_xml",
+    )
+)
+"""Methods of the Converter starting with convert_ not converting an attribute."""
 
 
 class Converter(object):
-    """Converter Class to facilitate conversion of metadata."""
-
-    def __init__(self):
-        """Default Constructor of the class."""
-        # Cache iso639-3 language codes to dict
-        self.languages = self.initialize_languages()
-
-    def initialize_languages(self) -> dict:
-        """Initialize language cache dictionary."""
-        language_cache = dict()
-        path = os.path.join(os.path.dirname(__file__), "data", "iso6393.json")
-        with open(path) as file:
-            languages = json.load(file)
-            for language in languages:
-                language_cache[language["name"]] = dict()
-                for key, value in language.items():
-                    if key == "iso6393":
-                        language_cache[language["name"]] = value
-                        break
-        return language_cache
-
-    def convert_pure_json_to_marc21_xml(self, pure_json: dict):
+    """Converter Class to facilitate conversion of metadata.
+
+    Pure attributes are converted by the convert_<attribute> methods, or by
+    the declarative FIELD_MAPPINGS if they translate to single subfields.
+    """
+
+    FIELD_MAPPINGS = FIELD_MAPPINGS
+
+    VERSION = "1"
+    """Version of the conversion, to be increased whenever its output changes."""
+
+    def __init__(self, languages: LanguageIndex = None):
+        """Default Constructor of the class.
+
+        Converters share the process-wide LanguageIndex, unless *languages*
+        is given.
+        """
+        if languages is None:
+            cache_path = None
+            if has_app_context():
+                cache_path = current_app.config.get("PURE_LANGUAGE_INDEX_CACHE_PATH")
+            languages = get_language_index(cache_path)
+        self.languages = languages
+
+    def convert_pure_json_to_marc21_xml(self, pure_json: dict, pretty: bool = True):
         """Convert record from Pure JSON format to MARC21XML."""
+        return self.convert_pure_json_to_marc21_record(pure_json).to_xml_string(pretty)
+
+    def convert_pure_json_to_marc21_record(self, pure_json: dict) -> Marc21Record:
+        """Convert record from Pure JSON format to Marc21Record."""
         record = Marc21Record()
+        handlers = self.get_handlers()
         for attribute, value in pure_json.items():
-            self.convert_attribute(attribute, value, record)
-        return record.to_xml_string()
+            handler = handlers.get(attribute)
+            if handler is not None:
+                handler(self, value, record)
+        return record
+
+    def convert_many(
+        self,
+        pure_jsons: Iterable[dict],
+        validate: bool = True,
+        pretty: bool = False,
+        pool=None,
+        batch_size: int = 50,
+        cache=None,
+    ) -> Iterator[Tuple[str, Union[str, Exception]]]:
+        """Convert records from Pure JSON format to MARC21XML lazily.
+
+        Yield a (uuid, result) pair per record in input order, the result is
+        the MARC21XML or the exception raised converting or validating the
+        record. If a ConversionPool is given as *pool*, records are converted
+        and, with *validate*, validated in its worker processes in batches of
+        *batch_size*, using the cache of the pool. Otherwise validated records are looked up
+        in and added to the ConversionCache given as *cache*, if any, which
+        holds compact MARC21XML regardless of *pretty*.
+        """
+        if pool is not None:
+            for pure_json, record_xml, error in pool.convert_many(
+                pure_jsons, batch_size, validate=validate, pretty=pretty
+            ):
+                yield pure_json.get("uuid"), record_xml or RuntimeError(error)
+            return
+        validator = get_validator() if validate else None
+        for pure_json in pure_jsons:
+            key = cache.get_key(pure_json) if cache is not None else None
+            record_xml = cache.get(key) if key is not None else None
+            if record_xml is not None:
+                if pretty:
+                    tree = etree.fromstring(record_xml.encode())
+                    record_xml = Marc21Record.etree_to_xml_string(tree, pretty)
+                yield pure_json.get("uuid"), record_xml
+                continue
+            try:
+                tree = self.convert_pure_json_to_marc21_record(pure_json).to_etree()
+                if validator is not None:
+                    errors = validator.get_errors(tree)
+                    if errors:
+                        raise RuntimeError("; ".join(errors))
+            except Exception as exc:
+                yield pure_json.get("uuid"), exc
+                continue
+            record_xml = Marc21Record.etree_to_xml_string(tree, pretty=False)
+            if key is not None and validator is not None:
+                cache.set(key, record_xml)
+            if pretty:
+                record_xml = Marc21Record.etree_to_xml_string(tree, pretty)
+            yield pure_json.get("uuid"), record_xml
 
     def convert_attribute(self, attribute: str, value: object, record: Marc21Record):
         """Traverse first level elements of dictionary and extract necessary attributes."""
-        convert_function = getattr(self, f"convert_{attribute}", lambda *args: None)
-        convert_function(value, record)
+        handler = self.get_handlers().get(attribute)
+        if handler is not None:
+            handler(self, value, record)
+
+    @classmethod
+    def get_handlers(cls) -> Mapping[str, Callable]:
+        """Get the immutable table of conversion functions by Pure attribute.
+
+        The table is built once per class from the FIELD_MAPPINGS and the
+        convert_<attribute> methods, methods take precedence over mappings.
+        """
+        handlers = cls.__dict__.get("_handlers")
+        if handlers is None:
+            table: Dict[str, Callable] = {}
+            mappings = {}
+            for mapping in cls.FIELD_MAPPINGS:
+                mappings.setdefault(mapping.attribute, []).append(mapping)
+            for attribute, attribute_mappings in mappings.items():
+                table[attribute] = compile_mappings(*attribute_mappings)
+            for name in dir(cls):
+                if name.startswith("convert_") and name not in _NON_ATTRIBUTE_METHODS:
+                    table[name[len("convert_") :]] = getattr(cls, name)
+            handlers = MappingProxyType(table)
+            setattr(cls, "_handlers", handlers)
+        return handlers
 
     def convert_abstract(self, value: str, record: Marc21Record):
         """Add the abstract to the Marc21Record."""
@@ -81,13 +180,6 @@ class Converter(object):
         else:
             raise RuntimeError("Unhandled value type")
 
-    def convert_edition(self, value: str, record: Marc21Record):
-        """Add the edition attribute to the Marc21Record."""
-        if isinstance(value, str):
-            record.add_value(tag="250", code="a", value=value)
-        else:
-            raise RuntimeError("Unhandled value type")
-
     def convert_electronicIsbns(self, value: str, record: Marc21Record):
         """Add the electronicIsbns attribute to the Marc21Record."""
         if isinstance(value, list) and len(value) > 0 and len(value) < 3:
@@ -118,23 +210,6 @@ class Converter(object):
         else:
             raise RuntimeError("Unhandled value type")
 
-    def convert_journalAssociation(self, value: str, record: Marc21Record):
-        """Add the journalAssociation attribute to the Marc21Record."""
-        if isinstance(value, dict):
-            journal_association = value["title"]["value"]
-            record.add_value(
-                tag="773", ind1="0", ind2="8", code="t", value=journal_association
-            )
-        else:
-            raise RuntimeError("Unhandled value type")
-
-    def convert_journalNumber(self, value: str, record: Marc21Record):
-        """Add the journalNumber attribute to the Marc21Record."""
-        if isinstance(value, str):
-            record.add_value(tag="773", ind1="0", ind2="8", code="g", value=value)
-        else:
-            raise RuntimeError("Unhandled value type")
-
     def convert_keywordGroups(self, value: str, record: Marc21Record):
         """Add the keywordGroups attribute to the Marc21Record."""
         if isinstance(value, list):
@@ -169,7 +244,9 @@ class Converter(object):
             for locale in value["term"]["text"]:
                 if locale["locale"] == "en_GB":
                     language = locale["value"]
-                    language_iso6393 = self.languages[language]
+                    language_iso6393 = self.languages.get(language)
+                    if language_iso6393 is None:
+                        raise RuntimeError(f"Unknown language {language}")
                     record.add_value(tag="041", code="a", value=language_iso6393)
         else:
             raise RuntimeError("Unhandled value type")
@@ -191,13 +268,6 @@ class Converter(object):
         else:
             raise RuntimeError("Unhandled value type")
 
-    def convert_numberOfPages(self, value: str, record: Marc21Record):
-        """Add the numberOfPages attribute to the Marc21Record."""
-        if isinstance(value, int):
-            record.add_value(tag="300", code="a", value=str(value))
-        else:
-            raise RuntimeError("Unhandled value type")
-
     def convert_organisationalUnits(self, value: str, record: Marc21Record):
         """Add the organisationalUnits attribute to the Marc21Record."""
         if isinstance(value, list):
@@ -213,21 +283,6 @@ class Converter(object):
         else:
             raise RuntimeError("Unhandled value type")
 
-    def convert_pages(self, value: str, record: Marc21Record):
-        """Add the pages attriute to the Marc21Record."""
-        if isinstance(value, str):
-            pages = value
-            record.add_value(tag="300", code="a", value=pages)
-        else:
-            raise RuntimeError("Unhandled value type")
-
-    def convert_patentNumber(self, value: str, record: Marc21Record):
-        """Add the patentNumber attribute to the Marc21Record."""
-        if isinstance(value, str):
-            record.add_value(tag="013", code="a", value=value)
-        else:
-            raise RuntimeError("Unhandled value type")
-
     def convert_peerReview(self, value: str, record: Marc21Record):
         """Add the peerReview attribute to the Marc21Record."""
         if isinstance(value, bool):
@@ -237,13 +292,6 @@ class Converter(object):
         else:
             raise RuntimeError("Unhandled value type")
 
-    def convert_placeOfPublication(self, value: str, record: Marc21Record):
-        """Add the placeOfPublication attribute to the Marc21Record."""
-        if isinstance(value, str):
-            record.add_value(tag="264", code="a", value=value)
-        else:
-            raise RuntimeError("Unhandled value type")
-
     def convert_publicationSeries(self, value: str, record: Marc21Record):
         """Add the publicationSeries attribute to the Marc21Record."""
         if isinstance(value, list):
@@ -334,11 +382,3 @@ class Converter(object):
             record.add_value(tag="245", ind1="1", ind2="0", code="a", value=title)
         else:
             raise RuntimeError("Unhandled value type")
-
-    def convert_volume(self, value: str, record: Marc21Record):
-        """Add the volume attribute to the Marc21Record."""
-        if isinstance(value, str):
-            record.add_value(tag="490", ind1="0", code="a", value=value)
-            record.add_value(tag="773", ind1="0", ind2="8", code="g", value=value)
-        else:
-            raise RuntimeError("Unhandled value type")
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Languages Module to look up ISO 639-3 codes of language names."""
+
+import json
+import os
+import pickle
+import re
+import unicodedata
+from threading import Lock
+from typing import Dict, Optional
+
+ISO6393_PATH = os.path.join(os.path.dirname(__file__), "data", "iso6393.json")
+
+LANGUAGE_ALIASES = {
+    "castilian": "spa",
+    "flemish": "nld",
+    "frisian": "fry",
+    "gaelic": "gla",
+    "greek": "ell",
+    "moldavian": "ron",
+    "moldovan": "ron",
+    "norwegian bokmal": "nob",
+    "sami": "sme",
+    "sotho": "sot",
+    "valencian": "cat",
+}
+"""Common names of languages which differ from their ISO 639-3 reference name."""
+
+_QUALIFIER = re.compile(r"\s*\([^)]*\)")
+
+
+def normalize(name: str) -> str:
+    """Normalize a language name or code for case and accent insensitive lookups."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    name = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(name.casefold().split())
+
+
+class LanguageIndex(object):
+    """Index of ISO 639-3 language codes by normalized name, alias and code.
+
+    Names are looked up case and accent insensitive, also without their
+    qualifier, e.g. "Malay" for "Malay (macrolanguage)". ISO 639-1, 639-2
+    and 639-3 codes map to the ISO 639-3 code of their language.
+    """
+
+    __slots__ = ("codes",)
+
+    def __init__(self, codes: Dict[str, str]):
+        """Default constructor of the class."""
+        self.codes = codes
+
+    def get(self, language: str) -> Optional[str]:
+        """Get the ISO 639-3 code of a language, None if it is unknown."""
+        return self.codes.get(normalize(language))
+
+    def __getitem__(self, language: str) -> str:
+        """Get the ISO 639-3 code of a language, raise KeyError if it is unknown."""
+        code = self.get(language)
+        if code is None:
+            raise KeyError(language)
+        return code
+
+    def __contains__(self, language: str) -> bool:
+        """Return True if the language is known."""
+        return self.get(language) is not None
+
+    def __len__(self) -> int:
+        """Get the number of indexed names and codes."""
+        return len(self.codes)
+
+    @classmethod
+    def from_json(cls, path: str = ISO6393_PATH) -> "LanguageIndex":
+        """Build the index from an iso6393.json file.
+
+        Reference names take precedence over names without qualifier, which
+        take precedence over aliases and codes.
+        """
+        with open(path, encoding="utf-8") as fp:
+            languages = json.load(fp)
+        codes = {}
+        for language in languages:
+            for key in ("iso6393", "iso6392T", "iso6392B", "iso6391"):
+                if key in language:
+                    codes.setdefault(normalize(language[key]), language["iso6393"])
+        codes.update(LANGUAGE_ALIASES)
+        for language in languages:
+            name = _QUALIFIER.sub("", language["name"])
+            codes[normalize(name)] = language["iso6393"]
+        for language in languages:
+            codes[normalize(language["name"])] = language["iso6393"]
+        return cls(codes)
+
+    @classmethod
+    def load(cls, cache_path: str = None, path: str = ISO6393_PATH) -> "LanguageIndex":
+        """Load the index from its pickled form, or build and pickle it.
+
+        The pickled index at *cache_path* is rebuilt if it is older than the
+        iso6393.json file. Without *cache_path*, the index is always built.
+        """
+        if cache_path:
+            try:
+                if os.path.getmtime(cache_path) >= os.path.getmtime(path):
+                    with open(cache_path, "rb") as fp:
+                        return cls(pickle.load(fp))
+            except (OSError, pickle.UnpicklingError, EOFError):
+                pass
+        index = cls.from_json(path)
+        if cache_path:
+            try:
+                temporary_path = f"{cache_path}.{os.getpid()}"
+                with open(temporary_path, "wb") as fp:
+                    pickle.dump(index.codes, fp, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temporary_path, cache_path)
+            except OSError:
+                pass
+        return index
+
+
+_language_index = None
+_language_index_lock = Lock()
+
+
+def get_language_index(cache_path: str = None) -> LanguageIndex:
+    """Get the process-wide LanguageIndex, building it on first use.
+
+    The index is shared by all Converters of the process, *cache_path* is
+    only used by the call that builds it.
+    """
+    global _language_index
+    with _language_index_lock:
+        if _language_index is None:
+            _language_index = LanguageIndex.load(cache_path)
+        return _language_index
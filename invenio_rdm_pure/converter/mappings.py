@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Declarative mappings of simple Pure attributes to Marc21 fields."""
+
+from typing import Callable, Tuple, Union
+
+from .marc21_record import Marc21Record
+
+
+class FieldMapping(object):
+    """Mapping of a Pure attribute to a Marc21 datafield and subfield.
+
+    The value of the attribute must be an instance of *value_type*. The value
+    stored in the subfield is found by following the keys in *path* and is
+    passed through *transform*, if given.
+    """
+
+    __slots__ = (
+        "attribute",
+        "tag",
+        "ind1",
+        "ind2",
+        "code",
+        "value_type",
+        "path",
+        "transform",
+    )
+
+    def __init__(
+        self,
+        attribute: str,
+        tag: str,
+        code: str,
+        value_type: Union[type, Tuple[type, ...]] = str,
+        ind1: str = " ",
+        ind2: str = " ",
+        path: Tuple[str, ...] = (),
+        transform: Callable = None,
+    ):
+        """Default constructor of the class."""
+        self.attribute = attribute
+        self.tag = tag
+        self.ind1 = ind1
+        self.ind2 = ind2
+        self.code = code
+        self.value_type = value_type
+        self.path = path
+        self.transform = transform
+
+    def extract(self, value: object) -> object:
+        """Extract the subfield value from the value of the attribute."""
+        if not isinstance(value, self.value_type):
+            raise RuntimeError("Unhandled value type")
+        for key in self.path:
+            value = value[key]
+        if self.transform is not None:
+            value = self.transform(value)
+        return value
+
+
+def compile_mappings(*mappings: FieldMapping) -> Callable:
+    """Compile the mappings of an attribute into a conversion function.
+
+    The function has the signature of the convert methods of the Converter,
+    it adds one value per mapping to the record, in the given order.
+    """
+    fields = tuple(
+        (mapping.extract, mapping.tag, mapping.ind1, mapping.ind2, mapping.code)
+        for mapping in mappings
+    )
+
+    def convert(converter, value: object, record: Marc21Record) -> None:
+        for extract, tag, ind1, ind2, code in fields:
+            record.add_value(tag, ind1, ind2, code, extract(value))
+
+    convert.__doc__ = f"Add the {mappings[0].attribute} attribute to the Marc21Record."
+    return convert
+
+
+FIELD_MAPPINGS = (
+    FieldMapping("edition", tag="250", code="a"),
+    FieldMapping(
+        "journalAssociation",
+        tag="773",
+        ind1="0",
+        ind2="8",
+        code="t",
+        value_type=dict,
+        path=("title", "value"),
+    ),
+    FieldMapping("journalNumber", tag="773", ind1="0", ind2="8", code="g"),
+    FieldMapping("numberOfPages", tag="300", code="a", value_type=int, transform=str),
+    FieldMapping("pages", tag="300", code="a"),
+    FieldMapping("patentNumber", tag="013", code="a"),
+    FieldMapping("placeOfPublication", tag="264", code="a"),
+    FieldMapping("volume", tag="490", ind1="0", code="a"),
+    FieldMapping("volume", tag="773", ind1="0", ind2="8", code="g"),
+)
+"""Mappings of the Pure attributes which translate to a single subfield each."""
@@ -8,10 +8,13 @@
 """Module for Marc21Record conversion."""
 
 from .marc21_record import ControlField, DataField, Marc21Record, SubField
+from .validator import Marc21Validator, get_validator
 
 __all__ = (
     "Marc21Record",
     "ControlField",
     "DataField",
     "SubField",
+    "Marc21Validator",
+    "get_validator",
 )
@@ -7,34 +7,48 @@
 
 """MARC21 Record Module to facilitate storage of records in MARC21 format."""
 
-from io import StringIO
-from os import linesep
-from os.path import dirname, join
+import re
+from typing import Dict, List, Set, Tuple
 
 from lxml import etree
 
+from .validator import get_validator
+
+MARC21_NAMESPACE = "http://www.loc.gov/MARC21/slim"
+XSI_NAMESPACE = "http://www.w3.org/2001/XMLSchema-instance"
+
+_XML_INCOMPATIBLE_CHARACTERS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+def _to_xml_text(value: object) -> str:
+    """Get value as string without the characters XML cannot represent."""
+    return _XML_INCOMPATIBLE_CHARACTERS.sub("", str(value))
+
 
 class ControlField(object):
     """ControlField class representing the controlfield HTML tag in MARC21 XML."""
 
+    __slots__ = ("tag", "value")
+
     def __init__(self, tag: str = "", value: str = ""):
         """Default constructor of the class."""
         self.tag = tag
         self.value = value
 
-    def to_xml_tag(self, tagsep: str = linesep, indent: int = 4) -> str:
-        """Get the Marc21 Controlfield XML tag as string."""
-        controlfield_tag = " " * indent
-        controlfield_tag += f'<controlfield tag="{self.tag}">{self.value}'
-        controlfield_tag += " " * indent
-        controlfield_tag += "</controlfield>"
-        controlfield_tag += tagsep
-        return controlfield_tag
+    def to_etree(self, parent: etree._Element) -> etree._Element:
+        """Append the Marc21 Controlfield XML element to parent."""
+        controlfield = etree.SubElement(
+            parent, f"{{{MARC21_NAMESPACE}}}controlfield", tag=self.tag
+        )
+        controlfield.text = _to_xml_text(self.value)
+        return controlfield
 
 
 class DataField(object):
     """DataField class representing the datafield HTML tag in MARC21 XML."""
 
+    __slots__ = ("tag", "ind1", "ind2", "subfields")
+
     def __init__(self, tag: str = "", ind1: str = " ", ind2: str = " "):
         """Default constructor of the class."""
         self.tag = tag
@@ -42,40 +56,45 @@ class DataField(object):
         self.ind2 = ind2
         self.subfields = list()
 
-    def to_xml_tag(self, tagsep: str = linesep, indent: int = 4) -> str:
-        """Get the Marc21 Datafield XML tag as string."""
-        datafield_tag = " " * indent
-        datafield_tag += (
-            f'<datafield tag="{self.tag}" ind1="{self.ind1}" ind2="{self.ind2}">'
+    def to_etree(self, parent: etree._Element) -> etree._Element:
+        """Append the Marc21 Datafield XML element to parent."""
+        datafield = etree.SubElement(
+            parent,
+            f"{{{MARC21_NAMESPACE}}}datafield",
+            tag=self.tag,
+            ind1=self.ind1,
+            ind2=self.ind2,
         )
-        datafield_tag += tagsep
         for subfield in self.subfields:
-            datafield_tag += subfield.to_xml_tag(tagsep, indent)
-        datafield_tag += " " * indent
-        datafield_tag += "</datafield>"
-        datafield_tag += tagsep
-        return datafield_tag
+            subfield.to_etree(datafield)
+        return datafield
 
 
 class SubField(object):
     """SubField class representing the subfield HTML tag in MARC21 XML."""
 
+    __slots__ = ("code", "value")
+
     def __init__(self, code: str = "", value: str = ""):
         """Default constructor of the class."""
         self.code = code
         self.value = value
 
-    def to_xml_tag(self, tagsep: str = linesep, indent: int = 4) -> str:
-        """Get the Marc21 Subfield XML tag as string."""
-        subfield_tag = 2 * " " * indent
-        subfield_tag += f'<subfield code="{self.code}">{self.value}'
-        subfield_tag += f"</subfield>"
-        subfield_tag += tagsep
-        return subfield_tag
+    def to_etree(self, parent: etree._Element) -> etree._Element:
+        """Append the Marc21 Subfield XML element to parent."""
+        subfield = etree.SubElement(
+            parent, f"{{{MARC21_NAMESPACE}}}subfield", code=self.code
+        )
+        subfield.text = _to_xml_text(self.value)
+        return subfield
 
 
 class Marc21Record(object):
-    """MARC21 Record class to facilitate storage of records in MARC21 format."""
+    """MARC21 Record class to facilitate storage of records in MARC21 format.
+
+    Datafields are indexed by tag and by their subfield values, so they must
+    be added with add_datafield, add_value or add_unique_value.
+    """
 
     LEADER_PLACEHOLDER = (
         "00000nam a2200000zca4500"  # TODO: find a way to generate proper leaders
@@ -86,42 +105,61 @@ class Marc21Record(object):
         self.leader = leader
         self.controlfields = list()
         self.datafields = list()
-
-    def to_xml_string(self, tagsep: str = linesep, indent: int = 4) -> str:
-        """Get a pretty-printed XML string of the record."""
-        record = "<?xml version='1.0' ?>"
-        record += '<record xmlns="http://www.loc.gov/MARC21/slim" xsi:schemaLocation="http://www.loc.gov/MARC21/slim schema.xsd" type="Bibliographic" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
-        record += tagsep
+        self._datafields_by_tag: Dict[str, List[DataField]] = dict()
+        self._values: Set[Tuple[str, str, str, str, str]] = set()
+
+    def to_etree(self) -> etree._Element:
+        """Get the record as XML element tree."""
+        record = etree.Element(
+            f"{{{MARC21_NAMESPACE}}}record",
+            nsmap={None: MARC21_NAMESPACE, "xsi": XSI_NAMESPACE},
+        )
+        record.set(
+            f"{{{XSI_NAMESPACE}}}schemaLocation", f"{MARC21_NAMESPACE} schema.xsd"
+        )
+        record.set("type", "Bibliographic")
         if self.leader:
-            record += self.get_leader_xml_tag(tagsep, indent)
+            etree.SubElement(record, f"{{{MARC21_NAMESPACE}}}leader").text = self.leader
         for controlfield in self.controlfields:
-            record += controlfield.to_xml_tag(tagsep, indent)
+            controlfield.to_etree(record)
         for datafield in self.datafields:
-            record += datafield.to_xml_tag(tagsep, indent)
-        record += "</record>"
+            datafield.to_etree(record)
         return record
 
-    def get_leader_xml_tag(self, tagsep: str = linesep, indent: int = 4) -> str:
-        """Get the leader XML tag of the Marc21Record as string."""
-        leader_tag = " " * indent
-        leader_tag += "<leader>"
-        leader_tag += self.leader
-        leader_tag += "</leader>"
-        leader_tag += tagsep
-        return leader_tag
+    def to_xml_string(self, pretty: bool = True) -> str:
+        """Get the XML string of the record, pretty-printed or compact."""
+        return self.etree_to_xml_string(self.to_etree(), pretty)
+
+    @staticmethod
+    def etree_to_xml_string(record: etree._Element, pretty: bool = True) -> str:
+        """Serialize a record element tree to XML string, pretty-printed or compact."""
+        return "<?xml version='1.0' ?>" + etree.tostring(
+            record, encoding="unicode", pretty_print=pretty
+        )
 
     def contains(self, ref_df: DataField, ref_sf: SubField) -> bool:
         """Return True if record contains reference datafield, which contains reference subfield."""
-        for df in self.datafields:
-            if (
-                df.tag == ref_df.tag
-                and df.ind1 == ref_df.ind1
-                and df.ind2 == ref_df.ind2
-            ):
-                for sf in df.subfields:
-                    if sf.code == ref_sf.code and sf.value == ref_sf.value:
-                        return True
-        return False
+        key = (ref_df.tag, ref_df.ind1, ref_df.ind2, ref_sf.code, ref_sf.value)
+        return key in self._values
+
+    def get_datafields(self, tag: str) -> List[DataField]:
+        """Get the datafields of the record with given tag."""
+        return self._datafields_by_tag.get(tag, [])
+
+    def add_datafield(self, datafield: DataField) -> None:
+        """Add a datafield with its subfields to the record."""
+        self.datafields.append(datafield)
+        self._datafields_by_tag.setdefault(datafield.tag, []).append(datafield)
+        for subfield in datafield.subfields:
+            self._values.add(
+                (
+                    datafield.tag,
+                    datafield.ind1,
+                    datafield.ind2,
+                    subfield.code,
+                    subfield.value,
+                )
+            )
 
     def add_value(
         self,
@@ -133,9 +171,8 @@ class Marc21Record(object):
     ) -> None:
         """Add value to record for given datafield and subfield."""
         datafield = DataField(tag, ind1, ind2)
-        subfield = SubField(code, value)
-        datafield.subfields.append(subfield)
-        self.datafields.append(datafield)
+        datafield.subfields.append(SubField(code, value))
+        self.add_datafield(datafield)
 
     def add_unique_value(
         self,
@@ -146,18 +183,10 @@ class Marc21Record(object):
         value: str = "",
     ) -> None:
         """Add value to record if it doesn't already contain it."""
-        datafield = DataField(tag, ind1, ind2)
-        subfield = SubField(code, value)
-        if not self.contains(datafield, subfield):
-            datafield.subfields.append(subfield)
-            self.datafields.append(datafield)
+        if (tag, ind1, ind2, code, value) not in self._values:
+            self.add_value(tag, ind1, ind2, code, value)
 
     @staticmethod
     def is_valid_marc21_xml_string(record: str) -> bool:
         """Validate the record against a Marc21XML Schema."""
-        with open(
-            join(dirname(__file__), "schema", "MARC21slim.xsd"), "r", encoding="utf-8"
-        ) as fp:
-            marc21xml_schema = etree.XMLSchema(etree.parse(fp))
-            marc21xml = etree.parse(StringIO(record))
-            return marc21xml_schema.validate(marc21xml)
+        return get_validator().validate_string(record)
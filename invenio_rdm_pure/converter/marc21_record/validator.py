@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""MARC21 Validator Module to validate records against the MARC21 XML schema."""
+
+from io import StringIO
+from os.path import dirname, join
+from threading import Lock, local
+from typing import Iterable, List, Union
+
+from lxml import etree
+
+
+class Marc21Validator(object):
+    """Validator of Marc21XML records against the MARC21slim schema.
+
+    The schema is compiled once per thread, as validating with a shared
+    etree.XMLSchema is not thread-safe, and reused for all later records.
+    """
+
+    SCHEMA_PATH = join(dirname(__file__), "schema", "MARC21slim.xsd")
+
+    def __init__(self, schema_path: str = SCHEMA_PATH):
+        """Default constructor of the class."""
+        self.schema_path = schema_path
+        self._local = local()
+
+    @property
+    def schema(self) -> etree.XMLSchema:
+        """Get the compiled schema of the current thread."""
+        schema = getattr(self._local, "schema", None)
+        if schema is None:
+            with open(self.schema_path, "r", encoding="utf-8") as fp:
+                schema = self._local.schema = etree.XMLSchema(etree.parse(fp))
+        return schema
+
+    def validate(self, tree: Union[etree._Element, etree._ElementTree]) -> bool:
+        """Validate a parsed record."""
+        return self.schema.validate(tree)
+
+    def validate_string(self, record: str) -> bool:
+        """Validate a record given as Marc21XML string."""
+        return not self.get_errors(record)
+
+    def get_errors(self, record: Union[str, etree._Element]) -> List[str]:
+        """Get the errors of a record as string or parsed tree.
+
+        Return an empty list if the record is valid.
+        """
+        if isinstance(record, str):
+            try:
+                record = etree.parse(StringIO(record))
+            except etree.XMLSyntaxError as exc:
+                return [f"line {exc.lineno}: {exc.msg}"]
+        schema = self.schema
+        if schema.validate(record):
+            return []
+        return [f"line {error.line}: {error.message}" for error in schema.error_log]
+
+    def validate_many(
+        self, records: Iterable[Union[str, etree._Element]]
+    ) -> List[List[str]]:
+        """Validate many records, return the list of errors of every record."""
+        return [self.get_errors(record) for record in records]
+
+
+_validator = None
+_validator_lock = Lock()
+
+
+def get_validator() -> Marc21Validator:
+    """Get the process-wide Marc21Validator."""
+    global _validator
+    with _validator_lock:
+        if _validator is None:
+            _validator = Marc21Validator()
+        return _validator
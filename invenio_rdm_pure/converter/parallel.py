@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Module to convert records in a pool of worker processes."""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import current_process, get_context
+from threading import Lock
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from ..utils import get_batches
+from .cache import ConversionCache
+from .converter import Converter
+from .marc21_record import get_validator
+
+_converter = None
+_cache = None
+
+
+def initialize_worker(cache: ConversionCache = None) -> None:
+    """Initialize the converter, cache and compiled schema of a worker process."""
+    global _converter, _cache
+    _converter = Converter()
+    _cache = cache
+    get_validator().schema  # Compile the schema before the first batch arrives
+
+
+def convert_batch(
+    research_outputs: List[dict], validate: bool = True, pretty: bool = False
+) -> List[Tuple[Optional[str], str]]:
+    """Convert and validate a batch of research outputs in a worker process.
+
+    Return a (record_xml, error) pair per research output, in the same order.
+    The record_xml is pretty-printed or compact, or None if the research
+    output could not be converted to (valid, with *validate*) Marc21XML, in
+    which case error describes the reason.
+    """
+    results = []
+    conversions = _converter.convert_many(
+        research_outputs, validate=validate, pretty=pretty, cache=_cache
+    )
+    for _, result in conversions:
+        if isinstance(result, Exception):
+            results.append((None, f"{type(result).__name__}: {result}"))
+        else:
+            results.append((result, ""))
+    return results
+
+
+class ConversionPool(object):
+    """Pool of worker processes converting research outputs to valid Marc21XML.
+
+    Conversion and validation are CPU-bound, running them in processes
+    instead of threads lets the throughput scale with the number of cores.
+    The worker processes are spawned, as forking the multithreaded
+    synchronizer could copy locks held by its other threads.
+    """
+
+    def __init__(self, processes: int = None, cache: ConversionCache = None):
+        """Default Constructor of the ConversionPool class.
+
+        The number of *processes* defaults to the number of CPUs. The worker
+        processes look up and add conversions in *cache*, if given.
+        Raise RuntimeError in daemonic processes, e.g. the workers of the
+        celery prefork pool, which may not start child processes.
+        """
+        if current_process().daemon:
+            raise RuntimeError("Daemonic processes can not start a conversion pool")
+        self.processes = processes or os.cpu_count()
+        self.cache = cache
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=get_context("spawn"),
+            initializer=initialize_worker,
+            initargs=(cache,),
+        )
+
+    def convert(self, research_outputs: List[dict]) -> List[Tuple[Optional[str], str]]:
+        """Convert a batch of research outputs in one worker process.
+
+        Return a (record_xml, error) pair per research output as convert_batch.
+        """
+        return self.executor.submit(convert_batch, research_outputs).result()
+
+    def convert_many(
+        self,
+        research_outputs: Iterable[dict],
+        batch_size: int = 50,
+        validate: bool = True,
+        pretty: bool = False,
+    ) -> Iterator[Tuple[dict, Optional[str], str]]:
+        """Convert research outputs in batches distributed over all processes.
+
+        Yield (research_output, record_xml, error) triples in input order,
+        see convert_batch for *validate* and *pretty*.
+        At most two batches per process are in flight at the same time.
+        """
+        pending = deque()
+        max_pending = 2 * self.processes
+        for batch in get_batches(research_outputs, batch_size):
+            future = self.executor.submit(convert_batch, batch, validate, pretty)
+            pending.append((batch, future))
+            if len(pending) >= max_pending:
+                yield from self._get_results(*pending.popleft())
+        while pending:
+            yield from self._get_results(*pending.popleft())
+
+    def _get_results(self, batch, future) -> Iterator[Tuple[dict, Optional[str], str]]:
+        """Wait for the results of a batch and pair them with its research outputs."""
+        for research_output, (record_xml, error) in zip(batch, future.result()):
+            yield research_output, record_xml, error
+
+    def shutdown(self) -> None:
+        """Shut down the worker processes."""
+        self.executor.shutdown()
+
+
+_pools = {}
+_pools_lock = Lock()
+
+
+def get_conversion_pool(
+    processes: int = None, cache: ConversionCache = None
+) -> Optional[ConversionPool]:
+    """Get the process-wide conversion pool with given processes and cache.
+
+    Return None in daemonic processes, which can not start a conversion pool.
+    """
+    if current_process().daemon:
+        return None
+    key = (processes, cache.path if cache else None)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConversionPool(processes, cache)
+        return _pools[key]
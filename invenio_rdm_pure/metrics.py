@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Metrics Module to measure the stages of the synchronization."""
+
+import json
+import os
+import socket
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from glob import glob
+from os.path import join
+from threading import Lock
+from time import perf_counter
+from typing import Iterable, Iterator, List
+
+from flask import current_app
+
+STAGES = (
+    "fetch",
+    "convert",
+    "validate",
+    "download",
+    "create",
+    "attach",
+    "publish",
+    "commit",
+    "email",
+)
+"""Measured stages of the synchronization."""
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+"""Upper bounds in seconds of the buckets of the latency histograms."""
+
+COUNTERS = {
+    "pure_sync_records_total": "Records stored in Invenio.",
+    "pure_sync_downloaded_bytes_total": "Bytes of files transferred from Pure.",
+}
+"""Counters of the synchronization with their descriptions."""
+
+
+class Metrics(object):
+    """Counters and latency histograms per stage of the synchronization.
+
+    The metrics are cumulative for the lifetime of the process and may be
+    updated by several threads. Snapshots of the metrics are JSON
+    serializable, so the metrics of several processes can be merged.
+    """
+
+    def __init__(self, buckets: Iterable[float] = BUCKETS):
+        """Default constructor of the class."""
+        self.buckets = tuple(buckets)
+        self.lock = Lock()
+        self.stages = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def observe(self, stage: str, seconds: float, error: bool = False) -> None:
+        """Record the latency of a stage, and whether it failed."""
+        bucket = bisect_left(self.buckets, seconds)
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = {
+                    "buckets": [0] * (len(self.buckets) + 1),
+                    "sum": 0.0,
+                    "count": 0,
+                    "errors": 0,
+                }
+            histogram["buckets"][bucket] += 1
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+            histogram["errors"] += error
+
+    @contextmanager
+    def time(self, stage: str):
+        """Measure the latency of the stage within the context."""
+        start = perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.observe(stage, perf_counter() - start, error=True)
+            raise
+        self.observe(stage, perf_counter() - start)
+
+    def timed(self, stage: str, iterable: Iterable) -> Iterator:
+        """Yield the items of an iterable, measuring the latency of every item."""
+        iterator = iter(iterable)
+        while True:
+            start = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.observe(stage, perf_counter() - start)
+            yield item
+
+    def increment(self, counter: str, value: float = 1) -> None:
+        """Increment a counter of COUNTERS."""
+        with self.lock:
+            self.counters[counter] += value
+
+    def snapshot(self) -> dict:
+        """Get a copy of the current metrics."""
+        with self.lock:
+            return {
+                "buckets": list(self.buckets),
+                "stages": {
+                    stage: dict(histogram, buckets=list(histogram["buckets"]))
+                    for stage, histogram in self.stages.items()
+                },
+                "counters": dict(self.counters),
+            }
+
+    def summarize(self, start: dict = None) -> str:
+        """Summarize the metrics, or their change since the snapshot *start*."""
+        current = self.snapshot()
+        start = start or {"stages": {}, "counters": {}}
+        parts = []
+        for stage, histogram in current["stages"].items():
+            previous = start["stages"].get(stage, {"sum": 0.0, "count": 0, "errors": 0})
+            count = histogram["count"] - previous["count"]
+            if count:
+                seconds = histogram["sum"] - previous["sum"]
+                errors = histogram["errors"] - previous["errors"]
+                parts.append(
+                    f"{stage} {count}x {seconds:.2f}s "
+                    f"(avg {seconds / count * 1000:.1f}ms, {errors} errors)"
+                )
+        for counter, value in current["counters"].items():
+            value -= start["counters"].get(counter, 0)
+            if value:
+                parts.append(f"{counter} {value:g}")
+        return ", ".join(parts) or "no activity"
+
+    def save(self, directory: str) -> None:
+        """Save a snapshot of the metrics of this process to given directory."""
+        path = join(directory, get_process_file_name())
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as fp:
+            json.dump(self.snapshot(), fp)
+        os.replace(temporary_path, path)
+
+
+class NullMetrics(object):
+    """Metrics which measure nothing, used while metrics are disabled."""
+
+    _context = nullcontext()
+
+    def observe(self, stage: str, seconds: float, error: bool = False) -> None:
+        """Do nothing."""
+
+    def time(self, stage: str):
+        """Get a context which measures nothing."""
+        return self._context
+
+    def timed(self, stage: str, iterable: Iterable) -> Iterable:
+        """Return the iterable as is."""
+        return iterable
+
+    def increment(self, counter: str, value: float = 1) -> None:
+        """Do nothing."""
+
+    def snapshot(self) -> dict:
+        """Get empty metrics."""
+        return {"buckets": list(BUCKETS), "stages": {}, "counters": {}}
+
+    def summarize(self, start: dict = None) -> str:
+        """Get an empty summary."""
+        return ""
+
+    def save(self, directory: str) -> None:
+        """Do nothing."""
+
+
+_metrics = Metrics()
+_null_metrics = NullMetrics()
+
+
+def get_metrics():
+    """Get the Metrics of the process, or NullMetrics if PURE_METRICS_ENABLED is off."""
+    if current_app.config.get("PURE_METRICS_ENABLED"):
+        return _metrics
+    return _null_metrics
+
+
+def get_process_file_name() -> str:
+    """Get the name of the file of the metrics of this process."""
+    return f"{socket.gethostname()}-{os.getpid()}.json"
+
+
+def merge_snapshots(snapshots: List[dict]) -> dict:
+    """Sum the metrics of several snapshots with the same buckets."""
+    merged = {"buckets": list(BUCKETS), "stages": {}, "counters": {}}
+    for snapshot in snapshots:
+        merged["buckets"] = snapshot["buckets"]
+        for stage, histogram in snapshot["stages"].items():
+            total = merged["stages"].setdefault(
+                stage,
+                {
+                    "buckets": [0] * len(histogram["buckets"]),
+                    "sum": 0.0,
+                    "count": 0,
+                    "errors": 0,
+                },
+            )
+            total["buckets"] = [
+                a + b for a, b in zip(total["buckets"], histogram["buckets"])
+            ]
+            for key in ("sum", "count", "errors"):
+                total[key] += histogram[key]
+        for counter, value in snapshot["counters"].items():
+            merged["counters"][counter] = merged["counters"].get(counter, 0) + value
+    return merged
+
+
+def collect_metrics() -> dict:
+    """Collect the metrics of this process and the ones saved by other processes.
+
+    Other processes, e.g. celery workers, save their metrics to the
+    PURE_METRICS_DIRECTORY, if it is configured.
+    """
+    snapshots = [get_metrics().snapshot()]
+    directory = current_app.config.get("PURE_METRICS_DIRECTORY")
+    if directory:
+        own_file_name = get_process_file_name()
+        for path in glob(join(directory, "*.json")):
+            if os.path.basename(path) == own_file_name:
+                continue
+            try:
+                with open(path, encoding="utf-8") as fp:
+                    snapshots.append(json.load(fp))
+            except (OSError, ValueError):
+                continue
+    return merge_snapshots(snapshots)
+
+
+def render_metrics(snapshot: dict) -> str:
+    """Render metrics in the Prometheus text exposition format."""
+    name = "pure_sync_stage_seconds"
+    lines = [
+        f"# HELP {name} Latency of the synchronization stages in seconds.",
+        f"# TYPE {name} histogram",
+    ]
+    bounds = [f"{bound:g}" for bound in snapshot["buckets"]] + ["+Inf"]
+    for stage, histogram in sorted(snapshot["stages"].items()):
+        cumulative = 0
+        for bound, count in zip(bounds, histogram["buckets"]):
+            cumulative += count
+            lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{stage="{stage}"}} {histogram["sum"]}')
+        lines.append(f'{name}_count{{stage="{stage}"}} {histogram["count"]}')
+    name = "pure_sync_stage_errors_total"
+    lines += [
+        f"# HELP {name} Failures of the synchronization stages.",
+        f"# TYPE {name} counter",
+    ]
+    for stage, histogram in sorted(snapshot["stages"].items()):
+        lines.append(f'{name}{{stage="{stage}"}} {histogram["errors"]}')
+    for counter, description in COUNTERS.items():
+        lines += [
+            f"# HELP {counter} {description}",
+            f"# TYPE {counter} counter",
+            f"{counter} {snapshot['counters'].get(counter, 0)}",
+        ]
+    return "\n".join(lines) + "\n"
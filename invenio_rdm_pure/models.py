@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Database models for the synchronization between Pure and Invenio."""
+
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Set, Tuple
+
+from invenio_db import db
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy_utils.models import Timestamp
+from sqlalchemy_utils.types import JSONType
+
+
+class PureSyncState(db.Model, Timestamp):
+    """Synchronization state of a Pure research output.
+
+    Maps the uuid of the research output in Pure to the id of the latest
+    version of its record in Invenio, together with the fingerprint of the
+    Pure JSON and the checksums of the files it was synchronized with.
+    """
+
+    __tablename__ = "pure_sync_state"
+
+    uuid = db.Column(db.String(255), primary_key=True)
+    """Uuid of the research output in Pure."""
+
+    recid = db.Column(db.String(255), nullable=True)
+    """Id of the latest version of the record in Invenio, None while it is created."""
+
+    fingerprint = db.Column(db.String(64), nullable=True)
+    """Fingerprint of the Pure JSON the record was created from."""
+
+    file_checksums = db.Column(JSONType, default=dict, nullable=False)
+    """Checksums of the attached files by file name."""
+
+    @classmethod
+    def get(cls, uuid: str) -> "PureSyncState":
+        """Get the synchronization state of given research output, if any."""
+        return db.session.get(cls, uuid)
+
+    @classmethod
+    def lock(cls, uuid: str) -> "PureSyncState":
+        """Get the state of given research output locked until the end of the transaction.
+
+        The state is created without record if the research output was not
+        synchronized yet. Transactions locking the same research output wait
+        for each other, so it is never synchronized twice at the same time.
+        """
+        state = cls.query.filter_by(uuid=uuid).with_for_update().one_or_none()
+        if state is not None:
+            return state
+        try:
+            with db.session.begin_nested():
+                state = cls(uuid=uuid, file_checksums={})
+                db.session.add(state)
+            return state
+        except IntegrityError:
+            return cls.query.filter_by(uuid=uuid).with_for_update().one()
+
+    @classmethod
+    def set(
+        cls,
+        uuid: str,
+        recid: str,
+        fingerprint: str,
+        file_checksums: dict,
+        commit: bool = True,
+    ) -> "PureSyncState":
+        """Create or update the synchronization state of given research output.
+
+        Without *commit*, the state is committed with the current transaction.
+        """
+        state = cls.get(uuid) or cls(uuid=uuid)
+        state.recid = recid
+        state.fingerprint = fingerprint
+        state.file_checksums = file_checksums
+        db.session.add(state)
+        if commit:
+            db.session.commit()
+        return state
+
+
+class PureSyncChunk(db.Model, Timestamp):
+    """Checkpoint of a chunk of the initial synchronization.
+
+    A chunk is identified by the offset and size of its page of research
+    outputs in Pure, resumed synchronizations skip the completed chunks.
+    """
+
+    __tablename__ = "pure_sync_chunk"
+
+    DONE = "done"
+    FAILED = "failed"
+
+    offset = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    """Offset of the chunk in the research outputs of Pure."""
+
+    size = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    """Number of research outputs in the chunk."""
+
+    status = db.Column(db.String(20), nullable=False)
+    """Status of the chunk, either done or failed."""
+
+    @classmethod
+    def get_completed(cls) -> Set[Tuple[int, int]]:
+        """Get the (size, offset) pairs of all completed chunks."""
+        return {
+            (chunk.size, chunk.offset) for chunk in cls.query.filter_by(status=cls.DONE)
+        }
+
+    @classmethod
+    def set_status(cls, size: int, offset: int, status: str) -> None:
+        """Record the status of given chunk."""
+        chunk = db.session.get(cls, (offset, size)) or cls(offset=offset, size=size)
+        chunk.status = status
+        db.session.add(chunk)
+        db.session.commit()
+
+    @classmethod
+    def reset(cls) -> None:
+        """Remove all checkpoints to start a new initial synchronization."""
+        cls.query.delete()
+        db.session.commit()
+
+
+class PureSyncRun(db.Model):
+    """Registered run of a synchronization.
+
+    Records the kind of the run, e.g. initial or scheduled, when it started
+    and finished, its status and the number of records it stored or failed
+    to store. Scheduled runs record the window of dates of the Pure changes
+    they synchronized, which is the synchronization history.
+    """
+
+    __tablename__ = "pure_sync_run"
+    __table_args__ = (
+        db.Index("ix_pure_sync_run_status_window_end", "status", "window_end"),
+    )
+
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+    id = db.Column(db.Integer, primary_key=True)
+    """Id of the run."""
+
+    kind = db.Column(db.String(20), nullable=False)
+    """Kind of the synchronization, e.g. initial or scheduled."""
+
+    status = db.Column(db.String(20), nullable=False)
+    """Status of the run, skipped if another run held the lock."""
+
+    started = db.Column(
+        db.DateTime, nullable=False, default=datetime.utcnow, index=True
+    )
+    """Start of the run in UTC."""
+
+    finished = db.Column(db.DateTime, nullable=True)
+    """End of the run in UTC, None while it is running."""
+
+    records = db.Column(db.Integer, nullable=False, default=0)
+    """Number of records stored by the run."""
+
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    """Number of research outputs the run failed to synchronize."""
+
+    window_start = db.Column(db.Date, nullable=True)
+    """First date of the Pure changes synchronized by the run."""
+
+    window_end = db.Column(db.Date, nullable=True)
+    """Last date of the Pure changes synchronized by the run."""
+
+    @property
+    def throughput(self) -> Optional[float]:
+        """Get the number of records stored per second, None while running."""
+        if self.finished is None:
+            return None
+        seconds = (self.finished - self.started).total_seconds()
+        return self.records / seconds if seconds > 0 else 0.0
+
+    @classmethod
+    def get(cls, run_id: int) -> "PureSyncRun":
+        """Get the run with given id, if any."""
+        return db.session.get(cls, run_id)
+
+    @classmethod
+    def get_latest(cls, limit: int = 10) -> List["PureSyncRun"]:
+        """Get the latest runs, the latest first."""
+        return cls.query.order_by(cls.started.desc(), cls.id.desc()).limit(limit).all()
+
+    @classmethod
+    def start(cls, kind: str, status: str = RUNNING) -> "PureSyncRun":
+        """Register a new run of given kind."""
+        run = cls(kind=kind, status=status, records=0, failed=0)
+        if status != cls.RUNNING:
+            run.finished = datetime.utcnow()
+        db.session.add(run)
+        db.session.commit()
+        return run
+
+    @classmethod
+    def add_records(cls, run_id: int, records: int, failed: int = 0) -> None:
+        """Add to the numbers of records stored and failed by given run."""
+        cls.query.filter_by(id=run_id).update(
+            {cls.records: cls.records + records, cls.failed: cls.failed + failed},
+            synchronize_session=False,
+        )
+        db.session.commit()
+
+    @classmethod
+    def set_window(cls, run_id: int, start: date, end: date) -> None:
+        """Record the window of dates of the Pure changes synchronized by given run."""
+        cls.query.filter_by(id=run_id).update(
+            {cls.window_start: start, cls.window_end: end}, synchronize_session=False
+        )
+        db.session.commit()
+
+    @classmethod
+    def get_last_synchronized_date(cls) -> Optional[date]:
+        """Get the last date of the Pure changes synchronized by a successful run."""
+        return (
+            db.session.query(db.func.max(cls.window_end))
+            .filter(cls.status == cls.DONE)
+            .scalar()
+        )
+
+    @classmethod
+    def finish(cls, run_id: int, status: str) -> None:
+        """Record the end of given run with its final status."""
+        cls.query.filter_by(id=run_id).update(
+            {cls.status: status, cls.finished: datetime.utcnow()},
+            synchronize_session=False,
+        )
+        db.session.commit()
+
+    @classmethod
+    def finish_orphaned(cls, lease: int) -> int:
+        """Finish the runs of dead processes as failed, return their number.
+
+        A run is orphaned if it started more than *lease* seconds ago and
+        holds no lock whose lease did not expire.
+        """
+        now = datetime.utcnow()
+        live = db.session.query(PureSyncLock.run_id).filter(PureSyncLock.expires >= now)
+        orphaned = cls.query.filter(
+            cls.status == cls.RUNNING,
+            cls.started < now - timedelta(seconds=lease),
+            cls.id.notin_(live),
+        ).update({cls.status: cls.FAILED, cls.finished: now}, synchronize_session=False)
+        db.session.commit()
+        return orphaned
+
+
+class PureSyncLock(db.Model):
+    """Lease based lock held by a synchronization run.
+
+    The lease of the lock expires unless it is renewed by its run, so the
+    lock of a crashed run is released eventually.
+    """
+
+    __tablename__ = "pure_sync_lock"
+
+    name = db.Column(db.String(64), primary_key=True)
+    """Name of the lock."""
+
+    run_id = db.Column(db.Integer, db.ForeignKey(PureSyncRun.id), nullable=False)
+    """Id of the run holding the lock."""
+
+    expires = db.Column(db.DateTime, nullable=False)
+    """Expiry of the lease in UTC."""
+
+    @classmethod
+    def get(cls, name: str) -> Optional["PureSyncLock"]:
+        """Get the lock with given name, None if it is not held."""
+        lock = db.session.get(cls, name)
+        if lock is None or lock.expires < datetime.utcnow():
+            return None
+        return lock
+
+    @classmethod
+    def acquire(cls, name: str, run_id: int, lease: int) -> bool:
+        """Acquire the lock for given run for *lease* seconds.
+
+        Return False if another run holds the lock and its lease did not expire.
+        A run whose expired lock is taken over is finished as failed, if it
+        is still registered as running.
+        """
+        now = datetime.utcnow()
+        expires = now + timedelta(seconds=lease)
+        expired = (
+            db.session.query(cls.run_id)
+            .filter(cls.name == name, cls.expires < now)
+            .scalar()
+        )
+        acquired = 0
+        if expired is not None:
+            acquired = cls.query.filter(
+                cls.name == name, cls.run_id == expired, cls.expires < now
+            ).update(
+                {cls.run_id: run_id, cls.expires: expires}, synchronize_session=False
+            )
+            if acquired:
+                PureSyncRun.query.filter_by(
+                    id=expired, status=PureSyncRun.RUNNING
+                ).update(
+                    {PureSyncRun.status: PureSyncRun.FAILED, PureSyncRun.finished: now},
+                    synchronize_session=False,
+                )
+        else:
+            try:
+                with db.session.begin_nested():
+                    db.session.add(cls(name=name, run_id=run_id, expires=expires))
+                acquired = True
+            except IntegrityError:
+                acquired = False
+        db.session.commit()
+        return bool(acquired)
+
+    @classmethod
+    def renew(cls, name: str, run_id: int, lease: int) -> bool:
+        """Renew the lease of the lock held by given run for *lease* seconds.
+
+        Return False if the run does not hold the lock anymore.
+        """
+        expires = datetime.utcnow() + timedelta(seconds=lease)
+        renewed = cls.query.filter_by(name=name, run_id=run_id).update(
+            {cls.expires: expires}, synchronize_session=False
+        )
+        db.session.commit()
+        return bool(renewed)
+
+    @classmethod
+    def release(cls, name: str, run_id: int) -> None:
+        """Release the lock, if it is held by given run."""
+        cls.query.filter_by(name=name, run_id=run_id).delete(synchronize_session=False)
+        db.session.commit()
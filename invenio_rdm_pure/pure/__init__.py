@@ -8,5 +8,6 @@
 """Pure Module."""
 
 from . import import_records, utils
+from .client import ChecksumStream, PureClient
 
-__all__ = ("import_records", "utils")
+__all__ = ("ChecksumStream", "PureClient", "import_records", "utils")
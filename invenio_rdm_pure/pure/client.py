@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Module containing the HTTP client used for all requests to Pure."""
+
+import hashlib
+import random
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+import requests
+from flask import current_app
+from requests.adapters import HTTPAdapter
+
+from ..metrics import NullMetrics, get_metrics
+
+RETRY_STATUS_CODES = frozenset((429, 500, 502, 503, 504))
+"""HTTP status codes on which a request to Pure is retried."""
+
+
+class ChecksumStream(object):
+    """Readable file-like object computing size and checksum of the bytes read."""
+
+    def __init__(self, stream, checksum_algorithm: str = "md5", length: int = None):
+        """Default Constructor of the ChecksumStream class.
+
+        The *length* parameter is the expected length of the stream if known.
+        """
+        self.stream = stream
+        self.checksum_algorithm = checksum_algorithm
+        self.length = length
+        self.size = 0
+        self._hash = hashlib.new(checksum_algorithm)
+
+    @property
+    def checksum(self) -> str:
+        """Get the checksum of the bytes read so far as "<algorithm>:<hexdigest>"."""
+        return f"{self.checksum_algorithm}:{self._hash.hexdigest()}"
+
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes from the stream."""
+        chunk = self.stream.read(size)
+        self._hash.update(chunk)
+        self.size += len(chunk)
+        return chunk
+
+
+class PureClient(object):
+    """Client sharing one pooled keep-alive session for all requests to Pure.
+
+    Failed requests (connection errors, timeouts and the status codes in
+    ``RETRY_STATUS_CODES``) are retried up to *max_retries* times with
+    exponential backoff and full jitter, capped at *backoff_max* seconds.
+    The latencies of the GET requests of the API, including their retries,
+    are measured as "fetch" stage of the *metrics*.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        timeout: tuple = (5, 60),
+        max_retries: int = 5,
+        backoff_factor: float = 0.5,
+        backoff_max: float = 30,
+        metrics=None,
+    ):
+        """Default Constructor of the PureClient class.
+
+        The *pool_size* parameter defines the number of keep-alive connections
+        kept per host and should match the number of concurrent workers.
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.metrics = metrics or NullMetrics()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @classmethod
+    def from_config(cls, pool_size: int = 0) -> "PureClient":
+        """Create a client configured by the current application."""
+        config = current_app.config
+        if not pool_size:
+            pool_size = config.get("PURE_SYNCHRONIZER_MAX_WORKERS") or 10
+        return cls(
+            pool_size=pool_size,
+            timeout=config.get("PURE_REQUEST_TIMEOUT"),
+            max_retries=config.get("PURE_REQUEST_MAX_RETRIES"),
+            backoff_factor=config.get("PURE_REQUEST_BACKOFF_FACTOR"),
+            backoff_max=config.get("PURE_REQUEST_BACKOFF_MAX"),
+            metrics=get_metrics(),
+        )
+
+    def __enter__(self):
+        """Enter the runtime context of the client."""
+        return self
+
+    def __exit__(self, *args):
+        """Close the client when leaving the runtime context."""
+        self.close()
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
+
+    def get_backoff_delay(self, attempt: int) -> float:
+        """Get the delay in seconds before retrying after the given attempt."""
+        return random.uniform(
+            0, min(self.backoff_max, self.backoff_factor * 2**attempt)
+        )
+
+    def get_retry_after(self, response: requests.Response) -> float:
+        """Get the delay requested by the Retry-After header of the response."""
+        try:
+            return min(self.backoff_max, float(response.headers.get("Retry-After", 0)))
+        except ValueError:
+            return 0
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request to Pure, retrying it on transient failures.
+
+        Return the last response, even if its status code is not OK.
+        Raise the last exception if the request could not be sent at all.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.get_backoff_delay(attempt)
+            else:
+                if (
+                    response.status_code not in RETRY_STATUS_CODES
+                    or attempt >= self.max_retries
+                ):
+                    return response
+                delay = max(
+                    self.get_backoff_delay(attempt), self.get_retry_after(response)
+                )
+                response.close()
+            attempt += 1
+            time.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Send a GET request to Pure.
+
+        Requests which are not streamed are measured as "fetch" stage, failed
+        if their final status code is not OK.
+        """
+        if kwargs.get("stream"):
+            return self.request("GET", url, **kwargs)
+        start = time.perf_counter()
+        try:
+            response = self.request("GET", url, **kwargs)
+        except requests.RequestException:
+            self.metrics.observe("fetch", time.perf_counter() - start, error=True)
+            raise
+        self.metrics.observe(
+            "fetch", time.perf_counter() - start, error=not response.ok
+        )
+        return response
+
+    def download(
+        self,
+        url: str,
+        path: str,
+        chunk_size: int = 1024 * 1024,
+        checksum_algorithm: str = "md5",
+        max_attempts: int = 1,
+        **kwargs,
+    ) -> str:
+        """Stream the file at given URL to given path and return its checksum.
+
+        The file is written in chunks of *chunk_size* bytes while the checksum
+        is computed on the fly, a file left at the path is overwritten. A
+        transfer interrupted within the *max_attempts* is resumed with a Range
+        request, which is conditional on the ETag or Last-Modified validator
+        of the first response, so a file changed in the meantime is sent
+        again in full. The checksum is returned as "<algorithm>:<hexdigest>".
+        Raise requests.RequestException or RuntimeError if the transfer fails.
+        """
+        headers = dict(kwargs.pop("headers", None) or {})
+        checksum = hashlib.new(checksum_algorithm)
+        offset = 0
+        validator = None
+        open(path, "wb").close()
+        for attempt in range(max_attempts):
+            request_headers = dict(headers)
+            if offset and validator:
+                request_headers["Range"] = f"bytes={offset}-"
+                request_headers["If-Range"] = validator
+            try:
+                with self.get(
+                    url, headers=request_headers, stream=True, **kwargs
+                ) as response:
+                    content_range = response.headers.get("Content-Range", "")
+                    if response.status_code == 200:
+                        checksum = hashlib.new(checksum_algorithm)
+                        offset = 0
+                        mode = "wb"
+                    elif response.status_code == 206 and "Range" in request_headers:
+                        if not content_range.startswith(f"bytes {offset}-"):
+                            validator = None
+                            raise RuntimeError(
+                                f"Unexpected Content-Range {content_range}"
+                            )
+                        mode = "ab"
+                    else:
+                        response.raise_for_status()
+                        raise RuntimeError(
+                            f"Unexpected status code {response.status_code}"
+                        )
+                    validator = self.get_validator(response)
+                    with open(path, mode) as fp:
+                        for chunk in response.iter_content(chunk_size):
+                            checksum.update(chunk)
+                            fp.write(chunk)
+                            offset += len(chunk)
+                return f"{checksum_algorithm}:{checksum.hexdigest()}"
+            except (requests.RequestException, RuntimeError):
+                if attempt + 1 >= max_attempts:
+                    raise
+                time.sleep(self.get_backoff_delay(attempt))
+
+    def get_validator(self, response: requests.Response) -> str:
+        """Get the strong ETag or Last-Modified date identifying the sent file."""
+        etag = response.headers.get("ETag")
+        if etag and not etag.startswith("W/"):
+            return etag
+        return response.headers.get("Last-Modified")
+
+    @contextmanager
+    def open_stream(self, url: str, checksum_algorithm: str = "md5", **kwargs):
+        """Open the file at given URL as readable stream without buffering it.
+
+        The yielded ChecksumStream computes size and checksum while it is read.
+        Raise requests.RequestException if the file can not be opened.
+        """
+        with self.get(url, stream=True, **kwargs) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            length = response.headers.get("Content-Length")
+            if "Content-Encoding" in response.headers or length is None:
+                length = None
+            else:
+                length = int(length)
+            yield ChecksumStream(response.raw, checksum_algorithm, length)
+
+
+_default_client = None
+_default_client_lock = Lock()
+
+
+def get_default_client() -> PureClient:
+    """Get the process-wide client used when no client is passed explicitly.
+
+    The client is created from the configuration of the current application.
+    """
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = PureClient.from_config()
+        return _default_client
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Module containing the asynchronous fetch engine for Pure research outputs."""
+
+import asyncio
+import time
+from concurrent.futures import Executor
+from typing import Callable, Iterable, List, Tuple
+
+import aiohttp
+
+from .client import RETRY_STATUS_CODES, PureClient, get_default_client
+
+
+class ResearchOutputFetcher(object):
+    """Fetch pages of research outputs concurrently on one asyncio event loop.
+
+    Up to *concurrency* page requests are kept in flight, independent of the
+    number of threads converting the fetched pages. Retries follow the
+    backoff policy of the given PureClient.
+    """
+
+    def __init__(
+        self,
+        pure_api_key: str,
+        pure_api_url: str,
+        concurrency: int = 8,
+        client: PureClient = None,
+    ):
+        """Default Constructor of the ResearchOutputFetcher class."""
+        self.pure_api_key = pure_api_key
+        self.pure_api_url = pure_api_url
+        self.concurrency = concurrency
+        self.client = client or get_default_client()
+
+    def run(
+        self,
+        chunks: Iterable[Tuple[int, int]],
+        handler: Callable[[int, int, List[dict]], None],
+        executor: Executor = None,
+        workers: int = 1,
+    ) -> None:
+        """Fetch all (size, offset) chunks and pass each page to the handler.
+
+        The handler is called with size, offset and the research outputs of
+        the page as soon as the page arrives. It runs in the given executor,
+        on at most *workers* pages at the same time. Pages which could not be
+        fetched are passed as empty list.
+        """
+        asyncio.run(self._run(chunks, handler, executor, workers))
+
+    async def _run(self, chunks, handler, executor, workers) -> None:
+        """Run the fetch and handler coroutines until all chunks are handled."""
+        loop = asyncio.get_running_loop()
+        chunks = iter(chunks)
+        pages = asyncio.Queue(maxsize=self.concurrency)
+
+        async def fetch_pages(session):
+            for size, offset in chunks:
+                start = time.perf_counter()
+                research_outputs = await self.fetch_page(session, size, offset)
+                self.client.metrics.observe(
+                    "fetch", time.perf_counter() - start, error=not research_outputs
+                )
+                await pages.put((size, offset, research_outputs))
+
+        async def fetch_all_pages(session):
+            await asyncio.gather(
+                *[fetch_pages(session) for _ in range(self.concurrency)]
+            )
+            for _ in range(workers):
+                await pages.put(None)
+
+        async def handle_pages():
+            while True:
+                page = await pages.get()
+                if page is None:
+                    return
+                await loop.run_in_executor(executor, handler, *page)
+
+        connect_timeout, read_timeout = self.client.timeout
+        async with aiohttp.ClientSession(
+            headers={"api-key": self.pure_api_key, "accept": "application/json"},
+            timeout=aiohttp.ClientTimeout(
+                sock_connect=connect_timeout, sock_read=read_timeout
+            ),
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+        ) as session:
+            # The first exception propagates, asyncio.run cancels the rest
+            await asyncio.gather(
+                fetch_all_pages(session), *[handle_pages() for _ in range(workers)]
+            )
+
+    async def fetch_page(
+        self, session: aiohttp.ClientSession, size: int, offset: int
+    ) -> List[dict]:
+        """Fetch a page of research outputs.
+
+        Return [] if the page could not be fetched within the allowed retries.
+        """
+        url = self.pure_api_url + "research-outputs"
+        params = {"size": str(size), "offset": str(offset)}
+        attempt = 0
+        while True:
+            try:
+                async with session.get(url, params=params) as response:
+                    if response.status == 200:
+                        return (await response.json(content_type=None))["items"]
+                    if (
+                        response.status not in RETRY_STATUS_CODES
+                        or attempt >= self.client.max_retries
+                    ):
+                        return []
+                    delay = max(
+                        self.client.get_backoff_delay(attempt),
+                        self.client.get_retry_after(response),
+                    )
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt >= self.client.max_retries:
+                    return []
+                delay = self.client.get_backoff_delay(attempt)
+            attempt += 1
+            await asyncio.sleep(delay)
@@ -8,25 +8,32 @@
 """Module containing requests for Pure."""
 
 import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 from os.path import join
-from typing import List
+from typing import Dict, Iterator, List
 
-import requests
 from flask import current_app
+from requests import RequestException
 from requests.auth import HTTPBasicAuth
 
+from .client import PureClient, get_default_client
 
-def get_research_output_count(pure_api_key: str, pure_api_url: str) -> int:
+
+def get_research_output_count(
+    pure_api_key: str, pure_api_url: str, client: PureClient = None
+) -> int:
     """Get the amount of available research outputs at /research-outputs endpoint.
 
     Return -1 if the GET request is not OK.
     """
+    client = client or get_default_client()
     headers = {
         "api-key": pure_api_key,
         "accept": "application/json",
     }
     url = pure_api_url + "research-outputs"
-    response = requests.get(url, headers=headers)
+    response = client.get(url, headers=headers)
     if response.status_code == 200:
         return int(json.loads(response.text)["count"])
     else:
@@ -34,7 +41,11 @@ def get_research_output_count(pure_api_key: str, pure_api_url: str) -> int:
 
 
 def get_research_outputs(
-    pure_api_key: str, pure_api_url: str, size: int, offset: int
+    pure_api_key: str,
+    pure_api_url: str,
+    size: int,
+    offset: int,
+    client: PureClient = None,
 ) -> List[dict]:
     """Get a list of research outputs.
 
@@ -43,6 +54,7 @@ def get_research_outputs(
     The *offset* parameter defines the offset of the series.
     Return [] if the GET request is not OK.
     """
+    client = client or get_default_client()
     headers = {
         "api-key": pure_api_key,
         "accept": "application/json",
@@ -50,7 +62,7 @@ def get_research_outputs(
     url = pure_api_url + "research-outputs?size={}&offset={}".format(
         str(size), str(offset)
     )
-    response = requests.get(url, headers=headers)
+    response = client.get(url, headers=headers)
     if response.status_code == 200:
         response_json = json.loads(response.text)
         items = response_json["items"]
@@ -59,8 +71,118 @@ def get_research_outputs(
         return []
 
 
-def get_pure_metadata(endpoint, identifier="", parameters={}, review=True):
+def iter_research_outputs(
+    pure_api_key: str,
+    pure_api_url: str,
+    size: int = 100,
+    client: PureClient = None,
+    endpoint: str = "research-outputs",
+) -> Iterator[dict]:
+    """Yield all research outputs one at a time by following the next links of Pure.
+
+    The next page is fetched in the background while the research outputs of
+    the current page are consumed, so at most two pages are held in memory.
+    The research outputs are listed by given *endpoint* of the Pure API.
+    Raise RuntimeError if a page can not be fetched.
+    """
+    client = client or get_default_client()
+    headers = {
+        "api-key": pure_api_key,
+        "accept": "application/json",
+    }
+
+    def get_page(url: str) -> dict:
+        response = client.get(url, headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to fetch research outputs from {url}")
+        return json.loads(response.text)
+
+    url = pure_api_url + "{}?size={}&offset=0".format(endpoint, str(size))
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        next_page = executor.submit(get_page, url)
+        while next_page:
+            page = next_page.result()
+            next_url = get_next_page(page)
+            next_page = executor.submit(get_page, next_url) if next_url else None
+            yield from page.get("items", [])
+
+
+def iter_person_research_outputs(
+    pure_api_key: str,
+    pure_api_url: str,
+    person_uuid: str,
+    size: int = 100,
+    client: PureClient = None,
+) -> Iterator[dict]:
+    """Yield the research outputs of the Pure person with given uuid.
+
+    Raise RuntimeError if a page can not be fetched.
+    """
+    return iter_research_outputs(
+        pure_api_key,
+        pure_api_url,
+        size,
+        client=client,
+        endpoint=f"persons/{person_uuid}/research-outputs",
+    )
+
+
+def get_research_output(
+    pure_api_key: str, pure_api_url: str, uuid: str, client: PureClient = None
+) -> dict:
+    """Get a single research output by its uuid.
+
+    Return {} if the GET request is not OK.
+    """
+    client = client or get_default_client()
+    headers = {
+        "api-key": pure_api_key,
+        "accept": "application/json",
+    }
+    url = pure_api_url + "research-outputs/{}".format(uuid)
+    response = client.get(url, headers=headers)
+    if response.status_code == 200:
+        return json.loads(response.text)
+    else:
+        return {}
+
+
+def get_research_output_changes(
+    pure_api_key: str, pure_api_url: str, since: date, client: PureClient = None
+) -> Dict[str, str]:
+    """Get the research outputs changed in Pure since given date.
+
+    The /changes endpoint is followed by its resumption tokens until Pure
+    reports no more changes. Return a dict mapping the uuid of every changed
+    research output to its latest changeType (ADD, UPDATE or DELETE).
+    Raise RuntimeError if a GET request is not OK.
+    """
+    client = client or get_default_client()
+    headers = {
+        "api-key": pure_api_key,
+        "accept": "application/json",
+    }
+    changes = {}
+    token = since.isoformat()
+    while True:
+        response = client.get(pure_api_url + f"changes/{token}", headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to fetch changes from Pure ({token})")
+        response_json = json.loads(response.text)
+        for item in response_json.get("items", []):
+            if item.get("familySystemName") == "ResearchOutput":
+                changes[item["uuid"]] = item["changeType"]
+        next_token = response_json.get("resumptionToken")
+        if not response_json.get("moreChanges") or next_token in (None, token):
+            return changes
+        token = next_token
+
+
+def get_pure_metadata(
+    endpoint, identifier="", parameters={}, review=True, client: PureClient = None
+):
     """Description."""
+    client = client or get_default_client()
     pure_api_key = current_app.config.get("PURE_API_KEY")
     headers = {
         "api-key": pure_api_key,
@@ -84,7 +206,7 @@ def get_pure_metadata(endpoint, identifier="", parameters={}, review=True):
     url = url[:-1]
 
     # Sending request
-    response = requests.get(url, headers=headers)
+    response = client.get(url, headers=headers)
 
     return response
 
@@ -95,24 +217,35 @@ def download_pure_file(
     pure_password: str,
     destination_path: str,
     file_name: str,
+    client: PureClient = None,
+    chunk_size: int = 1024 * 1024,
 ) -> str:
     """Download a file from Pure to given destination path with given file name.
 
+    The file is streamed to disk in chunks of *chunk_size* bytes, a file
+    left at the path is overwritten. An interrupted transfer is resumed up to
+    PURE_DOWNLOAD_MAX_ATTEMPTS times.
     Return path to the downloaded file upon success, empty string upon failure.
     """
-    response = requests.get(file_url, auth=HTTPBasicAuth(pure_username, pure_password))
-    if response.status_code != 200:
-        return ""
+    client = client or get_default_client()
     path = join(destination_path, file_name)
-    with open(path, "wb") as fp:
-        fp.write(response.content)
+    try:
+        client.download(
+            file_url,
+            path,
+            chunk_size=chunk_size,
+            max_attempts=current_app.config.get("PURE_DOWNLOAD_MAX_ATTEMPTS"),
+            auth=HTTPBasicAuth(pure_username, pure_password),
+        )
+    except (RequestException, RuntimeError):
+        return ""
     return path
 
 
-def get_pure_record_metadata_by_uuid(uuid: str):
+def get_pure_record_metadata_by_uuid(uuid: str, client: PureClient = None):
     """Method used to get from Pure record's metadata."""
     # PURE REQUEST
-    response = get_pure_metadata("research-outputs", uuid)
+    response = get_pure_metadata("research-outputs", uuid, client=client)
 
     # Check response
     if response.status_code >= 300:
@@ -123,14 +256,13 @@ def get_pure_record_metadata_by_uuid(uuid: str):
 
 
 def get_next_page(resp_json):
-    """Description."""
-    if "navigationLinks" in resp_json:
-        if "next" in resp_json["navigationLinks"][0]["ref"]:
-            return resp_json["navigationLinks"][0]["href"]
-        else:
-            if len(resp_json["navigationLinks"]) == 2:
-                if "next" in resp_json["navigationLinks"][1]["ref"]:
-                    return resp_json["navigationLinks"][1]["href"]
+    """Get the URL of the next page from the navigationLinks of a Pure response.
+
+    Return False if there is no next page.
+    """
+    for link in resp_json.get("navigationLinks", []):
+        if "next" in link["ref"]:
+            return link["href"]
     return False
 
 
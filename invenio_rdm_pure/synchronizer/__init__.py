@@ -7,6 +7,7 @@
 
 """Synchronizer Module."""
 
+from .pipeline import Pipeline, Stage
 from .synchronizer import Synchronizer
 
-__all__ = "Synchronizer"
+__all__ = ("Pipeline", "Stage", "Synchronizer")
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Bulk mode storing many records per transaction with deferred indexing."""
+
+from contextlib import contextmanager
+from threading import Lock
+
+from invenio_records_resources.services.uow import (
+    IndexRefreshOp,
+    RecordCommitOp,
+    RecordDeleteOp,
+    UnitOfWork,
+)
+
+from ..utils import get_batches
+
+
+class DeferredIndexer(object):
+    """Collector of the index operations of records, applied by one bulk reindex.
+
+    Per record only the last operation counts. Records indexed and deleted
+    again before the reindex, e.g. the drafts of published records, are
+    neither indexed nor deleted. Operations may be added by several threads.
+    """
+
+    def __init__(self, batch_size: int = 1000):
+        """Default constructor of the class.
+
+        The ids of the records are queued for the reindex in batches of
+        *batch_size*.
+        """
+        self.batch_size = batch_size
+        self.indexers = {}
+        self.operations = {}
+        self.lock = Lock()
+        self.reindexing = Lock()
+
+    def __len__(self) -> int:
+        """Get the number of deferred operations."""
+        return sum(len(operations) for operations in self.operations.values())
+
+    def add(self, indexer, record, operation: str) -> None:
+        """Defer the "index" or "delete" operation of a record by given indexer."""
+        record_id = str(record.id)
+        with self.lock:
+            self.indexers.setdefault(indexer.record_cls, indexer)
+            operations = self.operations.setdefault(indexer.record_cls, {})
+            if operation == "delete" and operations.get(record_id) == "index":
+                del operations[record_id]
+            else:
+                operations[record_id] = operation
+
+    def reindex(self) -> None:
+        """Apply the deferred operations with the bulk API of the indexers.
+
+        Concurrent calls wait for each other, so once a call returns, all
+        operations deferred before it are applied.
+        """
+        with self.reindexing:
+            with self.lock:
+                operations, self.operations = self.operations, {}
+            for record_cls, record_operations in operations.items():
+                indexer = self.indexers[record_cls]
+                for batch in get_batches(record_operations.items(), self.batch_size):
+                    index = [id_ for id_, operation in batch if operation == "index"]
+                    delete = [id_ for id_, operation in batch if operation == "delete"]
+                    if index:
+                        indexer.bulk_index(index)
+                    if delete:
+                        indexer.bulk_delete(delete)
+                    indexer.process_bulk_queue()
+
+
+class BulkUnitOfWork(UnitOfWork):
+    """Unit of work storing the records of many service calls in one transaction.
+
+    On commit, the index operations of the records are handed to the
+    DeferredIndexer instead of indexing every record, index refreshes are
+    skipped. The writes of a record are wrapped in savepoint(), so a failing
+    record does not abort the transaction of the others.
+    """
+
+    def __init__(self, indexer: DeferredIndexer, session=None):
+        """Default constructor of the class."""
+        super().__init__(session)
+        self.indexer = indexer
+        self._deferred = []
+
+    def register(self, op) -> None:
+        """Register an operation, deferring the indexing of records."""
+        if isinstance(op, IndexRefreshOp):
+            return
+        if isinstance(op, (RecordCommitOp, RecordDeleteOp)):
+            op.on_register(self)
+            self._deferred.append(op)
+            return
+        super().register(op)
+
+    @contextmanager
+    def savepoint(self):
+        """Roll back the writes and operations registered within on exception."""
+        operations, deferred = len(self._operations), len(self._deferred)
+        try:
+            with self.session.begin_nested():
+                yield self
+        except Exception:
+            del self._operations[operations:]
+            del self._deferred[deferred:]
+            raise
+
+    def commit(self) -> None:
+        """Commit the transaction and defer the indexing of its records."""
+        super().commit()
+        for op in self._deferred:
+            if op._indexer is not None:
+                operation = "delete" if isinstance(op, RecordDeleteOp) else "index"
+                self.indexer.add(op._indexer, op._record, operation)
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Pipeline module to process items in stages connected by bounded queues."""
+
+import logging
+from contextlib import nullcontext
+from queue import Queue
+from threading import Lock, Thread
+from typing import Callable, Iterable, List
+
+_DONE = object()
+"""Sentinel signaling a worker that its stage has no more items."""
+
+
+class Stage(object):
+    """Stage of a Pipeline applying a function to items with its own workers."""
+
+    def __init__(self, name: str, function: Callable, workers: int = 1):
+        """Default Constructor of the Stage class.
+
+        The *function* is called with an item and returns the item for the
+        next stage, or None to drop the item.
+        """
+        self.name = name
+        self.function = function
+        self.workers = workers
+
+
+class Pipeline(object):
+    """Pipeline of stages connected by bounded queues.
+
+    Every stage runs its own worker threads, which take items from the queue
+    of the stage, apply the stage function and put the results into the queue
+    of the next stage. A full queue blocks the previous stage, so a slow stage
+    throttles the ones before it instead of accumulating items in memory.
+    """
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        queue_size: int = 100,
+        app=None,
+        on_error: Callable = None,
+    ):
+        """Default Constructor of the Pipeline class.
+
+        The workers run in the application context of *app*, if given.
+        Exceptions raised by a stage function drop the item and are passed to
+        *on_error* together with the stage and the item.
+        """
+        self.stages = stages
+        self.queue_size = queue_size
+        self.app = app
+        self.on_error = on_error
+
+    def run(self, items: Iterable) -> None:
+        """Pass all items through the stages and wait until they are processed."""
+        queues = [Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = []
+        for index, stage in enumerate(self.stages):
+            if index + 1 < len(self.stages):
+                output, next_workers = queues[index + 1], self.stages[index + 1].workers
+            else:
+                output, next_workers = None, 0
+            remaining = [stage.workers]
+            lock = Lock()
+            for number in range(stage.workers):
+                thread = Thread(
+                    target=self._work,
+                    args=(stage, queues[index], output, next_workers, remaining, lock),
+                    name=f"{stage.name}-{number}",
+                    daemon=True,
+                )
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for item in items:
+                queues[0].put(item)
+        finally:
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_DONE)
+            for thread in threads:
+                thread.join()
+
+    def _work(self, stage, input, output, next_workers, remaining, lock) -> None:
+        """Process items of a stage until the previous stage is done."""
+        try:
+            with self.app.app_context() if self.app else nullcontext():
+                while True:
+                    item = input.get()
+                    if item is _DONE:
+                        break
+                    try:
+                        result = stage.function(item)
+                    except Exception as exc:
+                        self._handle_error(stage, item, exc)
+                        continue
+                    if result is not None and output is not None:
+                        output.put(result)
+        finally:
+            # The last worker of a stage signals the end to the next stage
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                for _ in range(next_workers):
+                    output.put(_DONE)
+
+    def _handle_error(self, stage: Stage, item, exc: Exception) -> None:
+        """Pass an exception of a stage to on_error, log it if on_error fails."""
+        if self.on_error is None:
+            return
+        try:
+            self.on_error(stage, item, exc)
+        except Exception:
+            logger = self.app.logger if self.app else logging.getLogger(__name__)
+            logger.exception(f"Error handler of pipeline stage {stage.name} failed")
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Registered synchronization runs, which never overlap."""
+
+import time
+from datetime import date
+from functools import wraps
+from threading import Event, Lock, Thread
+from typing import Callable, Optional
+
+from flask import current_app
+
+from ..metrics import get_metrics
+from ..models import PureSyncLock, PureSyncRun
+
+SYNCHRONIZATION_LOCK = "synchronization"
+"""Name of the lock held by the running initial or scheduled synchronization."""
+
+
+class SynchronizationRun(object):
+    """Run of a synchronization, registered as PureSyncRun and holding the lock.
+
+    Within its context, a heartbeat thread renews the lease of the lock every
+    third of PURE_SYNC_LOCK_LEASE seconds, and the stored and failed records
+    are added to the run. The run is finished and the lock released when the
+    context of the *owner* is left, as failed if it raised an exception or
+    its status was set to failed. Other processes may take part in the run of an owner,
+    e.g. the chunk tasks of a distributed synchronization. When the context
+    is left, the metrics measured within are logged and saved to the
+    PURE_METRICS_DIRECTORY, if metrics are enabled.
+    """
+
+    def __init__(
+        self, run_id: int, owner: bool = True, lock: str = SYNCHRONIZATION_LOCK
+    ):
+        """Default constructor of the class."""
+        self.run_id = run_id
+        self.owner = owner
+        self.lock = lock
+        self.lease = current_app.config.get("PURE_SYNC_LOCK_LEASE")
+        self.records = 0
+        self.failed = 0
+        self.status = None
+        self.metrics = get_metrics()
+        self._metrics_start = None
+        self._lock = Lock()
+        self._stopped = Event()
+        self._heartbeat = None
+
+    @classmethod
+    def start(
+        cls, kind: str, wait: float = 0, lock: str = SYNCHRONIZATION_LOCK
+    ) -> Optional["SynchronizationRun"]:
+        """Register a run of given kind and acquire the named lock for it.
+
+        Wait up to *wait* seconds for a running synchronization to finish.
+        If the lock is still held, the run is registered as skipped and None
+        is returned, so overlapping triggers coalesce into the running one.
+        Runs of dead processes, whose lease expired, are finished as failed.
+        """
+        lease = current_app.config.get("PURE_SYNC_LOCK_LEASE")
+        PureSyncRun.finish_orphaned(lease)
+        run = PureSyncRun.start(kind)
+        deadline = time.monotonic() + wait
+        while not PureSyncLock.acquire(lock, run.id, lease):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                PureSyncRun.finish(run.id, PureSyncRun.SKIPPED)
+                holder = PureSyncLock.get(lock)
+                current_app.logger.info(
+                    f"Synchronization run {run.id} ({kind}) skipped, run "
+                    f"{holder.run_id if holder else '?'} holds the lock {lock}"
+                )
+                return None
+            time.sleep(min(remaining, 5))
+        return cls(run.id, lock=lock)
+
+    def add_records(self, records: int = 1, failed: int = 0) -> None:
+        """Count records stored and research outputs failed by the run."""
+        with self._lock:
+            self.records += records
+            self.failed += failed
+
+    def set_window(self, start: date, end: date) -> None:
+        """Record the window of dates of the Pure changes synchronized by the run."""
+        PureSyncRun.set_window(self.run_id, start, end)
+
+    def finish(self, status: str) -> None:
+        """Record the end of the run and release the lock."""
+        PureSyncRun.finish(self.run_id, status)
+        PureSyncLock.release(self.lock, self.run_id)
+
+    def __enter__(self) -> "SynchronizationRun":
+        """Start renewing the lease of the lock."""
+        self._stopped.clear()
+        self._metrics_start = self.metrics.snapshot()
+        self._heartbeat = Thread(
+            target=self._renew_lease,
+            args=(current_app._get_current_object(),),
+            daemon=True,
+        )
+        self._heartbeat.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """Stop renewing the lease, store the counts and finish an owned run."""
+        self._stopped.set()
+        self._heartbeat.join()
+        with self._lock:
+            records, self.records = self.records, 0
+            failed, self.failed = self.failed, 0
+        PureSyncRun.add_records(self.run_id, records, failed)
+        self.log_metrics()
+        if self.owner:
+            if exc_type:
+                self.status = PureSyncRun.FAILED
+            self.finish(self.status or PureSyncRun.DONE)
+
+    def log_metrics(self) -> None:
+        """Log the metrics measured within the context and save them."""
+        summary = self.metrics.summarize(self._metrics_start)
+        if not summary:
+            return
+        current_app.logger.info(f"Synchronization run {self.run_id} metrics: {summary}")
+        directory = current_app.config.get("PURE_METRICS_DIRECTORY")
+        if directory:
+            try:
+                self.metrics.save(directory)
+            except OSError as exc:
+                current_app.logger.warning(f"Failed to save metrics: {exc}")
+
+    def _renew_lease(self, app) -> None:
+        """Renew the lease of the lock until the run stops."""
+        with app.app_context():
+            while not self._stopped.wait(self.lease / 3):
+                if not PureSyncLock.renew(self.lock, self.run_id, self.lease):
+                    current_app.logger.error(
+                        f"Synchronization run {self.run_id} lost its lock"
+                    )
+
+
+def registered_run(kind: str, get_lock: Callable = None) -> Callable:
+    """Decorate a Synchronizer method to run it as registered SynchronizationRun.
+
+    The run holds the SYNCHRONIZATION_LOCK, or the lock named by *get_lock*
+    called with the arguments of the method. The decorated method takes a
+    *wait* keyword argument, see SynchronizationRun.start. It returns False
+    if it was skipped because another run holds the lock, True otherwise.
+    Calls from within a run of the same Synchronizer are part of that run.
+    """
+
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self, *args, wait: float = 0, **kwargs) -> bool:
+            if self.run is not None:
+                method(self, *args, **kwargs)
+                return True
+            lock = get_lock(*args, **kwargs) if get_lock else SYNCHRONIZATION_LOCK
+            run = SynchronizationRun.start(kind, wait, lock)
+            if run is None:
+                return False
+            with run:
+                self.run = run
+                try:
+                    method(self, *args, **kwargs)
+                finally:
+                    self.run = None
+            return True
+
+        return wrapper
+
+    return decorator
@@ -11,14 +11,19 @@ import datetime
 import os
 import time
 from concurrent.futures import ThreadPoolExecutor
-from os.path import basename, dirname, isabs, isfile, join
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from os.path import basename, dirname, getsize, isabs, join
 from pathlib import Path
-from typing import List
+from queue import Queue
+from tempfile import mkdtemp
+from typing import Callable, Dict, List, Optional, Tuple
 
 from flask import current_app
 from flask_principal import Identity
 from invenio_access.permissions import any_user
 from invenio_db import db
+from invenio_files_rest.errors import StorageError
 from invenio_files_rest.models import ObjectVersion
 from invenio_records_marc21.services import (
     Marc21DraftFilesService,
@@ -26,14 +31,29 @@ from invenio_records_marc21.services import (
     Metadata,
     RecordItem,
 )
+from invenio_records_resources.services.uow import UnitOfWork
+from requests import RequestException
+from requests.auth import HTTPBasicAuth
 
-from ..converter import Converter, Marc21Record
+from ..converter import Converter
+from ..converter.cache import ConversionCache
+from ..converter.parallel import get_conversion_pool
+from ..metrics import get_metrics
+from ..models import PureSyncChunk, PureSyncRun, PureSyncState
+from ..pure import PureClient
+from ..pure.fetcher import ResearchOutputFetcher
 from ..pure.utils import (
-    download_pure_file,
+    get_research_output,
+    get_research_output_changes,
     get_research_output_count,
     get_research_outputs,
+    iter_person_research_outputs,
+    iter_research_outputs,
 )
-from ..utils import get_dates_in_span, get_user_id, send_email
+from ..utils import get_batches, get_fingerprint, get_user_id, send_email
+from .bulk import BulkUnitOfWork, DeferredIndexer
+from .pipeline import Pipeline, Stage
+from .runs import registered_run
 
 
 class Synchronizer(object):
@@ -78,36 +98,315 @@ class Synchronizer(object):
             invenio_pure_user_email, invenio_pure_user_password
         )
         self.pure_responsible_email = current_app.config.get("PURE_RESPONSIBLE_EMAIL")
+        self.max_workers = (
+            current_app.config.get("PURE_SYNCHRONIZER_MAX_WORKERS") or os.cpu_count()
+        )
+        self.metrics = get_metrics()
+        self.client = PureClient.from_config(pool_size=self.max_workers)
+        self.fetch_concurrency = current_app.config.get(
+            "PURE_SYNCHRONIZER_FETCH_CONCURRENCY"
+        )
+        self.stream_files = current_app.config.get("PURE_SYNCHRONIZER_STREAM_FILES")
+        cache_path = current_app.config.get("PURE_CONVERSION_CACHE_PATH")
+        self.conversion_cache = None
+        if cache_path:
+            self.conversion_cache = ConversionCache(
+                cache_path, current_app.config.get("PURE_CONVERSION_CACHE_MAX_ENTRIES")
+            )
+        processes = current_app.config.get("PURE_CONVERTER_PROCESSES")
+        self.conversion_pool = None
+        if processes:
+            self.conversion_pool = get_conversion_pool(processes, self.conversion_cache)
+            if self.conversion_pool is None:
+                current_app.logger.warning(
+                    "PURE_CONVERTER_PROCESSES is ignored in daemonic processes, "
+                    "research outputs are converted in threads"
+                )
+        self.bulk_size = current_app.config.get("PURE_SYNCHRONIZER_BULK_SIZE")
+        self.deferred_indexer = None
+        self.reindex_unchanged = False
+        self.run = None
 
-    def run_initial_synchronization(self) -> None:
+    @registered_run("initial")
+    def run_initial_synchronization(
+        self, resume: bool = False, cursor: bool = False
+    ) -> None:
         """Run the initial synchronization.
 
         In this case the database is empty.
+        If *resume* is set, continue an interrupted initial synchronization.
+        If *cursor* is set, follow the navigation links of Pure instead of
+        computing the pages from the research output count.
         """
-        self.run_initial_research_output_synchronization()
+        if cursor:
+            self.run_streaming_research_output_synchronization(resume=resume)
+        else:
+            self.run_initial_research_output_synchronization(resume=resume)
 
+    @registered_run("initial")
     def run_initial_research_output_synchronization(
-        self, granularity: int = 100
+        self, granularity: int = 100, resume: bool = False
     ) -> None:
-        """Run initial synchronization for all research outputs."""
-        research_count = get_research_output_count(self.pure_api_key, self.pure_api_url)
+        """Run initial synchronization for all research outputs.
+
+        Pages of *granularity* research outputs are fetched concurrently by the
+        ResearchOutputFetcher and passed through the synchronization pipeline
+        as they arrive, see get_page_stages. The completion of every page is
+        checkpointed. If *resume* is set, pages completed by a previous run
+        with the same granularity are skipped, otherwise the checkpoints of
+        previous runs are discarded. In bulk mode, the unchanged research
+        outputs of resumed pages are reindexed, as the previous run may have
+        stored them without indexing them.
+        """
+        chunks = self.get_initial_synchronization_chunks(granularity, resume)
+        fetcher = ResearchOutputFetcher(
+            self.pure_api_key,
+            self.pure_api_url,
+            concurrency=self.fetch_concurrency,
+            client=self.client,
+        )
+        pages = Queue(maxsize=1)
+
+        def fetch_pages():
+            try:
+                fetcher.run(
+                    chunks,
+                    lambda size, offset, research_outputs: pages.put(
+                        {
+                            "size": size,
+                            "offset": offset,
+                            "research_outputs": research_outputs,
+                        }
+                    ),
+                )
+            finally:
+                pages.put(None)
+
+        with self.bulk_mode(reindex_unchanged=resume):
+            with ThreadPoolExecutor(1) as executor:
+                fetching = executor.submit(fetch_pages)
+                self.get_pipeline().run(iter(pages.get, None))
+                fetching.result()
+
+    def get_initial_synchronization_chunks(
+        self, granularity: int = 100, resume: bool = False
+    ) -> List[Tuple[int, int]]:
+        """Get the (size, offset) pairs of the pages of the initial synchronization.
+
+        If *resume* is set, the pages completed by a previous run with the same
+        granularity are left out, otherwise the checkpoints of previous runs
+        are discarded. The pages are computed from the research output count
+        up front, so research outputs added or deleted in Pure during the
+        synchronization shift the pages and may be missed, see
+        run_streaming_research_output_synchronization.
+        """
+        research_count = get_research_output_count(
+            self.pure_api_key, self.pure_api_url, client=self.client
+        )
         assert research_count != -1, "Failed to get research output count"
-        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
-            for job_counter in range(0, (research_count // granularity) + 1):
-                if job_counter == (research_count // granularity):
-                    executor.submit(
-                        self.synchronize_research_outputs,
-                        current_app._get_current_object(),
-                        research_count - job_counter * granularity,
-                        job_counter * granularity,
-                    )
-                else:
-                    executor.submit(
-                        self.synchronize_research_outputs,
-                        current_app._get_current_object(),
-                        granularity,
-                        job_counter * granularity,
-                    )
+        if resume:
+            completed = PureSyncChunk.get_completed()
+        else:
+            PureSyncChunk.reset()
+            completed = set()
+        chunks = [
+            (min(granularity, research_count - offset), offset)
+            for offset in range(0, research_count, granularity)
+        ]
+        return [chunk for chunk in chunks if chunk not in completed]
+
+    def synchronize_research_output_chunk(self, size: int, offset: int) -> bool:
+        """Fetch and synchronize a page of research outputs and checkpoint it.
+
+        Used by the chunk tasks of the distributed initial synchronization.
+        A chunk may be redelivered after its worker died, so in bulk mode its
+        unchanged research outputs are reindexed.
+        Return False if the page could not be fetched from Pure, or some of
+        its research outputs failed to synchronize.
+        """
+        research_outputs = get_research_outputs(
+            self.pure_api_key, self.pure_api_url, size, offset, client=self.client
+        )
+        page = {"size": size, "offset": offset, "research_outputs": research_outputs}
+        with self.bulk_mode(reindex_unchanged=True):
+            self.process_page(page)
+        return bool(research_outputs) and not page["failed"]
+
+    @registered_run("initial")
+    def run_streaming_research_output_synchronization(
+        self, page_size: int = 100, resume: bool = False
+    ) -> None:
+        """Run initial synchronization by following the navigation links of Pure.
+
+        Unlike the offset based synchronization, this does not depend on the
+        research output count, which may change during a long synchronization.
+        The pages are passed through the synchronization pipeline as they are
+        fetched, but not checkpointed: an interrupted run is repeated, with
+        *resume* set, which skips the unchanged research outputs and reindexes
+        their records in bulk mode. The run fails if a page can not be fetched
+        or a stage raised an exception.
+        """
+        research_outputs = iter_research_outputs(
+            self.pure_api_key, self.pure_api_url, page_size, client=self.client
+        )
+        pages = (
+            {"research_outputs": batch}
+            for batch in get_batches(research_outputs, page_size)
+        )
+        with self.bulk_mode(reindex_unchanged=resume):
+            self.get_pipeline().run(pages)
+
+    @contextmanager
+    def bulk_mode(self, reindex_unchanged: bool = False):
+        """Store records in bulk within the context, if PURE_SYNCHRONIZER_BULK_SIZE is set.
+
+        Research outputs processed within the context are stored in transactions
+        of PURE_SYNCHRONIZER_BULK_SIZE records each. Their records are not indexed
+        one by one, but reindexed in bulk once their transaction is committed.
+        If *reindex_unchanged* is set, the records of unchanged research outputs
+        are reindexed as well.
+        """
+        if not self.bulk_size:
+            yield
+            return
+        self.deferred_indexer = DeferredIndexer()
+        self.reindex_unchanged = reindex_unchanged
+        try:
+            yield
+        finally:
+            deferred_indexer, self.deferred_indexer = self.deferred_indexer, None
+            self.reindex_unchanged = False
+            deferred_indexer.reindex()
+
+    def get_pipeline(self) -> Pipeline:
+        """Get the synchronization pipeline passing pages through the page stages.
+
+        The stages are connected by queues of PURE_SYNCHRONIZER_PIPELINE_QUEUE_SIZE
+        pages. Exceptions raised by a stage are logged, the research outputs
+        of the page are counted as failed and the page is not checkpointed.
+        """
+        return Pipeline(
+            self.get_page_stages(),
+            queue_size=current_app.config.get("PURE_SYNCHRONIZER_PIPELINE_QUEUE_SIZE"),
+            app=current_app._get_current_object(),
+            on_error=self._log_pipeline_error,
+        )
+
+    def get_page_stages(self) -> List[Stage]:
+        """Get the stages synchronizing a page of research outputs.
+
+        The research outputs of a page are converted and validated, their
+        files transferred, their records stored and Pure notified, each by
+        its own number of worker threads (PURE_SYNCHRONIZER_PIPELINE_WORKERS).
+        So fetching, conversion, file transfers and database writes of
+        different pages overlap.
+        """
+        workers = current_app.config.get("PURE_SYNCHRONIZER_PIPELINE_WORKERS")
+        return [
+            Stage(name, function, workers.get(name, 1))
+            for name, function in (
+                ("convert", self.convert_page),
+                ("transfer", self.transfer_page),
+                ("persist", self.persist_page),
+                ("notify", self.notify_page),
+            )
+        ]
+
+    def _log_pipeline_error(self, stage: Stage, page: dict, exc: Exception) -> None:
+        """Log an exception raised in a stage of the synchronization pipeline."""
+        current_app.logger.error(
+            f"Synchronization stage {stage.name} failed", exc_info=exc
+        )
+        if self.run is not None:
+            self.run.add_records(
+                0, failed=len(page.get("items", page["research_outputs"]))
+            )
+            self.run.status = PureSyncRun.FAILED
+
+    def process_page(self, page: dict) -> None:
+        """Pass a page of research outputs through the page stages one after another.
+
+        The stages update the page in place, its failed research outputs are
+        counted in page["failed"].
+        """
+        for stage in self.get_page_stages():
+            page = stage.function(page)
+            if page is None:
+                return
+
+    def convert_page(self, page: dict) -> Optional[dict]:
+        """Prepare the research outputs of the page and convert the changed ones.
+
+        A page of the initial synchronization which could not be fetched from
+        Pure is checkpointed as failed and dropped.
+        """
+        page["failed"] = 0
+        if not page["research_outputs"]:
+            if "offset" in page:
+                size, offset = page["size"], page["offset"]
+                current_app.logger.error(
+                    f"Failed to fetch research outputs (size: {size}, offset: {offset})"
+                )
+                PureSyncChunk.set_status(size, offset, PureSyncChunk.FAILED)
+            return None
+        page["items"] = self.convert_research_outputs(
+            page["research_outputs"], page=page
+        )
+        return page
+
+    def transfer_page(self, page: dict) -> dict:
+        """Transfer the files of the converted research outputs of the page."""
+        steps = [("transfer", self.transfer_research_output_files)]
+        transferred = (
+            self.run_synchronization_steps(steps, item, page=page)
+            for item in page["items"]
+        )
+        page["items"] = [item for item in transferred if item is not None]
+        return page
+
+    def persist_page(self, page: dict) -> dict:
+        """Store the records of the page and update their synchronization state.
+
+        In bulk mode, the records are stored in transactions of
+        PURE_SYNCHRONIZER_BULK_SIZE records, and reindexed once the
+        transactions are committed.
+        """
+        steps = [("persist", self.persist_research_output)]
+        stored = []
+
+        def store(item: dict, uow: BulkUnitOfWork = None) -> None:
+            item["uow"] = uow
+            if self.run_synchronization_steps(steps, item, uow, page=page):
+                stored.append(item)
+            else:
+                self.delete_record_files(item["files"])
+
+        if self.deferred_indexer is None:
+            for item in page["items"]:
+                store(item)
+        else:
+            for batch in get_batches(page["items"], self.bulk_size):
+                with BulkUnitOfWork(self.deferred_indexer) as uow:
+                    for item in batch:
+                        store(item, uow)
+                    with self.metrics.time("commit"):
+                        uow.commit()
+            self.deferred_indexer.reindex()
+        page["items"] = stored
+        return page
+
+    def notify_page(self, page: dict) -> None:
+        """Notify Pure of the stored research outputs of the page and checkpoint it.
+
+        A page with failed research outputs is checkpointed as failed, so a
+        resumed synchronization retries it.
+        """
+        steps = [("notify", self.notify_research_output)]
+        for item in page["items"]:
+            self.run_synchronization_steps(steps, item)
+        if "offset" in page:
+            status = PureSyncChunk.FAILED if page["failed"] else PureSyncChunk.DONE
+            PureSyncChunk.set_status(page["size"], page["offset"], status)
 
     def synchronize_research_outputs(self, app, size: int, offset: int) -> None:
         """Synchronize a series of research outputs.
@@ -122,133 +421,456 @@ class Synchronizer(object):
                 self.pure_api_url,
                 size,
                 offset,
+                client=self.client,
             )  # Fetch research outputs from Pure
             if research_outputs:
                 break
             else:
                 time.sleep(0.001)
-        converter = Converter()
+        self.process_research_outputs(app, research_outputs)
+
+    def process_research_outputs(self, app, research_outputs: List[dict]) -> None:
+        """Convert, validate and store the given research outputs.
+
+        Research outputs which did not change since their last synchronization
+        are skipped, changed ones are stored as new version of their record.
+        The research outputs are passed through the page stages, see
+        get_page_stages, in the calling thread.
+        """
+        with app.app_context():
+            self.process_page({"research_outputs": research_outputs})
+
+    def run_synchronization_steps(
+        self,
+        steps: List[Tuple[str, Callable]],
+        item: dict,
+        uow: BulkUnitOfWork = None,
+        page: dict = None,
+    ) -> Optional[dict]:
+        """Pass a synchronization item through the steps, return the resulting item.
+
+        Return None if a step dropped the item or failed, the writes of a
+        failed item are rolled back to the savepoint of the *uow*, if given.
+        A failed item is counted in the failed research outputs of its *page*.
+        """
+        try:
+            with uow.savepoint() if uow else nullcontext():
+                for _, step in steps:
+                    item = step(item)
+                    if item is None:
+                        break
+            return item
+        except RuntimeError as exc:
+            current_app.logger.exception(exc)
+            if self.run is not None:
+                self.run.add_records(0, failed=1)
+            if page is not None:
+                page["failed"] += 1
+            return None
+
+    def convert_research_outputs(
+        self, research_outputs: List[dict], page: dict = None
+    ) -> List[dict]:
+        """Prepare research outputs and convert the changed ones to Marc21XML.
+
+        Return the synchronization items of the research outputs converted to
+        valid Marc21XML. The others are counted in the failed research outputs
+        of the *page*, if given.
+        """
+        items = []
         for research_output in research_outputs:
             try:
-                record_xml = converter.convert_pure_json_to_marc21_xml(research_output)
-                if Marc21Record.is_valid_marc21_xml_string(record_xml):
-                    # Store record with the help of marc21 module
-                    with app.app_context():
-                        files = self.download_record_files(research_output)
-                        self.create_record(record_xml, files)
-                        self.send_pure_delete_requests(research_output, files)
+                item = self.prepare_research_output(research_output)
             except RuntimeError as exc:
                 current_app.logger.exception(exc)
+                if page is not None:
+                    page["failed"] += 1
+                continue
+            if item is not None:
+                items.append(item)
+        results = Converter().convert_many(
+            (item["research_output"] for item in items),
+            pool=self.conversion_pool,
+            cache=self.conversion_cache,
+        )
+        converted = []
+        for item, (uuid, result) in zip(items, self.metrics.timed("convert", results)):
+            if isinstance(result, Exception):
+                current_app.logger.warning(
+                    f"Failed to convert research output {uuid}: {result}"
+                )
+                if page is not None:
+                    page["failed"] += 1
+                continue
+            item["record_xml"] = result
+            converted.append(item)
+        return converted
+
+    def prepare_research_output(self, research_output: dict) -> Optional[dict]:
+        """Create the synchronization item of a research output.
+
+        Return None if the research output did not change since its last
+        synchronization.
+        """
+        excluded_fields = current_app.config.get(
+            "PURE_SYNC_FINGERPRINT_EXCLUDED_FIELDS"
+        )
+        fingerprint = get_fingerprint(research_output, excluded_fields)
+        state = PureSyncState.get(research_output["uuid"])
+        if state and state.fingerprint == fingerprint:
+            if self.reindex_unchanged and self.deferred_indexer is not None:
+                self.reindex_record(state.recid)
+            return None
+        return {
+            "research_output": research_output,
+            "fingerprint": fingerprint,
+            "recid": state.recid if state else None,
+        }
+
+    def reindex_record(self, recid: str) -> None:
+        """Reindex the published record with given id with the records stored in bulk."""
+        service = Marc21RecordService()
+        record = service.record_cls.pid.resolve(recid)
+        self.deferred_indexer.add(service.indexer, record, "index")
+
+    def transfer_research_output_files(self, item: dict) -> dict:
+        """Download the files of the item, unless they are streamed into the record.
+
+        Streaming would keep the transaction of the records open during the
+        transfer, so in bulk mode the files are always downloaded.
+        """
+        if self.stream_files and self.deferred_indexer is None:
+            item["files"] = {}
+            item["pure_files"] = self.get_record_files(item["research_output"])
+        else:
+            item["files"] = self.download_record_files(item["research_output"])
+            item["pure_files"] = []
+        return item
+
+    def persist_research_output(self, item: dict) -> Optional[dict]:
+        """Store the item as record and update its synchronization state.
+
+        Both are committed together, in bulk mode with the unit of work of the
+        item. The synchronization state is locked first, so a research output
+        synchronized concurrently, e.g. by a user synchronization, gets a new
+        version of the record stored meanwhile, or is skipped if unchanged.
+        """
+        uow = item.get("uow")
+        if uow is None:
+            with UnitOfWork() as uow:
+                item = self.persist_research_output(dict(item, uow=uow))
+                with self.metrics.time("commit"):
+                    uow.commit()
+            return item
+        state = PureSyncState.lock(item["research_output"]["uuid"])
+        if state.fingerprint == item["fingerprint"]:
+            return None
+        recid, checksums = self.create_record(
+            item["record_xml"],
+            item["files"],
+            item["pure_files"],
+            recid=state.recid,
+            uow=uow,
+        )
+        PureSyncState.set(
+            item["research_output"]["uuid"],
+            recid,
+            item["fingerprint"],
+            checksums,
+            commit=False,
+        )
+        item["recid"] = recid
+        self.metrics.increment("pure_sync_records_total")
+        if self.run is not None:
+            self.run.add_records()
+        return item
+
+    def notify_research_output(self, item: dict) -> dict:
+        """Request the deletion of the synchronized files of the item from Pure."""
+        files = list(item["files"])
+        files += [pure_file["fileName"] for pure_file in item["pure_files"]]
+        self.send_pure_delete_requests(item["research_output"], files)
+        return item
 
     def send_pure_delete_requests(
         self, research_output: dict, files: List[str]
     ) -> None:
         """Send delete requests to Pure responsible."""
         for file in files:
-            send_email(
-                research_output["uuid"],
-                basename(file),
-                self.invenio_pure_user_email,
-                self.invenio_pure_user_password,
-                self.pure_responsible_email,
-            )
+            with self.metrics.time("email"):
+                send_email(
+                    research_output["uuid"],
+                    basename(file),
+                    self.invenio_pure_user_email,
+                    self.invenio_pure_user_password,
+                    self.pure_responsible_email,
+                )
+
+    def create_record(
+        self,
+        record_xml: str,
+        file_attachments: Dict[str, str],
+        pure_files: List[dict] = (),
+        recid: str = None,
+        uow: BulkUnitOfWork = None,
+    ) -> Tuple[str, Dict[str, str]]:
+        """Create Invenio record from Marc21XML string.
 
-    def create_record(self, record_xml: str, file_attachments: List[str]) -> None:
-        """Create Invenio record from Marc21XML string."""
+        The *file_attachments* map paths of downloaded files to their checksums,
+        the *pure_files* are file descriptions of Pure which are streamed into
+        the record. If *recid* is given, a new version of that record is created.
+        If a unit of work *uow* is given, the record is stored and indexed when
+        it is committed, otherwise right away.
+        Return the id of the published record and the checksums of its files
+        by file name.
+        """
         identity = Identity(self.pure_user_id)
         identity.provides.add(any_user)
         metadata = Metadata()
         metadata.xml = record_xml
         service = Marc21RecordService()
-        draft = service.create(metadata=metadata, identity=identity)
-        self.attach_files_to_draft(file_attachments, draft)
+        with self.metrics.time("create"):
+            if recid:
+                draft = service.new_version(id_=recid, identity=identity, uow=uow)
+                draft = service.update_draft(
+                    id_=draft.id, identity=identity, metadata=metadata, uow=uow
+                )
+            else:
+                draft = service.create(metadata=metadata, identity=identity, uow=uow)
+        if file_attachments:
+            with self.metrics.time("attach"):
+                self.attach_files_to_draft(file_attachments, draft, uow=uow)
         self.delete_record_files(file_attachments)
-        service.publish(id_=draft.id, identity=identity)
+        checksums = {
+            basename(file_path): checksum
+            for file_path, checksum in file_attachments.items()
+        }
+        checksums.update(self.stream_files_to_draft(pure_files, draft, uow=uow))
+        with self.metrics.time("publish"):
+            record = service.publish(id_=draft.id, identity=identity, uow=uow)
+        return record.id, checksums
+
+    def get_record_files(self, record: dict) -> List[dict]:
+        """Get the Pure file descriptions of the electronic versions of the record."""
+        return [
+            electronic_version["file"]
+            for electronic_version in record.get("electronicVersions", [])
+            if "file" in electronic_version
+        ]
 
     def download_record_files(
         self, record: dict, destination_path: str = "temp"
-    ) -> List:
-        """Download files associated with record into path defined in destination path."""
-        file_paths = []
+    ) -> Dict[str, str]:
+        """Download files associated with record into path defined in destination path.
+
+        The files are spooled to a new directory of the record within the
+        destination path, so no download ever continues a file of another
+        record or of an earlier run. Return a dict mapping the paths of the
+        downloaded files to their checksums. Interrupted downloads are resumed
+        within PURE_DOWNLOAD_MAX_ATTEMPTS attempts, raise RuntimeError if a
+        file could still not be downloaded.
+        """
+        files = {}
+        pure_files = self.get_record_files(record)
+        if not pure_files:
+            return files
         if not isabs(destination_path):
             destination_path = join(dirname(__file__), destination_path)
         Path(destination_path).mkdir(parents=True, exist_ok=True)
-        if "electronicVersions" in record:
-            for electronic_version in record["electronicVersions"]:
-                if "file" in electronic_version:
-                    while True:
-                        file_path = download_pure_file(
-                            electronic_version["file"]["fileURL"],
-                            self.pure_username,
-                            self.pure_password,
-                            destination_path,
-                            electronic_version["file"]["fileName"],
-                        )
-                        if file_path:
-                            break
-                        else:
-                            time.sleep(0.001)
-                    file_paths.append(file_path)
-        return file_paths
-
-    def attach_files_to_draft(self, files: List[str], draft: RecordItem) -> None:
-        """Attach files to given record."""
+        record_path = mkdtemp(
+            prefix=f"{record.get('uuid', 'record')}-", dir=destination_path
+        )
+        config = current_app.config
+        auth = HTTPBasicAuth(self.pure_username, self.pure_password)
+        for pure_file in pure_files:
+            file_path = join(record_path, basename(pure_file["fileName"]))
+            try:
+                with self.metrics.time("download"):
+                    checksum = self.client.download(
+                        pure_file["fileURL"],
+                        file_path,
+                        chunk_size=config.get("PURE_DOWNLOAD_CHUNK_SIZE"),
+                        checksum_algorithm=config.get(
+                            "PURE_DOWNLOAD_CHECKSUM_ALGORITHM"
+                        ),
+                        max_attempts=config.get("PURE_DOWNLOAD_MAX_ATTEMPTS"),
+                        auth=auth,
+                    )
+                if "size" in pure_file and getsize(file_path) != pure_file["size"]:
+                    raise RuntimeError(f"Size mismatch of {file_path}")
+            except (RequestException, RuntimeError) as exc:
+                self.delete_record_files([*files, file_path])
+                raise RuntimeError(
+                    f"Failed to download {pure_file['fileURL']}: {exc}"
+                ) from exc
+            files[file_path] = checksum
+            self.metrics.increment(
+                "pure_sync_downloaded_bytes_total", getsize(file_path)
+            )
+        return files
+
+    def attach_files_to_draft(
+        self, files: List[str], draft: RecordItem, uow: BulkUnitOfWork = None
+    ) -> None:
+        """Attach files to given record.
+
+        The files are committed at once, or with the unit of work *uow*.
+        """
+        if not files:
+            return
         identity = Identity(self.pure_user_id)
         identity.provides.add(any_user)
-        service = Marc21DraftFilesService()
-        if files:
-            draft = service.update_files_options(
-                id_=draft.id, identity=identity, data={"enabled": False}
-            )
+        draft = Marc21DraftFilesService().update_files_options(
+            id_=draft.id, identity=identity, data={"enabled": False}, uow=uow
+        )
         for file in files:
-            filep = open(file, "rb")
-            ObjectVersion.create(
-                str(draft._record.bucket_id), str(basename(file)), stream=filep
-            )
-            filep.close()
+            with open(file, "rb") as filep:
+                ObjectVersion.create(
+                    str(draft._record.bucket_id), str(basename(file)), stream=filep
+                )
+        if uow is None:
             db.session.commit()
 
+    def stream_files_to_draft(
+        self, pure_files: List[dict], draft: RecordItem, uow: BulkUnitOfWork = None
+    ) -> Dict[str, str]:
+        """Stream files from Pure directly into the bucket of given draft.
+
+        The HTTP response body is passed as stream to the file storage, so
+        no file is spooled to local disk. The storage enforces the size of the
+        file given by Pure and removes a file which was not transferred
+        completely. Every file is committed once it is transferred, or with
+        the unit of work *uow*. Return a dict mapping the file names to the
+        checksums computed during the transfer.
+        Raise RuntimeError if a file could not be transferred.
+        """
+        checksums = {}
+        if not pure_files:
+            return checksums
+        identity = Identity(self.pure_user_id)
+        identity.provides.add(any_user)
+        draft = Marc21DraftFilesService().update_files_options(
+            id_=draft.id, identity=identity, data={"enabled": False}, uow=uow
+        )
+        config = current_app.config
+        auth = HTTPBasicAuth(self.pure_username, self.pure_password)
+        for pure_file in pure_files:
+            for attempt in range(config.get("PURE_DOWNLOAD_MAX_ATTEMPTS")):
+                try:
+                    transfer = self.metrics.time("download")
+                    with transfer, db.session.begin_nested(), self.client.open_stream(
+                        pure_file["fileURL"],
+                        checksum_algorithm=config.get(
+                            "PURE_DOWNLOAD_CHECKSUM_ALGORITHM"
+                        ),
+                        auth=auth,
+                    ) as stream:
+                        ObjectVersion.create(
+                            str(draft._record.bucket_id),
+                            pure_file["fileName"],
+                            stream=stream,
+                            size=pure_file.get("size", stream.length),
+                        )
+                except (RequestException, RuntimeError, StorageError) as exc:
+                    current_app.logger.warning(
+                        f"Transfer of {pure_file['fileName']} failed: {exc}"
+                    )
+                    time.sleep(self.client.get_backoff_delay(attempt))
+                    continue
+                if uow is None:
+                    db.session.commit()
+                checksums[pure_file["fileName"]] = stream.checksum
+                self.metrics.increment("pure_sync_downloaded_bytes_total", stream.size)
+                break
+            else:
+                raise RuntimeError(f"Failed to transfer {pure_file['fileURL']}")
+        return checksums
+
     def delete_record_files(self, file_paths: List[str]) -> None:
-        """Delete files with given path."""
+        """Delete files with given path and their spool directories once empty."""
         for file_path in file_paths:
             Path(file_path).unlink(missing_ok=True)
+        for directory in {dirname(file_path) for file_path in file_paths}:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
 
+    @registered_run("scheduled")
     def run_scheduled_synchronization(self) -> None:
         """Run scheduled synchronization.
 
         In this case the invenio datawarehouse already contains entries.
+        Only the research outputs changed in Pure since the last successful
+        synchronization are fetched, converted and stored. The window of
+        dates is recorded with the run, which fails if a research output
+        could not be fetched.
         """
+        today = datetime.date.today()
+        since = self._get_last_synchronization_date()
+        self.run.set_window(since, today)
+        changes = get_research_output_changes(
+            self.pure_api_key, self.pure_api_url, since, client=self.client
+        )
+        uuids = []
+        for uuid, change_type in changes.items():
+            if change_type == "DELETE":
+                current_app.logger.info(f"Research output {uuid} deleted in Pure")
+            else:
+                uuids.append(uuid)
 
-    def run_user_synchronization(self, userid: str) -> None:
-        """Run on-demand synchronization for a user."""
-
-    def _get_missing_synchronization_dates(self, days_span: int = 7) -> List[str]:
-        """Gets the dates, on which Pure changes have not been synchronized."""
-        missing_dates = []
-        sync_dates = self._get_synchronization_history()
-        date_today = datetime.date.today()
-        dates_to_check = get_dates_in_span(
-            date_today, date_today - datetime.timedelta(days_span), -1
-        )
-
-        for date in dates_to_check:
-            if date not in sync_dates:
-                missing_dates.append(date)
-
-        return missing_dates
-
-    def _get_synchronization_history(
-        self, path: str = "../../../data/synchronization_history.txt"
-    ) -> List[str]:
-        """Open the synchronization history file and return an ascending list of dates the synchronization ran on."""
-        path = join(dirname(__file__), path)
-        sync_history = []
-        if isfile(path):
-            with open(path) as fp:
-                lines = fp.readlines()
-                for line in lines:
-                    sync_history.append(
-                        datetime.datetime.strptime(date_string=line, format="%Y-%m-%d")
-                    )
-                sync_history = fp.readlines()
-        return sync_history
+        app = current_app._get_current_object()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(
+                executor.map(partial(self.synchronize_research_output, app), uuids)
+            )
+        if not all(results):
+            self.run.add_records(0, failed=results.count(False))
+            self.run.status = PureSyncRun.FAILED
+
+    def synchronize_research_output(self, app, uuid: str) -> bool:
+        """Synchronize a single research output identified by its uuid.
+
+        Return False if the research output could not be fetched from Pure.
+        """
+        research_output = get_research_output(
+            self.pure_api_key, self.pure_api_url, uuid, client=self.client
+        )
+        if not research_output:
+            with app.app_context():
+                current_app.logger.error(f"Failed to fetch research output {uuid}")
+            return False
+        self.process_research_outputs(app, [research_output])
+        return True
+
+    @registered_run("user", lambda person_uuid: f"person:{person_uuid}")
+    def run_user_synchronization(self, person_uuid: str) -> None:
+        """Run on-demand synchronization of the research outputs of a Pure person.
+
+        Only the research outputs of the person are fetched, the changed ones
+        are stored and indexed right away by the worker threads. The run does
+        not wait for a running initial or scheduled synchronization, but
+        concurrent runs for the same person coalesce.
+        """
+        app = current_app._get_current_object()
+        research_outputs = iter_person_research_outputs(
+            self.pure_api_key, self.pure_api_url, person_uuid, client=self.client
+        )
+        batches = get_batches(research_outputs, 10)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for future in [
+                executor.submit(self.process_research_outputs, app, batch)
+                for batch in batches
+            ]:
+                future.result()
+
+    def _get_last_synchronization_date(self) -> datetime.date:
+        """Get the last date synchronized by a successful scheduled synchronization.
+
+        If there is none, fall back to the start of the configured days span.
+        """
+        last_date = PureSyncRun.get_last_synchronized_date()
+        if last_date:
+            return last_date
+        days_span = current_app.config.get("PURE_SYNCHRONIZATION_DAYS_SPAN")
+        return datetime.date.today() - datetime.timedelta(days_span)
@@ -7,10 +7,15 @@
 
 """Scheduled tasks for celery."""
 
-from celery import shared_task
+from typing import List, Optional
+
+from celery import chord, shared_task
+from celery.result import AsyncResult
 from flask import current_app
 
+from .models import PureSyncLock, PureSyncRun
 from .synchronizer import Synchronizer
+from .synchronizer.runs import SYNCHRONIZATION_LOCK, SynchronizationRun
 
 
 @shared_task
@@ -18,3 +23,163 @@ def synchronize_records():
     """Synchronize records."""
     synchronizer = Synchronizer()
     synchronizer.run_scheduled_synchronization()
+
+
+@shared_task(bind=True, acks_late=True)
+def initial_synchronize_records(self, resume: bool = True, cursor: bool = False):
+    """Run the initial synchronization of records.
+
+    The task is acknowledged late, so it is redelivered if the worker dies
+    and the redelivered task resumes from the last checkpoints, or repeats
+    the run skipping unchanged research outputs with *cursor*, see
+    Synchronizer.run_initial_synchronization. The lock of the dead run is
+    held until its lease expires, so a skipped task is retried once
+    PURE_SYNC_LOCK_LEASE seconds passed.
+    """
+    synchronizer = Synchronizer()
+    if not synchronizer.run_initial_synchronization(resume=resume, cursor=cursor):
+        raise self.retry(countdown=current_app.config.get("PURE_SYNC_LOCK_LEASE"))
+
+
+@shared_task(ignore_result=True)
+def synchronize_person_records(person_uuid: str):
+    """Synchronize the research outputs of a Pure person on demand."""
+    synchronizer = Synchronizer()
+    synchronizer.run_user_synchronization(person_uuid)
+
+
+def request_person_synchronization(person_uuid: str) -> AsyncResult:
+    """Enqueue the synchronization of a Pure person with high priority.
+
+    The task is sent to the PURE_USER_SYNCHRONIZATION_QUEUE, which is not
+    shared with the tasks of the initial and scheduled synchronizations.
+    """
+    return synchronize_person_records.apply_async(
+        args=(person_uuid,),
+        queue=current_app.config.get("PURE_USER_SYNCHRONIZATION_QUEUE"),
+        priority=9,
+    )
+
+
+@shared_task(bind=True, acks_late=True)
+def synchronize_research_output_chunk(
+    self, size: int, offset: int, run_id: int = None
+) -> bool:
+    """Synchronize a chunk of the distributed initial synchronization.
+
+    The chunk is retried on its own if its research outputs could not be
+    fetched from Pure or some of them failed to synchronize, up to
+    PURE_SYNCHRONIZER_CHUNK_MAX_RETRIES times.
+    While it runs, it renews the lock of the run with given id.
+    Return whether the chunk was synchronized, False if it raised an
+    exception, so the other chunks are still finalized.
+    """
+    try:
+        synchronizer = Synchronizer()
+        if run_id is None:
+            synchronized = synchronizer.synchronize_research_output_chunk(size, offset)
+        else:
+            with SynchronizationRun(run_id, owner=False) as synchronizer.run:
+                synchronized = synchronizer.synchronize_research_output_chunk(
+                    size, offset
+                )
+    except Exception:
+        current_app.logger.exception(
+            f"Failed to synchronize chunk (size: {size}, offset: {offset})"
+        )
+        return False
+    if synchronized:
+        return True
+    config = current_app.config
+    max_retries = config.get("PURE_SYNCHRONIZER_CHUNK_MAX_RETRIES")
+    if self.request.retries < max_retries:
+        raise self.retry(
+            countdown=config.get("PURE_REQUEST_BACKOFF_MAX"), max_retries=max_retries
+        )
+    return False
+
+
+@shared_task
+def finalize_initial_synchronization(results: List[bool], run_id: int = None) -> None:
+    """Report the outcome of the distributed initial synchronization.
+
+    Finish the run with given id and release its lock.
+    """
+    failed = results.count(False)
+    if run_id is not None:
+        status = PureSyncRun.FAILED if failed else PureSyncRun.DONE
+        SynchronizationRun(run_id).finish(status)
+    if failed:
+        current_app.logger.error(
+            f"Initial synchronization finished, {failed} of {len(results)} chunks "
+            "failed, resume it to synchronize them"
+        )
+    else:
+        current_app.logger.info(
+            f"Initial synchronization of {len(results)} chunks finished"
+        )
+
+
+@shared_task
+def fail_initial_synchronization(request, exc, traceback, run_id: int = None) -> None:
+    """Finish the distributed initial synchronization as failed.
+
+    Error callback of finalize_initial_synchronization, which is not called
+    if the chord of the chunk tasks failed.
+    """
+    current_app.logger.error(f"Initial synchronization failed: {exc}")
+    if run_id is not None:
+        SynchronizationRun(run_id).finish(PureSyncRun.FAILED)
+
+
+@shared_task(ignore_result=True)
+def renew_synchronization_lock(run_id: int, lock: str = SYNCHRONIZATION_LOCK) -> None:
+    """Renew the lock of the run with given id while the run is running.
+
+    The task enqueues itself again after a third of PURE_SYNC_LOCK_LEASE
+    seconds, so the lease of a distributed synchronization does not expire
+    while its chunk tasks wait in the queue, until the run is finished.
+    """
+    run = PureSyncRun.get(run_id)
+    if run is None or run.status != PureSyncRun.RUNNING:
+        return
+    lease = current_app.config.get("PURE_SYNC_LOCK_LEASE")
+    if not PureSyncLock.renew(lock, run_id, lease):
+        current_app.logger.error(f"Synchronization run {run_id} lost its lock")
+        return
+    renew_synchronization_lock.apply_async((run_id, lock), countdown=lease / 3)
+
+
+def distribute_initial_synchronization(
+    granularity: int = 100, resume: bool = False, wait: float = 0
+) -> Optional[AsyncResult]:
+    """Enqueue a task per chunk of *granularity* research outputs.
+
+    Unlike initial_synchronize_records, the chunks are spread across all
+    celery workers. The chunk tasks take part in one registered run, which
+    finalize_initial_synchronization finishes once every chunk task finished,
+    or fail_initial_synchronization if the chord failed. Until then, the
+    lock of the run is renewed by renew_synchronization_lock.
+    Return the result of the finalizing task, None if the synchronization
+    was skipped because another one is running, see SynchronizationRun.start.
+    """
+    run = SynchronizationRun.start("distributed", wait)
+    if run is None:
+        return None
+    try:
+        synchronizer = Synchronizer()
+        chunks = synchronizer.get_initial_synchronization_chunks(granularity, resume)
+    except Exception:
+        run.finish(PureSyncRun.FAILED)
+        raise
+    header = [
+        synchronize_research_output_chunk.si(size, offset, run.run_id)
+        for size, offset in chunks
+    ]
+    callback = finalize_initial_synchronization.s(run.run_id)
+    callback.link_error(fail_initial_synchronization.s(run_id=run.run_id))
+    result = chord(header)(callback)
+    renew_synchronization_lock.apply_async(
+        (run.run_id, run.lock), countdown=run.lease / 3
+    )
+    return result
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Synthetic Pure data and benchmarks for tests and performance evaluation."""
+
+from .benchmark import compare_to_baseline, run_benchmark
+from .corpus import CorpusGenerator, generate_corpus
+from .server import FakePureServer
+
+__all__ = (
+    "CorpusGenerator",
+    "FakePureServer",
+    "compare_to_baseline",
+    "generate_corpus",
+    "run_benchmark",
+)
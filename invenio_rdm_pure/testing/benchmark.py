@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Module to benchmark the conversion of Pure research outputs."""
+
+import json
+import platform
+import tracemalloc
+from itertools import islice
+from time import perf_counter
+from typing import Callable, List
+
+from ..converter import Converter
+from ..converter.marc21_record import get_validator
+from .corpus import generate_corpus
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+STAGES = ("convert", "serialize", "validate")
+"""Measured stages: Pure JSON to Marc21Record, to XML string, schema validation."""
+
+
+def get_percentile(values: List[float], percentile: float) -> float:
+    """Get the percentile of sorted values, by the nearest rank."""
+    index = round(percentile / 100 * (len(values) - 1))
+    return values[min(max(index, 0), len(values) - 1)]
+
+
+def get_peak_memory(function: Callable, *args) -> int:
+    """Get the peak memory in bytes allocated by a function call."""
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def get_max_rss() -> int:
+    """Get the maximum resident set size of the process in KiB, 0 if unknown."""
+    if resource is None:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_benchmark(size: int = 1000, seed: int = 0, memory_sample: int = 100) -> dict:
+    """Benchmark the conversion stages on a generated corpus of *size* records.
+
+    Per stage, measure the records per second and the p50 and p99 latency in
+    milliseconds. The peak memory in KiB per record is measured with
+    tracemalloc in a separate pass over the first *memory_sample* records,
+    as tracing distorts the timing. Tracemalloc only sees the allocations of
+    Python objects, the memory used by libxml2, e.g. while validating, shows
+    in the maximum resident set size of the process instead.
+    """
+    converter = Converter()
+    validator = get_validator()
+    validator.schema  # Compile the schema outside of the measurement
+    timings = {stage: [] for stage in STAGES}
+    for research_output in generate_corpus(size, seed):
+        start = perf_counter()
+        record = converter.convert_pure_json_to_marc21_record(research_output)
+        converted = perf_counter()
+        record.to_xml_string()
+        serialized = perf_counter()
+        tree = record.to_etree()
+        validation_start = perf_counter()
+        validator.validate(tree)
+        validated = perf_counter()
+        timings["convert"].append(converted - start)
+        timings["serialize"].append(serialized - converted)
+        timings["validate"].append(validated - validation_start)
+
+    peaks = {stage: 0 for stage in STAGES}
+    for research_output in islice(generate_corpus(size, seed), memory_sample):
+        record = converter.convert_pure_json_to_marc21_record(research_output)
+        tree = record.to_etree()
+        for stage, function, args in (
+            (
+                "convert",
+                converter.convert_pure_json_to_marc21_record,
+                (research_output,),
+            ),
+            ("serialize", record.to_xml_string, ()),
+            ("validate", validator.validate, (tree,)),
+        ):
+            peaks[stage] = max(peaks[stage], get_peak_memory(function, *args))
+
+    stages = {}
+    for stage, stage_timings in timings.items():
+        stage_timings.sort()
+        stages[stage] = {
+            "records_per_second": len(stage_timings) / (sum(stage_timings) or 1e-9),
+            "p50_ms": get_percentile(stage_timings, 50) * 1000,
+            "p99_ms": get_percentile(stage_timings, 99) * 1000,
+            "peak_memory_kib": peaks[stage] / 1024,
+        }
+    return {
+        "size": size,
+        "seed": seed,
+        "python": platform.python_version(),
+        "max_rss_kib": get_max_rss(),
+        "stages": stages,
+    }
+
+
+def compare_to_baseline(
+    results: dict, baseline: dict, tolerance: float = 0.2
+) -> List[str]:
+    """Compare benchmark results to a baseline, return the regressions.
+
+    A stage regresses if its throughput drops, or its latency or peak memory
+    grows, by more than *tolerance* relative to the baseline.
+    """
+    regressions = []
+    for stage, base in baseline["stages"].items():
+        current = results["stages"].get(stage)
+        if current is None:
+            continue
+        if current["records_per_second"] < base["records_per_second"] * (1 - tolerance):
+            regressions.append(
+                f"{stage}: {current['records_per_second']:.0f} records/s, "
+                f"baseline {base['records_per_second']:.0f} records/s"
+            )
+        for metric in ("p50_ms", "p99_ms", "peak_memory_kib"):
+            if current[metric] > base[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{stage}: {metric} {current[metric]:.2f}, "
+                    f"baseline {base[metric]:.2f}"
+                )
+    return regressions
+
+
+def format_results(results: dict) -> str:
+    """Format benchmark results as table."""
+    lines = [
+        f"{results['size']} records (seed {results['seed']}, "
+        f"Python {results['python']}, max RSS {results['max_rss_kib']} KiB)",
+        f"{'stage':<10}{'records/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'peak KiB':>10}",
+    ]
+    for stage, result in results["stages"].items():
+        lines.append(
+            f"{stage:<10}{result['records_per_second']:>12.0f}"
+            f"{result['p50_ms']:>10.3f}{result['p99_ms']:>10.3f}"
+            f"{result['peak_memory_kib']:>10.0f}"
+        )
+    return "\n".join(lines)
+
+
+def load_results(path: str) -> dict:
+    """Load benchmark results, e.g. a baseline, from a JSON file."""
+    with open(path, encoding="utf-8") as fp:
+        return json.load(fp)
+
+
+def save_results(results: dict, path: str) -> None:
+    """Save benchmark results to a JSON file."""
+    with open(path, "w", encoding="utf-8") as fp:
+        json.dump(results, fp, indent=2)
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Module to generate synthetic corpora of Pure research outputs."""
+
+import random
+from typing import Iterator, List
+from uuid import NAMESPACE_URL, uuid5
+
+from faker import Faker
+
+LOCALES = ("en_GB", "de_DE")
+"""Locales of the localized texts of generated research outputs."""
+
+LANGUAGES = ("English", "German", "French", "Italian", "Spanish")
+"""Languages of generated research outputs, mostly English."""
+
+LANGUAGE_WEIGHTS = (70, 20, 4, 3, 3)
+"""Relative frequencies of the LANGUAGES."""
+
+PUBLICATION_STATUSES = ("Published", "E-pub ahead of print", "Accepted/In press")
+"""Publication statuses of generated research outputs."""
+
+
+class CorpusGenerator(object):
+    """Generator of realistic Pure research outputs for tests and benchmarks.
+
+    The distributions follow the research outputs of a university: most
+    records have a few organisational units, some have dozens, abstracts are
+    long and often bilingual, and about half of the records have files.
+    Corpora are reproducible, the same seed and index generate the same
+    research output, so records can be generated in any order.
+    """
+
+    def __init__(self, seed: int = 0, base_url: str = "https://pure.example.org"):
+        """Default constructor of the class."""
+        self.seed = seed
+        self.random = random.Random(seed)
+        self.faker = Faker()
+        self.faker.seed_instance(seed)
+        self.base_url = base_url
+        self.units = [self._organisational_unit() for _ in range(200)]
+
+    def generate(self, size: int, start: int = 0) -> Iterator[dict]:
+        """Generate the research outputs with index *start* to *start* + *size*."""
+        for index in range(start, start + size):
+            yield self.research_output(index)
+
+    def get_uuid(self, index: int) -> str:
+        """Get the uuid of the research output with given index."""
+        return str(uuid5(NAMESPACE_URL, f"pure-corpus:{self.seed}:{index}"))
+
+    def get_person_uuid(self, index: int) -> str:
+        """Get the uuid of the person with given index."""
+        return str(uuid5(NAMESPACE_URL, f"pure-person:{self.seed}:{index}"))
+
+    def research_output(self, index: int) -> dict:
+        """Generate the research output with given index."""
+        rng, faker = self.random, self.faker
+        rng.seed(f"{self.seed}:{index}")
+        faker.seed_instance(f"{self.seed}:{index}")
+        uuid = self.get_uuid(index)
+        units = rng.sample(self.units, min(int(rng.paretovariate(0.9)) + 1, 60))
+        research_output = {
+            "pureId": rng.randrange(10**8),
+            "uuid": uuid,
+            "title": {"formatted": False, "value": faker.sentence(nb_words=10)},
+            "abstract": self._text(
+                lambda: "\n\n".join(faker.paragraphs(nb=rng.randint(2, 12)))
+            ),
+            "peerReview": rng.random() < 0.6,
+            "managingOrganisationalUnit": units[0],
+            "organisationalUnits": units,
+            "language": self._term(
+                rng.choices(LANGUAGES, weights=LANGUAGE_WEIGHTS)[0], "en_GB"
+            ),
+            "publicationStatuses": [
+                {
+                    "pureId": rng.randrange(10**8),
+                    "current": True,
+                    "publicationDate": {"year": rng.randint(1990, 2021)},
+                    "publicationStatus": self._term(rng.choice(PUBLICATION_STATUSES)),
+                }
+            ],
+            "keywordGroups": self._keyword_groups(),
+            "electronicVersions": self._electronic_versions(uuid),
+            "totalScopusCitations": rng.randrange(200),
+        }
+        if rng.random() < 0.3:
+            research_output["subTitle"] = {
+                "formatted": False,
+                "value": faker.sentence(nb_words=6),
+            }
+        if rng.random() < 0.5:
+            research_output["publisher"] = {
+                "uuid": faker.uuid4(),
+                "name": {"formatted": False, "text": [{"value": faker.company()}]},
+            }
+            research_output["placeOfPublication"] = faker.city()
+        if rng.random() < 0.4:
+            research_output["isbns"] = [faker.isbn13()]
+            research_output["electronicIsbns"] = [faker.isbn13()]
+            research_output["edition"] = f"{rng.randint(1, 5)}. edition"
+            research_output["numberOfPages"] = rng.randint(50, 800)
+        else:
+            research_output["journalAssociation"] = {
+                "pureId": rng.randrange(10**8),
+                "title": {"value": faker.catch_phrase()},
+            }
+            research_output["volume"] = str(rng.randint(1, 120))
+            research_output["journalNumber"] = str(rng.randint(1, 12))
+            start = rng.randint(1, 500)
+            research_output["pages"] = f"{start}-{start + rng.randint(5, 40)}"
+        if rng.random() < 0.2:
+            research_output["event"] = {
+                "uuid": faker.uuid4(),
+                "name": self._text(lambda: f"{faker.catch_phrase()} Conference"),
+            }
+        if rng.random() < 0.3:
+            research_output["relatedProjects"] = [
+                {"uuid": faker.uuid4(), "name": self._text(faker.catch_phrase)}
+                for _ in range(rng.randint(1, 4))
+            ]
+        if rng.random() < 0.3:
+            research_output["additionalLinks"] = [
+                {"pureId": rng.randrange(10**8), "url": faker.url()}
+                for _ in range(rng.randint(1, 3))
+            ]
+        if rng.random() < 0.2:
+            research_output["bibliographicalNote"] = self._text(faker.paragraph)
+        if rng.random() < 0.1:
+            research_output["publicationSeries"] = [
+                {"pureId": rng.randrange(10**8), "name": faker.catch_phrase()}
+            ]
+        return research_output
+
+    def _text(self, generate) -> dict:
+        """Generate a localized text, bilingual for four of five records."""
+        locales = LOCALES if self.random.random() < 0.8 else LOCALES[:1]
+        return {
+            "formatted": False,
+            "text": [{"locale": locale, "value": generate()} for locale in locales],
+        }
+
+    def _term(self, value: str, locale: str = None) -> dict:
+        """Generate a classification term with given value."""
+        return {
+            "pureId": self.random.randrange(10**8),
+            "uri": f"/dk/atira/pure/{value.lower().replace(' ', '_')}",
+            "term": {
+                "formatted": False,
+                "text": [{"locale": locale or LOCALES[0], "value": value}],
+            },
+        }
+
+    def _organisational_unit(self) -> dict:
+        """Generate an organisational unit with a German and English name."""
+        name = f"Institute of {self.faker.bs().title()}"
+        return {
+            "uuid": self.faker.uuid4(),
+            "externallyManaged": False,
+            "name": {
+                "formatted": False,
+                "text": [
+                    {"locale": "en_GB", "value": name},
+                    {"locale": "de_DE", "value": f"Institut für {name[13:]}"},
+                ],
+            },
+            "type": self._term("Institute"),
+        }
+
+    def _keyword_groups(self) -> List[dict]:
+        """Generate keyword groups with free and structured keywords."""
+        rng, faker = self.random, self.faker
+        containers = [
+            {
+                "pureId": rng.randrange(10**8),
+                "freeKeywords": [
+                    {
+                        "pureId": rng.randrange(10**8),
+                        "locale": locale,
+                        "freeKeywords": faker.words(nb=rng.randint(3, 12)),
+                    }
+                    for locale in LOCALES[: rng.randint(1, 2)]
+                ],
+            }
+        ]
+        for _ in range(rng.randint(0, 3)):
+            containers.append(
+                {
+                    "pureId": rng.randrange(10**8),
+                    "structuredKeyword": {
+                        "term": self._text(lambda: faker.word().title())
+                    },
+                }
+            )
+        return [{"pureId": rng.randrange(10**8), "keywordContainers": containers}]
+
+    def _electronic_versions(self, uuid: str) -> List[dict]:
+        """Generate the electronic versions with files, for about half the records."""
+        rng = self.random
+        versions = []
+        for number in range(rng.choices((0, 1, 2, 3), weights=(50, 35, 10, 5))[0]):
+            file_name = f"{self.faker.slug()}-{number}.pdf"
+            versions.append(
+                {
+                    "pureId": rng.randrange(10**8),
+                    "file": {
+                        "fileName": file_name,
+                        "mimeType": "application/pdf",
+                        "size": rng.randint(10**4, 10**7),
+                        "fileURL": f"{self.base_url}/ws/files/{uuid}/{file_name}",
+                    },
+                }
+            )
+        return versions
+
+
+def generate_corpus(size: int, seed: int = 0) -> Iterator[dict]:
+    """Generate a reproducible corpus of *size* research outputs lazily."""
+    return CorpusGenerator(seed).generate(size)
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Fake Pure REST API to load test the synchronization without Pure."""
+
+import json
+import random
+import re
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from .corpus import CorpusGenerator
+
+API_PATH = "/ws/api/"
+"""Path of the fake Pure REST API, the PURE_API_URL is the server URL plus it."""
+
+FILES_PATH = "/ws/files/"
+"""Path of the files of the research outputs."""
+
+
+class FakePureServer(object):
+    """Fake Pure REST API serving a generated corpus of research outputs.
+
+    Serves the research-outputs endpoint with count, paging and
+    navigationLinks, single research outputs by uuid, the research outputs of
+    persons, the changes endpoint and the files of the electronic versions
+    with Range and If-Range requests.
+    The *latency* in seconds delays every response, fractions of the requests
+    fail with 500 (*error_rate*), are throttled with 429 and Retry-After
+    (*throttle_rate*) or, for files, are cut off mid-transfer
+    (*truncate_rate*). Files are at most *max_file_size* bytes large.
+    """
+
+    def __init__(
+        self,
+        size: int = 1000,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        truncate_rate: float = 0.0,
+        retry_after: int = 1,
+        changes: int = 10,
+        persons: int = 10,
+        max_file_size: int = 64 * 1024,
+        api_key: str = None,
+    ):
+        """Default constructor of the class.
+
+        The first *changes* research outputs are reported as updated by the
+        changes endpoint. The research outputs are assigned in turn to
+        *persons* persons. If *api_key* is set, API requests must send it.
+        """
+        self.size = size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.truncate_rate = truncate_rate
+        self.retry_after = retry_after
+        self.changes = min(changes, size)
+        self.max_file_size = max_file_size
+        self.api_key = api_key
+        self.stats = Counter()
+        self.random = random.Random(seed)
+        self.lock = Lock()
+        self.httpd = ThreadingHTTPServer((host, port), _FakePureHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+        self.url = f"http://{host}:{self.httpd.server_port}"
+        self.corpus = CorpusGenerator(seed, base_url=self.url)
+        self.uuids = {self.corpus.get_uuid(index): index for index in range(size)}
+        self.persons = {
+            self.corpus.get_person_uuid(index): index for index in range(persons)
+        }
+        self.thread = None
+
+    @property
+    def api_url(self) -> str:
+        """Get the URL of the API, to be used as PURE_API_URL."""
+        return self.url + API_PATH
+
+    def start(self) -> "FakePureServer":
+        """Serve requests in a background thread."""
+        self.thread = Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve requests until interrupted."""
+        self.httpd.serve_forever()
+
+    def stop(self) -> None:
+        """Stop serving requests."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FakePureServer":
+        """Start the server."""
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        """Stop the server."""
+        self.stop()
+
+    def get_research_output(self, index: int) -> dict:
+        """Get the research output with given index and its files resized."""
+        with self.lock:
+            research_output = self.corpus.research_output(index)
+        for electronic_version in research_output["electronicVersions"]:
+            pure_file = electronic_version["file"]
+            pure_file["size"] = min(pure_file["size"], self.max_file_size)
+        return research_output
+
+    def get_person_research_outputs(self, person_uuid: str) -> Optional[range]:
+        """Get the indexes of the research outputs of a person, None if unknown."""
+        index = self.persons.get(person_uuid)
+        if index is None:
+            return None
+        return range(index, self.size, len(self.persons))
+
+    def get_file(self, uuid: str, file_name: str) -> Optional[bytes]:
+        """Get the content of a file of a research output, None if unknown."""
+        index = self.uuids.get(uuid)
+        if index is None:
+            return None
+        research_output = self.get_research_output(index)
+        for electronic_version in research_output["electronicVersions"]:
+            pure_file = electronic_version["file"]
+            if pure_file["fileName"] == file_name:
+                size = pure_file["size"]
+                pattern = f"%PDF-1.4 {uuid} {file_name}\n".encode()
+                return (pattern * (size // len(pattern) + 1))[:size]
+        return None
+
+    def get_fault(self) -> Optional[str]:
+        """Draw whether a request fails, is throttled, truncated or succeeds."""
+        with self.lock:
+            draw = self.random.random()
+        if draw < self.error_rate:
+            return "error"
+        draw -= self.error_rate
+        if draw < self.throttle_rate:
+            return "throttle"
+        draw -= self.throttle_rate
+        if draw < self.truncate_rate:
+            return "truncate"
+        return None
+
+    def count(self, key: str) -> None:
+        """Count a request in the stats."""
+        with self.lock:
+            self.stats[key] += 1
+
+
+class _FakePureHandler(BaseHTTPRequestHandler):
+    """Request handler of the FakePureServer."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        """Handle a GET request."""
+        fake = self.server.fake
+        fake.count("requests")
+        if fake.latency:
+            time.sleep(fake.latency)
+        url = urlparse(self.path)
+        fault = fake.get_fault()
+        if fault == "error":
+            fake.count("errors")
+            return self.send_json(500, {"title": "Internal Server Error"})
+        if fault == "throttle":
+            fake.count("throttled")
+            return self.send_json(
+                429,
+                {"title": "Too Many Requests"},
+                {"Retry-After": str(fake.retry_after)},
+            )
+        if url.path.startswith(FILES_PATH):
+            return self.send_file(url.path[len(FILES_PATH) :], fault == "truncate")
+        if not url.path.startswith(API_PATH):
+            return self.send_json(404, {"title": "Not Found"})
+        if fake.api_key and self.headers.get("api-key") != fake.api_key:
+            return self.send_json(401, {"title": "Unauthorized"})
+        endpoint = url.path[len(API_PATH) :].strip("/")
+        query = parse_qs(url.query)
+        if endpoint == "research-outputs":
+            return self.send_research_outputs(query, endpoint, range(fake.size))
+        match = re.fullmatch(r"research-outputs/([^/]+)", endpoint)
+        if match:
+            index = fake.uuids.get(match.group(1))
+            if index is None:
+                return self.send_json(404, {"title": "Not Found"})
+            return self.send_json(200, fake.get_research_output(index))
+        match = re.fullmatch(r"persons/([^/]+)/research-outputs", endpoint)
+        if match:
+            indexes = fake.get_person_research_outputs(match.group(1))
+            if indexes is None:
+                return self.send_json(404, {"title": "Not Found"})
+            return self.send_research_outputs(query, endpoint, indexes)
+        match = re.fullmatch(r"changes/([^/]+)", endpoint)
+        if match:
+            return self.send_changes(match.group(1))
+        return self.send_json(404, {"title": "Not Found"})
+
+    def send_research_outputs(self, query: dict, endpoint: str, indexes: range) -> None:
+        """Send a page of the research outputs with given indexes and navigation links."""
+        fake = self.server.fake
+        size = int(query.get("size", ["10"])[0])
+        offset = int(query.get("offset", ["0"])[0])
+        end = min(offset + size, len(indexes))
+        links = []
+        if end < len(indexes):
+            links.append(self.get_page_link(endpoint, "next", size, end))
+        if offset > 0:
+            links.append(
+                self.get_page_link(endpoint, "prev", size, max(offset - size, 0))
+            )
+        fake.count("research-outputs")
+        self.send_json(
+            200,
+            {
+                "count": len(indexes),
+                "pageInformation": {"offset": offset, "size": size},
+                "items": [fake.get_research_output(i) for i in indexes[offset:end]],
+                "navigationLinks": links,
+            },
+        )
+
+    def get_page_link(self, endpoint: str, ref: str, size: int, offset: int) -> dict:
+        """Get a navigation link to the page of *endpoint* with given size and offset."""
+        href = f"{self.server.fake.api_url}{endpoint}?size={size}&offset={offset}"
+        return {"ref": ref, "href": href}
+
+    def send_changes(self, token: str) -> None:
+        """Send the changes of the first research outputs in pages of 100."""
+        fake = self.server.fake
+        start = int(token[5:]) if token.startswith("page-") else 0
+        end = min(start + 100, fake.changes)
+        items = [
+            {
+                "uuid": fake.corpus.get_uuid(index),
+                "changeType": "UPDATE",
+                "familySystemName": "ResearchOutput",
+                "version": 1,
+            }
+            for index in range(start, end)
+        ]
+        self.send_json(
+            200,
+            {
+                "count": len(items),
+                "resumptionToken": f"page-{end}",
+                "moreChanges": end < fake.changes,
+                "items": items,
+            },
+        )
+
+    def send_file(self, path: str, truncate: bool) -> None:
+        """Send a file or the requested range of it."""
+        fake = self.server.fake
+        uuid, _, file_name = path.partition("/")
+        content = fake.get_file(uuid, file_name)
+        if content is None:
+            return self.send_json(404, {"title": "Not Found"})
+        fake.count("files")
+        etag = f'"{uuid}/{file_name}/{len(content)}"'
+        status, headers = 200, {"ETag": etag}
+        byte_range = self.get_range(len(content))
+        if self.headers.get("If-Range", etag) != etag:
+            byte_range = None
+        if byte_range and byte_range[0] >= len(content):
+            return self.send_body(
+                416, b"", {"Content-Range": f"bytes */{len(content)}"}
+            )
+        if byte_range:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(content)}"
+            status, content = 206, content[start : end + 1]
+        headers["Content-Type"] = "application/pdf"
+        if truncate and len(content) > 1:
+            fake.count("truncated")
+            headers["Connection"] = "close"
+            self.send_body(status, content[: len(content) // 2], headers, len(content))
+            self.close_connection = True
+            return
+        self.send_body(status, content, headers)
+
+    def get_range(self, length: int) -> Optional[Tuple[int, int]]:
+        """Get the inclusive (start, end) of a Range request, None without one."""
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", self.headers.get("Range", ""))
+        if not match:
+            return None
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else length - 1
+        return start, min(end, length - 1)
+
+    def send_json(self, status: int, data: dict, headers: dict = None) -> None:
+        """Send a JSON response."""
+        headers = dict(headers or {}, **{"Content-Type": "application/json"})
+        self.send_body(status, json.dumps(data).encode("utf-8"), headers)
+
+    def send_body(
+        self, status: int, body: bytes, headers: dict, length: int = None
+    ) -> None:
+        """Send a response, announcing *length* bytes if given."""
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body) if length is None else length))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Silence request logging."""
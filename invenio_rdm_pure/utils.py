@@ -7,11 +7,14 @@
 
 """Utility methods."""
 
+import hashlib
+import json
 import smtplib
 from datetime import datetime
+from itertools import islice
 from os.path import dirname, isabs, isfile, join
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List
 
 from flask import current_app
 from flask_security.utils import hash_password
@@ -89,6 +92,30 @@ def get_dates_in_span(
     return dates
 
 
+def get_batches(iterable: Iterable, size: int) -> Iterator[list]:
+    """Yield lists of given size from the iterable, the last one may be shorter."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def get_fingerprint(data: dict, excluded_fields: Iterable[str] = ()) -> str:
+    """Get the SHA-256 fingerprint of the normalized JSON of given dict.
+
+    Top-level fields listed in *excluded_fields* do not affect the fingerprint.
+    """
+    normalized = json.dumps(
+        {key: value for key, value in data.items() if key not in excluded_fields},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
 def send_email(
     uuid: str,
     file_name: str,
@@ -9,9 +9,10 @@
 
 from os.path import abspath, dirname, isfile, join
 
-from flask import Blueprint
+from flask import Blueprint, Response, abort, current_app
 from flask_babelex import gettext as _
 
+from .metrics import collect_metrics, render_metrics
 from .pure.import_records import create_pure_import_file
 
 blueprint = Blueprint(
@@ -31,3 +32,13 @@ def pure_import():
         # Run pure_import task to create the XML file
         create_pure_import_file(pure_import_file)
     return open(pure_import_file, "r").read()
+
+
+@blueprint.route("/pure/metrics")
+def metrics():
+    """Expose the synchronization metrics in the Prometheus text format."""
+    if not current_app.config.get("PURE_METRICS_ENABLED"):
+        abort(404)
+    return Response(
+        render_metrics(collect_metrics()), mimetype="text/plain; version=0.0.4"
+    )
@@ -45,6 +45,7 @@ setup_requires = [
 ]
 
 install_requires = [
+    "aiohttp>=3.7.4",
     "docopt>=0.6.2",
     "Flask-BabelEx>=0.9.4",
     "invenio-access>=1.4.2",
@@ -97,6 +98,8 @@ setup(
             "invenio_rdm_pure = invenio_rdm_pure.config",
         ],
         "invenio_celery.tasks": ["invenio_rdm_pure = invenio_rdm_pure.tasks"],
+        "invenio_db.models": ["invenio_rdm_pure = invenio_rdm_pure.models"],
+        "invenio_db.alembic": ["invenio_rdm_pure = invenio_rdm_pure:alembic"],
         # TODO: Edit these entry points to fit your needs.
         # 'invenio_access.actions': [],
         # 'invenio_admin.actions': [],
@@ -104,7 +107,6 @@ setup(
         # 'invenio_base.api_apps': [],
         # 'invenio_base.api_blueprints': [],
         # 'invenio_base.blueprints': [],
-        # 'invenio_db.models': [],
         # 'invenio_pidstore.minters': [],
         # 'invenio_records.jsonresolver': [],
     },
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Corpus generator and benchmark tests."""
+
+from invenio_rdm_pure.converter import Converter
+from invenio_rdm_pure.testing import compare_to_baseline, generate_corpus, run_benchmark
+
+
+def test_corpus():
+    """Test that generated corpora are reproducible and convert to valid Marc21XML."""
+    corpus = list(generate_corpus(50, seed=1))
+    assert corpus == list(generate_corpus(50, seed=1))
+    assert corpus != list(generate_corpus(50, seed=2))
+    assert len({research_output["uuid"] for research_output in corpus}) == 50
+    for _, result in Converter().convert_many(corpus):
+        assert isinstance(result, str)
+
+
+def test_benchmark():
+    """Test the benchmark results and their comparison to a baseline."""
+    results = run_benchmark(size=20, memory_sample=2)
+    assert set(results["stages"]) == {"convert", "serialize", "validate"}
+    for result in results["stages"].values():
+        assert result["records_per_second"] > 0
+        assert 0 < result["p50_ms"] <= result["p99_ms"]
+    assert results["stages"]["convert"]["peak_memory_kib"] > 0
+    assert results["max_rss_kib"] > 0
+    assert compare_to_baseline(results, results) == []
+
+    slower = {
+        "stages": {
+            "convert": dict(
+                results["stages"]["convert"],
+                records_per_second=results["stages"]["convert"]["records_per_second"]
+                / 2,
+                p99_ms=results["stages"]["convert"]["p99_ms"] * 2,
+            )
+        }
+    }
+    assert len(compare_to_baseline(slower, results)) == 2
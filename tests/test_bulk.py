@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Bulk mode tests."""
+
+from contextlib import nullcontext
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from invenio_rdm_pure.metrics import NullMetrics
+from invenio_rdm_pure.synchronizer import synchronizer as synchronizer_module
+from invenio_rdm_pure.synchronizer.bulk import DeferredIndexer
+from invenio_rdm_pure.synchronizer.synchronizer import Synchronizer
+
+
+class FakeIndexer(object):
+    """Indexer recording the bulk operations."""
+
+    def __init__(self, record_cls):
+        """Default constructor of the class."""
+        self.record_cls = record_cls
+        self.queue = []
+        self.processed = []
+
+    def bulk_index(self, record_ids):
+        """Queue records for indexing."""
+        self.queue += [("index", record_id) for record_id in record_ids]
+
+    def bulk_delete(self, record_ids):
+        """Queue records for deletion."""
+        self.queue += [("delete", record_id) for record_id in record_ids]
+
+    def process_bulk_queue(self):
+        """Process the queued operations."""
+        self.processed.append(self.queue)
+        self.queue = []
+
+
+def test_deferred_indexer():
+    """Test that only the last operation per record is applied in batches."""
+    records, drafts = FakeIndexer("record"), FakeIndexer("draft")
+    deferred_indexer = DeferredIndexer(batch_size=2)
+    for number in range(3):
+        record = SimpleNamespace(id=f"record-{number}")
+        draft = SimpleNamespace(id=f"draft-{number}")
+        deferred_indexer.add(drafts, draft, "index")
+        deferred_indexer.add(records, record, "index")
+        deferred_indexer.add(records, record, "index")
+        deferred_indexer.add(FakeIndexer("draft"), draft, "delete")
+    deferred_indexer.add(drafts, SimpleNamespace(id="draft-old"), "delete")
+    assert len(deferred_indexer) == 4
+
+    deferred_indexer.reindex()
+    assert records.processed == [
+        [("index", "record-0"), ("index", "record-1")],
+        [("index", "record-2")],
+    ]
+    assert drafts.processed == [[("delete", "draft-old")]]
+    assert len(deferred_indexer) == 0
+
+
+def test_bulk_batches_are_indexed_before_notification(create_app, monkeypatch):
+    """Test that files are transferred outside and records indexed after a batch."""
+    events = []
+
+    class FakeUnitOfWork(object):
+        def __init__(self, indexer):
+            self.indexer = indexer
+
+        def __enter__(self):
+            events.append("begin")
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def savepoint(self):
+            return nullcontext()
+
+        def commit(self):
+            events.append("commit")
+
+    def step(name):
+        def run_step(item):
+            if name == "persist" and item["uuid"] == "b":
+                raise RuntimeError("Failed to store b")
+            events.append(f"{name} {item['uuid']}")
+            return dict(item, files={})
+
+        return run_step
+
+    monkeypatch.setattr(synchronizer_module, "BulkUnitOfWork", FakeUnitOfWork)
+    synchronizer = Synchronizer.__new__(Synchronizer)
+    synchronizer.bulk_size = 2
+    synchronizer.deferred_indexer = MagicMock()
+    synchronizer.deferred_indexer.reindex.side_effect = lambda: events.append("reindex")
+    synchronizer.metrics = NullMetrics()
+    synchronizer.run = None
+    synchronizer.convert_research_outputs = lambda research_outputs, page: [
+        {"uuid": uuid} for uuid in research_outputs
+    ]
+    synchronizer.transfer_research_output_files = step("transfer")
+    synchronizer.persist_research_output = step("persist")
+    synchronizer.notify_research_output = step("notify")
+
+    synchronizer.process_research_outputs(create_app(), ["a", "b", "c"])
+    assert events == [
+        "transfer a",
+        "transfer b",
+        "transfer c",
+        "begin",
+        "persist a",
+        "commit",
+        "begin",
+        "persist c",
+        "commit",
+        "reindex",
+        "notify a",
+        "notify c",
+    ]
@@ -7,9 +7,26 @@
 
 """Converter tests."""
 import json
+from concurrent.futures import ThreadPoolExecutor
 from os.path import dirname, join
+from types import SimpleNamespace
+from unittest.mock import patch
 
-from invenio_rdm_pure.converter import Converter, Marc21Record
+import pytest
+from lxml import etree
+
+from invenio_rdm_pure.converter import (
+    ConversionCache,
+    Converter,
+    DataField,
+    FieldMapping,
+    LanguageIndex,
+    Marc21Record,
+    Marc21Validator,
+    SubField,
+    parallel,
+)
+from invenio_rdm_pure.converter.parallel import ConversionPool
 
 
 def load_json(filename):
@@ -25,3 +42,231 @@ def test_conversion():
         load_json(join("data", "pure_record_fake.json"))
     )
     assert Marc21Record.is_valid_marc21_xml_string(marc21_xml)
+
+
+def test_parallel_conversion():
+    """Test conversion and validation of research outputs in worker processes."""
+    record = load_json(join("data", "pure_record_fake.json"))
+    invalid = dict(record, abstract="Unhandled value type")
+    pool = ConversionPool(processes=2)
+    try:
+        results = list(pool.convert_many([record, invalid] * 3, batch_size=2))
+        assert pool.convert([record]) == [
+            (Converter().convert_pure_json_to_marc21_xml(record, pretty=False), "")
+        ]
+    finally:
+        pool.shutdown()
+    assert [research_output for research_output, _, _ in results] == [
+        record,
+        invalid,
+    ] * 3
+    for research_output, record_xml, error in results:
+        if research_output is record:
+            assert Marc21Record.is_valid_marc21_xml_string(record_xml)
+        else:
+            assert record_xml is None
+            assert error == "RuntimeError: Unhandled value type"
+
+
+def test_conversion_pool_in_daemonic_process():
+    """Test that daemonic processes, e.g. celery prefork workers, start no pool."""
+    daemon = SimpleNamespace(daemon=True)
+    with patch.object(parallel, "current_process", return_value=daemon):
+        assert parallel.get_conversion_pool(2) is None
+        with pytest.raises(RuntimeError):
+            ConversionPool(processes=2)
+
+
+def test_validator():
+    """Test validation of parsed, serialized and malformed records."""
+    validator = Marc21Validator()
+    record = Marc21Record()
+    record.add_value(tag="245", code="a", value="Title")
+    valid = record.to_xml_string()
+    invalid = valid.replace("<leader>", "<unknown/><leader>")
+    reports = validator.validate_many([valid, invalid, "<record>", etree.XML(valid)])
+    assert reports[0] == [] and reports[3] == []
+    assert len(reports[1]) == 1 and "unknown" in reports[1][0]
+    assert len(reports[2]) == 1
+    assert validator.validate(etree.XML(valid))
+    assert not validator.validate_string(invalid)
+
+
+def test_validator_threads():
+    """Test that every thread validates with its own compiled schema."""
+    validator = Marc21Validator()
+    record = Marc21Record()
+    record.add_value(tag="245", code="a", value="Title")
+    valid = record.to_xml_string()
+    invalid = valid.replace("<leader>", "<unknown/><leader>")
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(validator.validate_string, [valid, invalid] * 50))
+    assert results == [True, False] * 50
+
+
+def test_xml_escaping():
+    """Test that values are escaped and serialized compact or pretty-printed."""
+    record = Marc21Record()
+    record.add_value(tag="520", code="a", value="Fish & Chips <3\x0b")
+    record.add_value(tag="300", code="a", value=42)
+    compact = record.to_xml_string(pretty=False)
+    assert "Fish &amp; Chips &lt;3</subfield>" in compact
+    assert "\n" not in compact
+    assert Marc21Record.is_valid_marc21_xml_string(compact)
+    assert Marc21Record.is_valid_marc21_xml_string(record.to_xml_string())
+    assert (
+        etree.XML(compact.split("?>", 1)[1]).findtext(
+            "{http://www.loc.gov/MARC21/slim}datafield[@tag='300']/*"
+        )
+        == "42"
+    )
+
+
+def test_unique_values():
+    """Test that unique values are only added once and indexed by tag."""
+    record = Marc21Record()
+    for _ in range(3):
+        record.add_unique_value(tag="700", ind1="1", code="u", value="Institute")
+        record.add_unique_value(tag="100", ind1="1", code="u", value="Institute")
+    record.add_value(tag="700", ind1="1", code="u", value="Institute")
+    datafield = DataField("700", "1")
+    datafield.subfields.append(SubField("a", "Author"))
+    record.add_datafield(datafield)
+    assert len(record.datafields) == 4
+    assert len(record.get_datafields("700")) == 3
+    assert record.get_datafields("245") == []
+    assert record.contains(DataField("700", "1"), SubField("a", "Author"))
+    assert not record.contains(DataField("700", "2"), SubField("a", "Author"))
+
+
+def test_field_mappings():
+    """Test the declarative mappings and the dispatch table of the Converter."""
+
+    class SeriesConverter(Converter):
+        FIELD_MAPPINGS = Converter.FIELD_MAPPINGS + (
+            FieldMapping(
+                "seriesTitle", tag="490", code="a", path=("value",), value_type=dict
+            ),
+        )
+
+    record = SeriesConverter().convert_pure_json_to_marc21_record(
+        {
+            "numberOfPages": 42,
+            "volume": "7",
+            "seriesTitle": {"value": "Series"},
+            "unknown": 1,
+        }
+    )
+    values = [
+        (datafield.tag, datafield.ind1, datafield.ind2, subfield.code, subfield.value)
+        for datafield in record.datafields
+        for subfield in datafield.subfields
+    ]
+    assert values == [
+        ("300", " ", " ", "a", "42"),
+        ("490", "0", " ", "a", "7"),
+        ("773", "0", "8", "g", "7"),
+        ("490", " ", " ", "a", "Series"),
+    ]
+    assert "seriesTitle" not in Converter.get_handlers()
+    assert not {"attribute", "many"} & set(Converter.get_handlers())
+    assert Converter.get_handlers()["title"] is Converter.convert_title
+    with pytest.raises(RuntimeError):
+        Converter().convert_pure_json_to_marc21_record({"numberOfPages": "42"})
+
+
+def test_language_index(tmp_path):
+    """Test normalized, alias and code lookups of the shared language index."""
+    assert Converter().languages is Converter().languages
+    languages = Converter().languages
+    assert languages["English"] == languages[" ENGLISH "] == "eng"
+    assert languages["Norwegian Bokmal"] == languages["Norwegian Bokmål"] == "nob"
+    assert languages["Occitan"] == languages["Occitan (post 1500)"] == "oci"
+    assert languages["Greek"] == "ell"
+    assert languages["de"] == languages["ger"] == languages["deu"] == "deu"
+    assert "Klingonish" not in languages
+
+    cache_path = str(tmp_path / "languages.pickle")
+    built = LanguageIndex.load(cache_path)
+    loaded = LanguageIndex.load(cache_path)
+    assert loaded.codes == built.codes == languages.codes
+
+    with pytest.raises(RuntimeError):
+        Converter().convert_language(
+            {"term": {"text": [{"locale": "en_GB", "value": "Klingonish"}]}},
+            Marc21Record(),
+        )
+
+
+def test_convert_many():
+    """Test lazy batch conversion with and without validation and pool."""
+    record = load_json(join("data", "pure_record_fake.json"))
+    invalid = dict(record, uuid="invalid", abstract="Unhandled value type")
+    empty = {"uuid": "empty"}
+    converter = Converter()
+    results = converter.convert_many(iter([record, invalid, empty]))
+    assert next(results) == (
+        record["uuid"],
+        converter.convert_pure_json_to_marc21_xml(record, pretty=False),
+    )
+    uuid, result = next(results)
+    assert uuid == "invalid" and isinstance(result, RuntimeError)
+    uuid, result = next(results)
+    assert uuid == "empty" and "leader" in str(result)
+    assert isinstance(
+        dict(converter.convert_many([empty], validate=False))["empty"], str
+    )
+
+    class MalformedConverter(Converter):
+        def convert_malformed(self, value, record):
+            raise AttributeError("'int' object has no attribute 'get'")
+
+    malformed = dict(record, uuid="malformed", malformed=1)
+    results = dict(MalformedConverter().convert_many([malformed, record]))
+    assert isinstance(results["malformed"], AttributeError)
+    assert isinstance(results[record["uuid"]], str)
+
+    pool = ConversionPool(processes=1)
+    try:
+        pooled = dict(converter.convert_many([record, invalid], pool=pool))
+        unvalidated = dict(
+            converter.convert_many([empty], validate=False, pretty=True, pool=pool)
+        )
+    finally:
+        pool.shutdown()
+    assert Marc21Record.is_valid_marc21_xml_string(pooled[record["uuid"]])
+    assert str(pooled["invalid"]) == "RuntimeError: Unhandled value type"
+    assert unvalidated["empty"] == converter.convert_pure_json_to_marc21_xml(
+        empty, pretty=True
+    )
+
+
+def test_conversion_cache(tmp_path):
+    """Test that cached conversions are reused, versioned and evicted."""
+    cache = ConversionCache(str(tmp_path / "cache.db"), max_entries=2)
+    record = load_json(join("data", "pure_record_fake.json"))
+    converter = Converter()
+    [(_, record_xml)] = converter.convert_many([record], cache=cache)
+    assert cache.get(cache.get_key(record)) == record_xml
+    pretty_xml = converter.convert_pure_json_to_marc21_xml(record, pretty=True)
+    assert dict(converter.convert_many([record], pretty=True, cache=cache)) == {
+        record["uuid"]: pretty_xml
+    }
+    pretty_cache = ConversionCache(str(tmp_path / "pretty.db"))
+    for pretty, expected in ((True, pretty_xml), (False, record_xml)):
+        results = converter.convert_many([record], pretty=pretty, cache=pretty_cache)
+        assert dict(results) == {record["uuid"]: expected}
+
+    cache.set(cache.get_key(record), "<cached/>")
+    assert dict(converter.convert_many([record], cache=cache)) == {
+        record["uuid"]: "<cached/>"
+    }
+    assert cache.get(ConversionCache(cache.path, version="2").get_key(record)) is None
+
+    cache.set("a", "<a/>")
+    cache.set("b", "<b/>")
+    assert len(cache) == 2
+    assert cache.get("a") == "<a/>"
+    cache.set("c", "<c/>")
+    assert cache.get("b") is None
+    assert len(cache) == 2
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Fake Pure server tests."""
+
+import hashlib
+from datetime import date
+
+import pytest
+
+from invenio_rdm_pure.pure import PureClient
+from invenio_rdm_pure.pure.utils import (
+    get_research_output,
+    get_research_output_changes,
+    get_research_output_count,
+    iter_person_research_outputs,
+    iter_research_outputs,
+)
+from invenio_rdm_pure.testing import FakePureServer
+
+
+@pytest.fixture()
+def client():
+    """Create a Pure client retrying without delay."""
+    with PureClient(max_retries=20, backoff_factor=0, backoff_max=0) as client:
+        yield client
+
+
+def test_fake_server_api(client):
+    """Test paging, lookups and changes of the fake Pure API."""
+    with FakePureServer(size=25, changes=3, api_key="key") as server:
+        url = server.api_url
+        assert get_research_output_count("key", url, client=client) == 25
+        research_outputs = list(iter_research_outputs("key", url, 10, client=client))
+        assert len({ro["uuid"] for ro in research_outputs}) == 25
+        uuid = research_outputs[7]["uuid"]
+        assert get_research_output("key", url, uuid, client=client) == (
+            research_outputs[7]
+        )
+        assert get_research_output("key", url, "unknown", client=client) == {}
+        assert get_research_output_count("wrong", url, client=client) == -1
+        changes = get_research_output_changes("key", url, date.today(), client=client)
+        assert list(changes) == [ro["uuid"] for ro in research_outputs[:3]]
+
+
+def test_fake_server_person_research_outputs(client):
+    """Test that the research outputs of a person are paged like all others."""
+    with FakePureServer(size=25, persons=3) as server:
+        url = server.api_url
+        research_outputs = list(iter_research_outputs("", url, 10, client=client))
+        person_uuid = server.corpus.get_person_uuid(1)
+        person_research_outputs = list(
+            iter_person_research_outputs("", url, person_uuid, 3, client=client)
+        )
+        assert person_research_outputs == research_outputs[1::3]
+        with pytest.raises(RuntimeError):
+            list(iter_person_research_outputs("", url, "unknown", client=client))
+
+
+def test_fake_server_faults(client, tmp_path):
+    """Test that throttled, failed and truncated requests are recovered from."""
+    with FakePureServer(
+        size=30, error_rate=0.2, throttle_rate=0.2, truncate_rate=0.3, retry_after=0
+    ) as server:
+        research_outputs = list(
+            iter_research_outputs("", server.api_url, 7, client=client)
+        )
+        assert len(research_outputs) == 30
+        pure_files = [
+            electronic_version["file"]
+            for research_output in research_outputs
+            for electronic_version in research_output["electronicVersions"]
+        ]
+        assert pure_files
+        path = str(tmp_path / "file.pdf")
+        for pure_file in pure_files[:5]:
+            checksum = client.download(pure_file["fileURL"], path, max_attempts=10)
+            with open(path, "rb") as fp:
+                content = fp.read()
+            assert len(content) == pure_file["size"]
+            assert checksum == f"md5:{hashlib.md5(content).hexdigest()}"
+        stats = server.stats
+        assert stats["errors"] + stats["throttled"] + stats["truncated"] > 0
+        assert stats["requests"] > stats["research-outputs"] + stats["files"]
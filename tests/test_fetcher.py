@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Research output fetcher tests."""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from invenio_rdm_pure.pure import PureClient
+from invenio_rdm_pure.pure.fetcher import ResearchOutputFetcher
+
+RESEARCH_OUTPUT_COUNT = 95
+
+
+class PureHandler(BaseHTTPRequestHandler):
+    """Serve research outputs, failing the first request of every page."""
+
+    failed_offsets = set()
+
+    def do_GET(self):
+        """Handle a GET request for a page of research outputs."""
+        query = parse_qs(urlparse(self.path).query)
+        size, offset = int(query["size"][0]), int(query["offset"][0])
+        if offset not in self.failed_offsets:
+            self.failed_offsets.add(offset)
+            self.send_response(503)
+            self.end_headers()
+            return
+        items = [
+            {"uuid": str(i)}
+            for i in range(offset, min(offset + size, RESEARCH_OUTPUT_COUNT))
+        ]
+        body = json.dumps({"count": RESEARCH_OUTPUT_COUNT, "items": items}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        """Silence request logging."""
+
+
+@pytest.fixture()
+def pure_api_url():
+    """Run a local Pure API serving research outputs."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PureHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+
+
+def test_fetch_all_pages(pure_api_url):
+    """Test that every page is fetched and handled exactly once."""
+    uuids = []
+    fetcher = ResearchOutputFetcher(
+        "key", pure_api_url, concurrency=4, client=PureClient(backoff_factor=0)
+    )
+    chunks = [(10, offset) for offset in range(0, RESEARCH_OUTPUT_COUNT, 10)]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        fetcher.run(
+            chunks,
+            lambda size, offset, items: uuids.extend(item["uuid"] for item in items),
+            executor=executor,
+            workers=2,
+        )
+    assert sorted(uuids, key=int) == [str(i) for i in range(RESEARCH_OUTPUT_COUNT)]
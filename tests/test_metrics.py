@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Synchronization metrics tests."""
+
+import json
+
+import pytest
+
+from invenio_rdm_pure.metrics import (
+    Metrics,
+    NullMetrics,
+    collect_metrics,
+    get_metrics,
+    merge_snapshots,
+    render_metrics,
+)
+
+
+def test_stages_are_timed():
+    """Test that latencies and failures of the stages are recorded."""
+    metrics = Metrics(buckets=(0.1, 1))
+    metrics.observe("fetch", 0.05)
+    metrics.observe("fetch", 0.5)
+    with pytest.raises(RuntimeError):
+        with metrics.time("fetch"):
+            raise RuntimeError("Failed")
+    assert list(metrics.timed("convert", ["a", "b"])) == ["a", "b"]
+    metrics.increment("pure_sync_downloaded_bytes_total", 100)
+
+    snapshot = metrics.snapshot()
+    fetch = snapshot["stages"]["fetch"]
+    assert fetch["count"] == 3
+    assert fetch["errors"] == 1
+    assert fetch["buckets"][1] == 1
+    assert sum(fetch["buckets"]) == 3
+    assert snapshot["stages"]["convert"]["count"] == 2
+    assert snapshot["counters"]["pure_sync_downloaded_bytes_total"] == 100
+
+    metrics.observe("email", 2)
+    summary = metrics.summarize(snapshot)
+    assert summary.startswith("email 1x 2.00s")
+    assert "fetch" not in summary
+
+
+def test_render_metrics():
+    """Test that merged metrics are rendered as cumulative Prometheus histograms."""
+    first, second = Metrics(buckets=(0.1, 1)), Metrics(buckets=(0.1, 1))
+    first.observe("download", 0.05)
+    second.observe("download", 0.5)
+    second.observe("download", 5, error=True)
+    second.increment("pure_sync_records_total", 2)
+
+    text = render_metrics(merge_snapshots([first.snapshot(), second.snapshot()]))
+    assert 'pure_sync_stage_seconds_bucket{stage="download",le="0.1"} 1' in text
+    assert 'pure_sync_stage_seconds_bucket{stage="download",le="1"} 2' in text
+    assert 'pure_sync_stage_seconds_bucket{stage="download",le="+Inf"} 3' in text
+    assert 'pure_sync_stage_seconds_count{stage="download"} 3' in text
+    assert 'pure_sync_stage_errors_total{stage="download"} 1' in text
+    assert "pure_sync_records_total 2\n" in text
+    assert "pure_sync_downloaded_bytes_total 0\n" in text
+
+
+def test_metrics_endpoint(create_app, tmp_path):
+    """Test that the endpoint adds up the metrics saved by other processes."""
+    worker = Metrics()
+    worker.observe("publish", 0.2)
+    (tmp_path / "worker-1.json").write_text(json.dumps(worker.snapshot()))
+    (tmp_path / "worker-2.json").write_text("invalid")
+    worker.save(str(tmp_path))
+
+    app = create_app(PURE_METRICS_ENABLED=True, PURE_METRICS_DIRECTORY=str(tmp_path))
+    with app.app_context():
+        assert isinstance(get_metrics(), Metrics)
+    with app.test_client() as client:
+        response = client.get("/pure/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert 'pure_sync_stage_seconds_count{stage="publish"} 1' in response.text
+
+    app = create_app(PURE_METRICS_ENABLED=False)
+    with app.app_context():
+        assert isinstance(get_metrics(), NullMetrics)
+        assert collect_metrics()["stages"] == {}
+    with app.test_client() as client:
+        assert client.get("/pure/metrics").status_code == 404
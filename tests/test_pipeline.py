@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Synchronization pipeline tests."""
+
+from threading import Thread
+
+import pytest
+
+from invenio_rdm_pure.synchronizer.pipeline import Pipeline, Stage
+
+
+def test_pipeline():
+    """Test that items pass all stages, are dropped on None or on errors."""
+    results, errors = [], []
+
+    def double(item):
+        if item == 3:
+            raise RuntimeError("Unhandled value type")
+        return item * 2
+
+    stages = [
+        Stage("drop-odd", lambda item: item if item % 2 == 0 or item == 3 else None),
+        Stage("double", double, workers=3),
+        Stage("collect", results.append, workers=2),
+    ]
+    pipeline = Pipeline(
+        stages,
+        queue_size=2,
+        on_error=lambda stage, item, exc: errors.append((stage.name, item)),
+    )
+    pipeline.run(range(100))
+    assert sorted(results) == [item * 2 for item in range(0, 100, 2)]
+    assert errors == [("double", 3)]
+
+
+def test_pipeline_source_failure():
+    """Test that the workers shut down if the source of items fails."""
+    results = []
+
+    def items():
+        yield 1
+        raise RuntimeError("Failed to fetch research outputs")
+
+    pipeline = Pipeline([Stage("collect", results.append, workers=2)])
+    with pytest.raises(RuntimeError):
+        pipeline.run(items())
+    assert results == [1]
+
+
+def test_pipeline_error_handler_failure():
+    """Test that the pipeline finishes if the error handler raises."""
+    results = []
+
+    def fail(item):
+        if item == 1:
+            raise RuntimeError("Unhandled value type")
+        return item
+
+    def on_error(stage, item, exc):
+        raise RuntimeError("Failed to count the failed item")
+
+    stages = [Stage("fail", fail, workers=2), Stage("collect", results.append)]
+    pipeline = Pipeline(stages, on_error=on_error)
+    thread = Thread(target=pipeline.run, args=(range(4),), daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert sorted(results) == [0, 2, 3]
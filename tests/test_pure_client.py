@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Pure client tests."""
+
+import hashlib
+import io
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from invenio_rdm_pure.pure import PureClient
+from invenio_rdm_pure.pure import client as client_module
+
+
+def make_response(status_code, headers=None):
+    """Create a fake response with given status code."""
+    response = MagicMock(spec=requests.Response)
+    response.status_code = status_code
+    response.headers = headers or {}
+    return response
+
+
+def test_backoff_delay_is_bounded():
+    """Test that the backoff delay never exceeds its cap."""
+    client = PureClient(backoff_factor=1, backoff_max=4)
+    for attempt in range(10):
+        assert 0 <= client.get_backoff_delay(attempt) <= 4
+
+
+@patch("invenio_rdm_pure.pure.client.time.sleep")
+def test_retry_on_unavailable(sleep):
+    """Test that transient failures are retried until the request succeeds."""
+    client = PureClient(max_retries=3)
+    client.session.request = MagicMock(
+        side_effect=[
+            requests.ConnectionError(),
+            make_response(503, {"Retry-After": "2"}),
+            make_response(200),
+        ]
+    )
+    response = client.get("https://pure.example.org/ws/api/research-outputs")
+    assert response.status_code == 200
+    assert client.session.request.call_count == 3
+    assert sleep.call_args_list[1][0][0] >= 2
+
+
+@patch("invenio_rdm_pure.pure.client.time.sleep")
+def test_retries_are_bounded(sleep):
+    """Test that the last error is returned once the retries are exhausted."""
+    client = PureClient(max_retries=2)
+    client.session.request = MagicMock(return_value=make_response(502))
+    assert client.get("https://pure.example.org").status_code == 502
+    assert client.session.request.call_count == 3
+
+    client.session.request = MagicMock(side_effect=requests.Timeout())
+    with pytest.raises(requests.Timeout):
+        client.get("https://pure.example.org")
+
+
+def make_download_response(status_code, content, headers=None):
+    """Create a fake streamed response delivering given content."""
+    response = make_response(status_code, headers)
+    response.__enter__.return_value = response
+    response.iter_content.return_value = [content[:3], content[3:]]
+    return response
+
+
+def iter_interrupted(content):
+    """Yield given content, then fail like a connection closed mid-transfer."""
+    yield content
+    raise requests.exceptions.ChunkedEncodingError("Connection broken")
+
+
+def test_download_resumes_interrupted_transfer(tmp_path):
+    """Test that an interrupted download is resumed with a conditional Range request."""
+    path = tmp_path / "file.txt"
+    interrupted = make_download_response(200, b"", {"ETag": '"v1"'})
+    interrupted.iter_content.return_value = iter_interrupted(b"hello ")
+    client = PureClient(backoff_factor=0)
+    client.session.request = MagicMock(
+        side_effect=[
+            interrupted,
+            make_download_response(
+                206, b"world", {"Content-Range": "bytes 6-10/11", "ETag": '"v1"'}
+            ),
+        ]
+    )
+    checksum = client.download(
+        "https://pure.example.org/file", str(path), max_attempts=2
+    )
+    assert path.read_bytes() == b"hello world"
+    assert checksum == "md5:" + hashlib.md5(b"hello world").hexdigest()
+    headers = client.session.request.call_args[1]["headers"]
+    assert headers["Range"] == "bytes=6-"
+    assert headers["If-Range"] == '"v1"'
+
+
+def test_download_overwrites_stale_file(tmp_path):
+    """Test that a file left at the path is overwritten, not resumed."""
+    path = tmp_path / "file.txt"
+    path.write_bytes(b"stale")
+    client = PureClient()
+    client.session.request = MagicMock(
+        return_value=make_download_response(200, b"hello world")
+    )
+    checksum = client.download(
+        "https://pure.example.org/file", str(path), checksum_algorithm="sha256"
+    )
+    assert path.read_bytes() == b"hello world"
+    assert checksum == "sha256:" + hashlib.sha256(b"hello world").hexdigest()
+    assert "Range" not in client.session.request.call_args[1]["headers"]
+
+
+def test_open_stream_computes_checksum():
+    """Test that a streamed file is checksummed while it is read."""
+    response = make_download_response(200, b"", {"Content-Length": "11"})
+    response.raw = io.BytesIO(b"hello world")
+    client = PureClient()
+    client.session.request = MagicMock(return_value=response)
+    with client.open_stream("https://pure.example.org/file") as stream:
+        assert stream.length == 11
+        assert stream.read(5) + stream.read() == b"hello world"
+    assert stream.size == 11
+    assert stream.checksum == "md5:" + hashlib.md5(b"hello world").hexdigest()
+
+
+def test_default_client_is_configured(create_app):
+    """Test that the default client applies the request settings."""
+    app = create_app()
+    app.config.update(PURE_REQUEST_TIMEOUT=7, PURE_REQUEST_MAX_RETRIES=2)
+    with patch.object(client_module, "_default_client", None):
+        with app.app_context():
+            client = client_module.get_default_client()
+    assert client.timeout == 7
+    assert client.max_retries == 2
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Pure utility tests."""
+
+import json
+from datetime import date
+from unittest.mock import MagicMock
+
+import pytest
+
+from invenio_rdm_pure.pure.utils import (
+    download_pure_file,
+    get_next_page,
+    get_research_output_changes,
+    iter_person_research_outputs,
+    iter_research_outputs,
+)
+
+PURE_API_URL = "https://pure.example.org/ws/api/"
+
+
+def make_page(offset, size, count):
+    """Create a fake Pure response for a page of research outputs."""
+    page = {
+        "count": count,
+        "items": [{"uuid": str(i)} for i in range(offset, min(offset + size, count))],
+        "navigationLinks": [],
+    }
+    if offset > 0:
+        page["navigationLinks"].append({"ref": "prev", "href": "prev"})
+    if offset + size < count:
+        page["navigationLinks"].append(
+            {
+                "ref": "next",
+                "href": f"{PURE_API_URL}research-outputs?size={size}&offset={offset + size}",
+            }
+        )
+    response = MagicMock(status_code=200, text=json.dumps(page))
+    return response
+
+
+def test_get_next_page():
+    """Test extraction of the next link from navigationLinks."""
+    assert not get_next_page({})
+    assert not get_next_page({"navigationLinks": [{"ref": "prev", "href": "a"}]})
+    assert (
+        get_next_page(
+            {
+                "navigationLinks": [
+                    {"ref": "prev", "href": "a"},
+                    {"ref": "next", "href": "b"},
+                ]
+            }
+        )
+        == "b"
+    )
+
+
+def test_iter_research_outputs():
+    """Test that all research outputs are yielded by following next links."""
+    client = MagicMock()
+    client.get.side_effect = lambda url, headers: make_page(
+        int(url.rsplit("=", 1)[1]), 10, 25
+    )
+    uuids = [
+        research_output["uuid"]
+        for research_output in iter_research_outputs(
+            "key", PURE_API_URL, size=10, client=client
+        )
+    ]
+    assert uuids == [str(i) for i in range(25)]
+    assert client.get.call_count == 3
+
+
+def test_iter_person_research_outputs():
+    """Test that only the research outputs of the person are requested."""
+    client = MagicMock()
+    client.get.side_effect = lambda url, headers: make_page(0, 10, 3)
+    research_outputs = list(
+        iter_person_research_outputs("key", PURE_API_URL, "person", client=client)
+    )
+    assert len(research_outputs) == 3
+    client.get.assert_called_once_with(
+        f"{PURE_API_URL}persons/person/research-outputs?size=100&offset=0",
+        headers={"api-key": "key", "accept": "application/json"},
+    )
+
+
+def test_iter_research_outputs_failure():
+    """Test that a failing page request is not silently treated as the end."""
+    client = MagicMock()
+    client.get.return_value = MagicMock(status_code=500)
+    with pytest.raises(RuntimeError):
+        list(iter_research_outputs("key", PURE_API_URL, client=client))
+
+
+def test_get_research_output_changes():
+    """Test that the change feed is followed and reduced to research outputs."""
+    pages = {
+        f"{PURE_API_URL}changes/2021-03-01": {
+            "moreChanges": True,
+            "resumptionToken": "token",
+            "items": [
+                {
+                    "uuid": "a",
+                    "changeType": "ADD",
+                    "familySystemName": "ResearchOutput",
+                },
+                {"uuid": "p", "changeType": "UPDATE", "familySystemName": "Person"},
+            ],
+        },
+        f"{PURE_API_URL}changes/token": {
+            "moreChanges": False,
+            "resumptionToken": "token",
+            "items": [
+                {
+                    "uuid": "a",
+                    "changeType": "UPDATE",
+                    "familySystemName": "ResearchOutput",
+                },
+                {
+                    "uuid": "b",
+                    "changeType": "DELETE",
+                    "familySystemName": "ResearchOutput",
+                },
+            ],
+        },
+    }
+    client = MagicMock()
+    client.get.side_effect = lambda url, headers: MagicMock(
+        status_code=200, text=json.dumps(pages[url])
+    )
+    changes = get_research_output_changes(
+        "key", PURE_API_URL, date(2021, 3, 1), client=client
+    )
+    assert changes == {"a": "UPDATE", "b": "DELETE"}
+
+
+def test_download_pure_file_resumes(create_app, tmp_path):
+    """Test that a download is attempted as often as configured."""
+    app = create_app()
+    app.config["PURE_DOWNLOAD_MAX_ATTEMPTS"] = 4
+    client = MagicMock()
+    with app.app_context():
+        path = download_pure_file(
+            "https://pure/file", "user", "pass", str(tmp_path), "a.pdf", client=client
+        )
+    assert path == str(tmp_path / "a.pdf")
+    assert client.download.call_args.kwargs["max_attempts"] == 4
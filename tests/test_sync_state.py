@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Synchronization state tests."""
+
+import time
+from datetime import date
+
+from invenio_rdm_pure.models import (
+    PureSyncChunk,
+    PureSyncLock,
+    PureSyncRun,
+    PureSyncState,
+)
+from invenio_rdm_pure.utils import get_fingerprint
+
+
+def test_fingerprint():
+    """Test that the fingerprint only depends on the relevant content."""
+    record = {"uuid": "a", "title": {"value": "Title"}, "totalScopusCitations": 1}
+    reordered = {"totalScopusCitations": 2, "title": {"value": "Title"}, "uuid": "a"}
+    excluded = ("totalScopusCitations",)
+    assert get_fingerprint(record, excluded) == get_fingerprint(reordered, excluded)
+    assert get_fingerprint(record) != get_fingerprint(reordered)
+    changed = dict(record, title={"value": "Changed"})
+    assert get_fingerprint(record, excluded) != get_fingerprint(changed, excluded)
+
+
+def test_sync_state(base_app):
+    """Test creating and updating the synchronization state."""
+    assert PureSyncState.get("uuid") is None
+    PureSyncState.set("uuid", "recid-1", "fingerprint-1", {"a.pdf": "md5:1"})
+    PureSyncState.set("uuid", "recid-2", "fingerprint-2", {})
+    state = PureSyncState.get("uuid")
+    assert state.recid == "recid-2"
+    assert state.fingerprint == "fingerprint-2"
+    assert state.file_checksums == {}
+
+
+def test_sync_state_lock(base_app):
+    """Test that the state of a research output is created when it is locked."""
+    state = PureSyncState.lock("new")
+    assert state.recid is None and state.fingerprint is None
+    assert PureSyncState.lock("new") is state
+    PureSyncState.set("new", "recid-1", "fingerprint-1", {})
+    assert PureSyncState.lock("new").recid == "recid-1"
+
+
+def test_sync_chunks(base_app):
+    """Test checkpointing chunks of the initial synchronization."""
+    PureSyncChunk.set_status(100, 0, PureSyncChunk.DONE)
+    PureSyncChunk.set_status(100, 100, PureSyncChunk.FAILED)
+    PureSyncChunk.set_status(100, 200, PureSyncChunk.FAILED)
+    PureSyncChunk.set_status(100, 200, PureSyncChunk.DONE)
+    assert PureSyncChunk.get_completed() == {(100, 0), (100, 200)}
+    PureSyncChunk.reset()
+    assert PureSyncChunk.get_completed() == set()
+
+
+def test_sync_runs(base_app):
+    """Test registering synchronization runs."""
+    run = PureSyncRun.start("scheduled")
+    skipped = PureSyncRun.start("initial", PureSyncRun.SKIPPED)
+    assert run.status == PureSyncRun.RUNNING and run.throughput is None
+    assert skipped.finished is not None
+    PureSyncRun.add_records(run.id, 10)
+    PureSyncRun.add_records(run.id, 5, failed=2)
+    PureSyncRun.finish(run.id, PureSyncRun.DONE)
+    run = PureSyncRun.get(run.id)
+    assert run.status == PureSyncRun.DONE
+    assert run.records == 15
+    assert run.failed == 2
+    assert run.throughput >= 0
+    assert [latest.id for latest in PureSyncRun.get_latest(2)] == [skipped.id, run.id]
+
+
+def test_sync_lock(base_app):
+    """Test that the lock is held by one run until it is released or expires."""
+    first, second = PureSyncRun.start("initial"), PureSyncRun.start("scheduled")
+    assert PureSyncLock.acquire("sync", first.id, 60)
+    assert not PureSyncLock.acquire("sync", second.id, 60)
+    assert PureSyncLock.renew("sync", first.id, 60)
+    assert not PureSyncLock.renew("sync", second.id, 60)
+    PureSyncLock.release("sync", second.id)
+    assert PureSyncLock.get("sync").run_id == first.id
+    PureSyncLock.release("sync", first.id)
+    assert PureSyncLock.get("sync") is None
+    assert PureSyncLock.acquire("sync", second.id, 0)
+    time.sleep(0.01)
+    assert PureSyncLock.get("sync") is None
+    assert PureSyncLock.acquire("sync", first.id, 60)
+
+
+def test_sync_orphaned_runs(base_app):
+    """Test that runs of dead processes are finished as failed."""
+    dead, taken_over, alive = (PureSyncRun.start("initial") for _ in range(3))
+    assert PureSyncLock.acquire("dead", dead.id, 0)
+    assert PureSyncLock.acquire("takeover", taken_over.id, 0)
+    assert PureSyncLock.acquire("alive", alive.id, 60)
+    time.sleep(0.01)
+    second = PureSyncRun.start("scheduled")
+    assert PureSyncLock.acquire("takeover", second.id, 60)
+    assert PureSyncRun.get(taken_over.id).status == PureSyncRun.FAILED
+    assert PureSyncRun.finish_orphaned(0) == 1
+    assert PureSyncRun.get(dead.id).status == PureSyncRun.FAILED
+    assert PureSyncRun.get(dead.id).finished is not None
+    assert PureSyncRun.get(alive.id).status == PureSyncRun.RUNNING
+    assert PureSyncRun.get(second.id).status == PureSyncRun.RUNNING
+
+
+def test_sync_history(base_app):
+    """Test the last date synchronized by successful runs."""
+    assert PureSyncRun.get_last_synchronized_date() is None
+    for start, end, status in (
+        (date(2021, 1, 1), date(2021, 1, 3), PureSyncRun.DONE),
+        (date(2021, 1, 3), date(2021, 1, 5), PureSyncRun.FAILED),
+        (date(2021, 1, 7), date(2021, 1, 8), PureSyncRun.DONE),
+        (date(2020, 1, 1), date(2020, 1, 2), PureSyncRun.DONE),
+    ):
+        run = PureSyncRun.start("scheduled")
+        PureSyncRun.set_window(run.id, start, end)
+        PureSyncRun.finish(run.id, status)
+    assert PureSyncRun.get_last_synchronized_date() == date(2021, 1, 8)
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Synchronizer tests."""
+
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from invenio_files_rest.errors import StorageError
+
+from invenio_rdm_pure.metrics import NullMetrics
+from invenio_rdm_pure.synchronizer import Stage
+from invenio_rdm_pure.synchronizer import synchronizer as synchronizer_module
+from invenio_rdm_pure.synchronizer.synchronizer import Synchronizer
+
+
+@pytest.fixture()
+def synchronizer():
+    """Synchronizer without connections to Pure and Invenio."""
+    synchronizer = Synchronizer.__new__(Synchronizer)
+    synchronizer.metrics = NullMetrics()
+    synchronizer.run = None
+    synchronizer.deferred_indexer = None
+    synchronizer.reindex_unchanged = False
+    synchronizer.create_record = MagicMock(return_value=("recid-2", {}))
+    return synchronizer
+
+
+@patch.object(synchronizer_module, "UnitOfWork")
+@patch.object(synchronizer_module, "PureSyncState")
+def test_persist_locks_sync_state(state, uow, synchronizer):
+    """Test that a research output stored concurrently gets a new version."""
+    item = {
+        "research_output": {"uuid": "uuid"},
+        "fingerprint": "fingerprint-2",
+        "recid": None,
+        "record_xml": "<record/>",
+        "files": {},
+        "pure_files": [],
+    }
+    state.lock.return_value = SimpleNamespace(
+        recid="recid-1", fingerprint="fingerprint-1"
+    )
+    stored = synchronizer.persist_research_output(item)
+    assert stored["recid"] == "recid-2"
+    state.lock.assert_called_once_with("uuid")
+    assert synchronizer.create_record.call_args[1]["recid"] == "recid-1"
+    state.set.assert_called_once_with(
+        "uuid", "recid-2", "fingerprint-2", {}, commit=False
+    )
+    uow.return_value.__enter__.return_value.commit.assert_called_once()
+
+    state.lock.return_value = SimpleNamespace(
+        recid="recid-2", fingerprint="fingerprint-2"
+    )
+    assert synchronizer.persist_research_output(item) is None
+    synchronizer.create_record.assert_called_once()
+
+
+@patch.object(synchronizer_module, "PureSyncChunk")
+def test_pipeline_checkpoints_pages(chunk, synchronizer, create_app):
+    """Test that the pipeline checkpoints the pages it synchronized."""
+
+    def persist(item):
+        if item["uuid"] == "failed":
+            raise RuntimeError("Failed to store")
+        if item["uuid"] == "crash":
+            raise ValueError("Unexpected")
+        return item
+
+    synchronizer.run = MagicMock()
+    synchronizer.convert_research_outputs = lambda research_outputs, page: [
+        {"uuid": research_output["uuid"], "files": {}}
+        for research_output in research_outputs
+    ]
+    synchronizer.transfer_research_output_files = lambda item: item
+    synchronizer.persist_research_output = persist
+    synchronizer.notify_research_output = lambda item: item
+    pages = [
+        {"size": 2, "offset": 0, "research_outputs": [{"uuid": "a"}, {"uuid": "b"}]},
+        {"size": 2, "offset": 2, "research_outputs": []},
+        {"size": 1, "offset": 4, "research_outputs": [{"uuid": "failed"}]},
+        {"size": 1, "offset": 5, "research_outputs": [{"uuid": "crash"}]},
+    ]
+    with create_app().app_context():
+        synchronizer.get_pipeline().run(pages)
+    assert sorted(call.args for call in chunk.set_status.call_args_list) == [
+        (1, 4, chunk.FAILED),
+        (2, 0, chunk.DONE),
+        (2, 2, chunk.FAILED),
+    ]
+    synchronizer.run.add_records.assert_any_call(0, failed=1)
+    assert synchronizer.run.add_records.call_count == 2
+    assert synchronizer.run.status == synchronizer_module.PureSyncRun.FAILED
+
+
+class FakeChunks(object):
+    """Checkpoints of chunks kept in memory."""
+
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self):
+        """Default constructor of the class."""
+        self.statuses = {}
+
+    def set_status(self, size, offset, status):
+        """Record the status of given chunk."""
+        self.statuses[(size, offset)] = status
+
+    def get_completed(self):
+        """Get the (size, offset) pairs of all completed chunks."""
+        return {chunk for chunk, status in self.statuses.items() if status == "done"}
+
+
+def test_chunks_with_failed_items_are_resumed(synchronizer, create_app):
+    """Test that a chunk with a failed research output is retried on resume."""
+
+    def persist(item):
+        if item["uuid"] == "b":
+            raise RuntimeError("Failed to store b")
+        return item
+
+    chunks = FakeChunks()
+    synchronizer.pure_api_key = synchronizer.pure_api_url = synchronizer.client = None
+    synchronizer.convert_research_outputs = lambda research_outputs, page: [
+        {"uuid": research_output["uuid"], "files": {}}
+        for research_output in research_outputs
+    ]
+    synchronizer.transfer_research_output_files = lambda item: item
+    synchronizer.persist_research_output = persist
+    synchronizer.notify_research_output = lambda item: item
+    with patch.object(synchronizer_module, "PureSyncChunk", chunks), patch.object(
+        synchronizer_module, "get_research_output_count", return_value=3
+    ), create_app().app_context():
+        for size, offset, uuids in ((2, 0, "ab"), (1, 2, "c")):
+            research_outputs = [{"uuid": uuid} for uuid in uuids]
+            synchronizer.process_page(
+                {"size": size, "offset": offset, "research_outputs": research_outputs}
+            )
+        assert chunks.statuses == {(2, 0): "failed", (1, 2): "done"}
+        assert synchronizer.get_initial_synchronization_chunks(2, resume=True) == [
+            (2, 0)
+        ]
+
+
+def test_chunk_with_failed_items_is_not_synchronized(synchronizer, create_app):
+    """Test that a chunk reports failure if one of its research outputs failed."""
+
+    def convert_research_outputs(research_outputs, page):
+        page["failed"] += len(research_outputs) - 1
+        return [{"uuid": "a", "files": {}}]
+
+    synchronizer.pure_api_key = synchronizer.pure_api_url = synchronizer.client = None
+    synchronizer.bulk_size = None
+    synchronizer.convert_research_outputs = convert_research_outputs
+    synchronizer.transfer_research_output_files = lambda item: item
+    synchronizer.persist_research_output = lambda item: item
+    synchronizer.notify_research_output = lambda item: item
+    with patch.object(synchronizer_module, "PureSyncChunk", FakeChunks()), patch.object(
+        synchronizer_module, "get_research_outputs"
+    ) as research_outputs, create_app().app_context():
+        research_outputs.return_value = [{"uuid": "a"}]
+        assert synchronizer.synchronize_research_output_chunk(1, 0)
+        research_outputs.return_value = [{"uuid": "a"}, {"uuid": "b"}]
+        assert not synchronizer.synchronize_research_output_chunk(2, 0)
+        research_outputs.return_value = []
+        assert not synchronizer.synchronize_research_output_chunk(2, 0)
+
+
+@patch.object(synchronizer_module, "iter_research_outputs")
+def test_streaming_synchronization(research_outputs, synchronizer, create_app):
+    """Test that the cursor based synchronization fails if a page fails."""
+
+    def iter_research_outputs(*args, **kwargs):
+        yield from ({"uuid": uuid} for uuid in "abc")
+        raise RuntimeError("Failed to fetch research outputs")
+
+    research_outputs.side_effect = iter_research_outputs
+    synchronized = []
+    synchronizer.pure_api_key = synchronizer.pure_api_url = synchronizer.client = None
+    synchronizer.bulk_size = None
+    synchronizer.run = MagicMock()
+    synchronizer.get_page_stages = lambda: [Stage("store", synchronized.append)]
+    with create_app().app_context():
+        with pytest.raises(RuntimeError):
+            synchronizer.run_streaming_research_output_synchronization(page_size=2)
+    assert synchronized == [{"research_outputs": [{"uuid": "a"}, {"uuid": "b"}]}]
+
+
+@patch.object(synchronizer_module, "PureSyncState")
+def test_prepare_skips_unchanged_research_outputs(state, synchronizer, create_app):
+    """Test that unchanged research outputs are skipped, or reindexed in bulk mode."""
+    research_output = {"uuid": "uuid", "title": {"value": "Title"}}
+    synchronizer.reindex_record = MagicMock()
+    with create_app().app_context():
+        state.get.return_value = None
+        item = synchronizer.prepare_research_output(research_output)
+        assert item["recid"] is None
+
+        state.get.return_value = SimpleNamespace(
+            recid="recid-1", fingerprint=item["fingerprint"]
+        )
+        assert synchronizer.prepare_research_output(research_output) is None
+        synchronizer.reindex_record.assert_not_called()
+        synchronizer.deferred_indexer = MagicMock()
+        synchronizer.reindex_unchanged = True
+        assert synchronizer.prepare_research_output(research_output) is None
+        synchronizer.reindex_record.assert_called_once_with("recid-1")
+
+        changed = dict(research_output, title={"value": "Changed"})
+        item = synchronizer.prepare_research_output(changed)
+        assert item["recid"] == "recid-1"
+        assert item["fingerprint"] != state.get.return_value.fingerprint
+
+
+@patch.object(synchronizer_module, "Marc21RecordService")
+def test_create_record_new_version(service, synchronizer):
+    """Test that a new version is created for a research output with record."""
+    synchronizer.pure_user_id = 1
+    service.return_value.publish.return_value = SimpleNamespace(id="recid-2")
+    recid, checksums = Synchronizer.create_record(
+        synchronizer, "<record/>", {}, recid="recid-1"
+    )
+    assert (recid, checksums) == ("recid-2", {})
+    service.return_value.new_version.assert_called_once()
+    assert service.return_value.new_version.call_args[1]["id_"] == "recid-1"
+    draft = service.return_value.update_draft.return_value
+    assert service.return_value.update_draft.call_args[1]["metadata"].xml == (
+        "<record/>"
+    )
+    service.return_value.publish.assert_called_once()
+    assert service.return_value.publish.call_args[1]["id_"] == draft.id
+    service.return_value.create.assert_not_called()
+
+    Synchronizer.create_record(synchronizer, "<record/>", {})
+    service.return_value.create.assert_called_once()
+
+
+@patch.object(synchronizer_module, "time")
+@patch.object(synchronizer_module, "db")
+@patch.object(synchronizer_module, "ObjectVersion")
+@patch.object(synchronizer_module, "Marc21DraftFilesService")
+def test_stream_files_enforces_size(
+    service, object_version, db, time, synchronizer, create_app
+):
+    """Streamed files are written with the size given by Pure and retried."""
+    synchronizer.pure_user_id = 1
+    synchronizer.pure_username = synchronizer.pure_password = "pure"
+    stream = MagicMock(length=None, size=3, checksum="md5:abc")
+    synchronizer.client = MagicMock()
+    synchronizer.client.open_stream.return_value.__enter__.return_value = stream
+    synchronizer.client.get_backoff_delay.return_value = 0
+    object_version.create.side_effect = [StorageError("Size mismatch"), None]
+    pure_file = {"fileURL": "https://pure/file", "fileName": "file.pdf", "size": 3}
+
+    with create_app().app_context():
+        checksums = synchronizer.stream_files_to_draft([pure_file], MagicMock())
+
+    assert checksums == {"file.pdf": "md5:abc"}
+    assert object_version.create.call_count == 2
+    assert object_version.create.call_args.kwargs["size"] == 3
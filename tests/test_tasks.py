@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2021 Technische Universität Graz.
+#
+# invenio-rdm-pure is free software; you can redistribute it and/or modify it
+# under the terms of the MIT License; see LICENSE file for more details.
+
+"""Celery task tests."""
+
+import time
+from unittest.mock import patch
+
+import pytest
+from celery.exceptions import Retry
+
+from invenio_rdm_pure import tasks
+from invenio_rdm_pure.models import PureSyncLock, PureSyncRun
+from invenio_rdm_pure.synchronizer.runs import SynchronizationRun
+
+
+@patch.object(tasks, "Synchronizer")
+def test_skipped_initial_synchronization_is_retried(synchronizer, create_app):
+    """Test that a skipped initial synchronization is retried after the lease."""
+    synchronizer.return_value.run_initial_synchronization.return_value = False
+    with create_app(PURE_SYNC_LOCK_LEASE=600).app_context():
+        with patch.object(
+            tasks.initial_synchronize_records, "retry", side_effect=Retry
+        ) as retry:
+            with pytest.raises(Retry):
+                tasks.initial_synchronize_records(resume=True)
+        retry.assert_called_once_with(countdown=600)
+
+        synchronizer.return_value.run_initial_synchronization.return_value = True
+        tasks.initial_synchronize_records(resume=True, cursor=True)
+        synchronizer.return_value.run_initial_synchronization.assert_called_with(
+            resume=True, cursor=True
+        )
+
+
+@patch.object(tasks, "Synchronizer")
+def test_synchronize_research_output_chunk(synchronizer, create_app):
+    """Test that chunks are retried if they could not be fetched, or fail."""
+    synchronize = synchronizer.return_value.synchronize_research_output_chunk
+    app = create_app(PURE_SYNCHRONIZER_CHUNK_MAX_RETRIES=2, PURE_REQUEST_BACKOFF_MAX=5)
+    with app.app_context():
+        synchronize.return_value = True
+        assert tasks.synchronize_research_output_chunk(10, 0) is True
+        synchronize.assert_called_with(10, 0)
+
+        synchronize.return_value = False
+        with patch.object(
+            tasks.synchronize_research_output_chunk, "retry", side_effect=Retry
+        ) as retry:
+            with pytest.raises(Retry):
+                tasks.synchronize_research_output_chunk(10, 10)
+        retry.assert_called_once_with(countdown=5, max_retries=2)
+
+        synchronize.side_effect = RuntimeError("Database unavailable")
+        assert tasks.synchronize_research_output_chunk(10, 20) is False
+
+
+@patch.object(tasks, "SynchronizationRun")
+def test_finalize_initial_synchronization(run, create_app):
+    """Test that the run is finished with the outcome of its chunks."""
+    with create_app().app_context():
+        tasks.finalize_initial_synchronization([True, True], run_id=1)
+        run.assert_called_with(1)
+        run.return_value.finish.assert_called_with(PureSyncRun.DONE)
+        tasks.finalize_initial_synchronization([True, False], run_id=2)
+        run.return_value.finish.assert_called_with(PureSyncRun.FAILED)
+        tasks.fail_initial_synchronization(None, RuntimeError(), None, run_id=3)
+        run.assert_called_with(3)
+        run.return_value.finish.assert_called_with(PureSyncRun.FAILED)
+
+
+@patch.object(tasks.renew_synchronization_lock, "apply_async")
+@patch.object(tasks, "chord")
+@patch.object(tasks, "Synchronizer")
+@patch.object(tasks, "SynchronizationRun")
+def test_distribute_initial_synchronization(
+    run, synchronizer, chord, renew, create_app
+):
+    """Test that the run is failed by the error callback of the chord."""
+    run.start.return_value.run_id = 7
+    run.start.return_value.lock = "synchronization"
+    run.start.return_value.lease = 600
+    get_chunks = synchronizer.return_value.get_initial_synchronization_chunks
+    get_chunks.return_value = [(10, 0), (5, 10)]
+    with create_app().app_context():
+        tasks.distribute_initial_synchronization(10)
+    [header], _ = chord.call_args
+    assert [task.args for task in header] == [(10, 0, 7), (5, 10, 7)]
+    [callback], _ = chord.return_value.call_args
+    assert callback.args == (7,)
+    [errback] = callback.options["link_error"]
+    assert errback.task == tasks.fail_initial_synchronization.name
+    assert errback.kwargs == {"run_id": 7}
+    renew.assert_called_once_with((7, "synchronization"), countdown=200)
+
+
+@patch.object(tasks.renew_synchronization_lock, "apply_async")
+@patch.object(tasks, "chord")
+@patch.object(tasks, "Synchronizer")
+def test_distributed_lock_outlives_lease(synchronizer, chord, renew, base_app):
+    """Test that the lock is renewed while chunks are pending, until finalized."""
+    base_app.config["PURE_SYNC_LOCK_LEASE"] = 1
+    get_chunks = synchronizer.return_value.get_initial_synchronization_chunks
+    get_chunks.return_value = [(10, 0)]
+    tasks.distribute_initial_synchronization(10)
+    [(run_id, lock)], _ = renew.call_args
+
+    for _ in range(3):
+        time.sleep(0.5)
+        tasks.renew_synchronization_lock(run_id, lock)
+    assert PureSyncLock.get(lock).run_id == run_id
+    assert SynchronizationRun.start("scheduled") is None
+    assert PureSyncRun.finish_orphaned(0) == 0
+    assert PureSyncRun.get(run_id).status == PureSyncRun.RUNNING
+    assert renew.call_count == 4
+
+    tasks.finalize_initial_synchronization([True], run_id)
+    tasks.renew_synchronization_lock(run_id, lock)
+    assert renew.call_count == 4
+    assert PureSyncLock.get(lock) is None
+    assert PureSyncRun.get(run_id).status == PureSyncRun.DONE